@@ -2,16 +2,20 @@ import plotly.graph_objects as go
 import plotly.express as px
 import streamlit as st
 
-from src.app_data import apply_filters, load_data, render_sidebar
+from src.app_data import apply_filters, load_data, page_query, portfolio_rollup, render_sidebar
 
 st.set_page_config(page_title="Portfolio Drivers", layout="wide")
 
-data = load_data()
-filters = render_sidebar(data["fact"])
+COLUMNS = {
+    "fact": ["gp", "actual_hours", "actual_cost"],
+    "job_driver": ["quoted_overrun_cost", "unquoted_work_cost", "rate_mix_impact", "nonbillable_leakage", "revenue_timing_anomaly", "actual_gp", "baseline_gp"],
+}
+
+data = load_data(COLUMNS)
+filters = render_sidebar(data)
 filtered = apply_filters(data, filters)
 
 job_driver = filtered["job_driver"]
-fact = filtered["fact"]
 
 st.title("Portfolio Drivers")
 
@@ -64,22 +68,14 @@ fig.update_layout(title="GP Driver Waterfall")
 st.plotly_chart(fig, use_container_width=True)
 
 st.subheader("Driver Contribution by Department")
-if not fact.empty:
-    dept_driver = fact.groupby("Department_reporting", as_index=False).agg(
-        actual_gp=("gp", "sum"),
-        unquoted_cost=("actual_cost", lambda s: s[fact.loc[s.index, "is_unquoted_task"]].sum()),
-        overrun_hours=("hour_overrun", "sum"),
-    )
+dept_driver = portfolio_rollup(filters, ["Department_reporting"])
+if not dept_driver.empty:
+    dept_driver = dept_driver.rename(columns={"gp": "actual_gp"})[["Department_reporting", "actual_gp", "unquoted_cost", "overrun_hours"]]
     dept_driver = dept_driver.sort_values("actual_gp", ascending=False).head(10)
     fig_dept = px.bar(dept_driver, x="Department_reporting", y="actual_gp", title="Top Departments by GP")
     st.plotly_chart(fig_dept, use_container_width=True)
 
 st.subheader("Top Loss Drivers (Tasks)")
-loss_tasks = (
-    fact.groupby("task_name", as_index=False)
-    .agg(gp=("gp", "sum"), actual_cost=("actual_cost", "sum"))
-    .sort_values("gp", ascending=True)
-    .head(10)
-)
+loss_tasks = page_query("task_gp", data, filters, limit=10)[["task_name", "gp", "actual_cost"]]
 
 st.dataframe(loss_tasks, width="stretch")
@@ -2,30 +2,40 @@ import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 
-from src.app_data import apply_filters, load_data, render_sidebar
+from src.app_data import apply_filters, load_data, render_sidebar, search_jobs
+from src.queries import filter_fact
 
 st.set_page_config(page_title="Job Drilldown", layout="wide")
 
-data = load_data()
-filters = render_sidebar(data["fact"])
+COLUMNS = {
+    "fact": ["actual_hours", "actual_cost", "rev_alloc", "gp", "quoted_time", "hour_overrun", "dept_match_status"],
+    "job_month": ["rev_alloc", "actual_cost", "gp"],
+    "job_total": ["rev_alloc"],
+    "job_driver": ["quoted_overrun_cost", "unquoted_work_cost", "rate_mix_impact", "nonbillable_leakage", "revenue_timing_anomaly", "actual_gp", "baseline_gp"],
+}
+
+data = load_data(COLUMNS)
+filters = render_sidebar(data)
 filtered = apply_filters(data, filters)
 
 job_total = filtered["job_total"]
-job_month = filtered["job_month"]
-job_driver = filtered["job_driver"]
-fact = filtered["fact"]
 
 st.title("Job Drilldown")
 
 job_options = job_total.sort_values("rev_alloc", ascending=False)["job_no"].tolist()
+job_search = st.text_input("Find job", "").strip()
+if job_search:
+    matches = set(search_jobs(job_search))
+    job_options = [job for job in job_options if job in matches]
 selected_job = st.selectbox("Select Job", job_options)
 
 if not selected_job:
     st.stop()
 
-job_month_sel = job_month[job_month["job_no"] == selected_job]
-job_driver_sel = job_driver[job_driver["job_no"] == selected_job]
-job_fact = fact[fact["job_no"] == selected_job]
+job_month_sel = data.job_rows("job_month", selected_job)
+job_month_sel = job_month_sel[(job_month_sel["month_key"] >= filters["start"]) & (job_month_sel["month_key"] <= filters["end"])]
+job_driver_sel = data.job_rows("job_driver", selected_job)
+job_fact = filter_fact(data.job_rows("fact", selected_job), filters)
 
 st.subheader("Job P&L Trend")
 if not job_month_sel.empty:
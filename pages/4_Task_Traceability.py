@@ -1,34 +1,36 @@
 import plotly.express as px
 import streamlit as st
 
-from src.app_data import apply_filters, load_data, render_sidebar
+from src.app_data import load_data, page_query, render_sidebar
+from src.dimensions import prefix_slice
 
 st.set_page_config(page_title="Task Traceability", layout="wide")
 
-data = load_data()
-filters = render_sidebar(data["fact"])
-filtered = apply_filters(data, filters)
+COLUMNS = {
+    "fact": ["gp", "actual_hours", "actual_cost", "dept_match_status", "Role_top"],
+}
 
-fact = filtered["fact"]
+data = load_data(COLUMNS)
+filters = render_sidebar(data)
 
 st.title("Task Traceability")
 
-job_options = ["Portfolio"] + sorted(fact["job_no"].dropna().unique().tolist())
+scope_jobs = page_query("scope_jobs", data, filters)["job_no"].tolist()
+job_search = st.text_input("Find job", "").strip()
+if job_search:
+    scope_jobs = scope_jobs[prefix_slice(scope_jobs, job_search)]
+job_options = ["Portfolio"] + scope_jobs
 selected_job = st.selectbox("Scope", job_options, index=0)
 
-scope_df = fact if selected_job == "Portfolio" else fact[fact["job_no"] == selected_job]
+job_no = None if selected_job == "Portfolio" else selected_job
+scope_df = page_query("task_points", data, filters, job_no=job_no)
 
 if scope_df.empty:
     st.info("No data for selected scope.")
     st.stop()
 
 st.subheader("Tasks Driving GP Loss")
-loss_tasks = (
-    scope_df.groupby("task_name", as_index=False)
-    .agg(gp=("gp", "sum"), actual_hours=("actual_hours", "sum"), actual_cost=("actual_cost", "sum"))
-    .sort_values("gp", ascending=True)
-    .head(15)
-)
+loss_tasks = page_query("task_gp", data, filters, job_no=job_no, limit=15)
 
 st.dataframe(loss_tasks, width="stretch")
 
@@ -42,9 +44,6 @@ fig = px.scatter(
 )
 st.plotly_chart(fig, use_container_width=True)
 
-role_col = "Role_top"
-if role_col in scope_df.columns:
-    st.subheader("Role Concentration")
-    role_summary = scope_df.groupby(role_col, as_index=False).agg(hours=("actual_hours", "sum"), gp=("gp", "sum"))
-    role_summary = role_summary.sort_values("hours", ascending=False).head(10)
-    st.dataframe(role_summary, width="stretch")
+st.subheader("Role Concentration")
+role_summary = page_query("role_hours", data, filters, job_no=job_no, limit=10)
+st.dataframe(role_summary, width="stretch")
@@ -3,24 +3,32 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 
-from src.app_data import apply_filters, load_data, render_sidebar
+from src.app_data import apply_filters, filter_segments, load_data, load_recent_task_catalog, load_similarity_index, page_query, render_sidebar
 from src.utils import read_settings
 
 st.set_page_config(page_title="Smart Quote Generator", layout="wide")
 
-data = load_data()
-filters = render_sidebar(data["fact"])
+COLUMNS = {
+    "fact": ["gp", "rev_alloc", "actual_cost"],
+    "task_catalog": None,
+}
+
+data = load_data(COLUMNS)
+filters = render_sidebar(data)
 filtered = apply_filters(data, filters)
 
-fact = filtered["fact"]
 task_catalog = filtered["task_catalog"]
-job_template = filtered["job_template"]
-job_comps = filtered["job_comps"]
 
 st.title("Smart Quote Generator")
 settings = read_settings()
 coverage_target = settings.get("smart_quote", {}).get("coverage_target", 0.8)
 
+window = st.selectbox("Evidence window", ["Full build period", "Last 12 months", "Last 6 months"])
+if window != "Full build period":
+    task_catalog = filter_segments(load_recent_task_catalog(int(window.split()[1])), filters)
+    accuracy = settings.get("smart_quote", {}).get("sketch_relative_accuracy", 0.01)
+    st.caption(f"Jobs count towards the window their last month falls in; medians and percentiles are estimates within {accuracy:.0%}.")
+
 if task_catalog.empty:
     st.info("No task intelligence data for the selected filters.")
     st.stop()
@@ -82,14 +90,15 @@ c1.metric("Expected Cost", f"${summary_cost:,.0f}")
 c2.metric("Guardrail Price", f"${summary_price:,.0f}")
 
 st.subheader("Evidence: Comparable Jobs")
-segment_jobs = fact[(fact["Department_reporting"] == selected_dept) & (fact["Product"] == selected_product)]
-segment_summary = segment_jobs.groupby("job_no", as_index=False).agg(
-    gp=("gp", "sum"),
-    rev_alloc=("rev_alloc", "sum"),
-    actual_cost=("actual_cost", "sum"),
-)
-segment_summary["margin"] = np.where(segment_summary["rev_alloc"] > 0, (segment_summary["gp"] / segment_summary["rev_alloc"]) * 100, 0.0)
-segment_summary = segment_summary.sort_values("margin", ascending=False).head(10)
+similarity_index = load_similarity_index()
+if similarity_index is not None:
+    draft = recommended.groupby("task_name", observed=True)["suggested_hours"].sum()
+    segment_summary = similarity_index.query(draft, k=10, dept=selected_dept, product=selected_product)
+    segment_summary["margin"] = segment_summary["margin"] * 100
+    segment_summary = segment_summary[["job_no", "similarity", "actual_hours", "gp", "rev_alloc", "margin"]]
+    st.caption("Delivered jobs in this segment whose task-hour mix is closest to the recommended tasks (cosine similarity).")
+else:
+    segment_summary = page_query("segment_jobs", data, filters, dept=selected_dept, product=selected_product, limit=10)
 
 st.dataframe(segment_summary, width="stretch")
 
@@ -4,19 +4,20 @@ import os
 import pandas as pd
 import streamlit as st
 
-from src.app_data import apply_filters, load_data, render_sidebar
+from src.app_data import filter_cache_stats, load_data, page_query, processed_path, render_sidebar
 
 st.set_page_config(page_title="Data QA", layout="wide")
 
-data = load_data()
-filters = render_sidebar(data["fact"])
-filtered = apply_filters(data, filters)
+COLUMNS = {
+    "fact": ["Department_actual", "Department_quote", "is_unquoted_task", "is_quote_only_task", "is_unallocated_row"],
+}
 
-fact = filtered["fact"]
+data = load_data(COLUMNS)
+filters = render_sidebar(data)
 
 st.title("Data QA")
 
-qa_path = "data/processed/qa_report.json"
+qa_path = processed_path("qa_report.json")
 if os.path.exists(qa_path):
     with open(qa_path, "r", encoding="utf-8") as handle:
         qa = json.load(handle)
@@ -28,17 +29,16 @@ else:
     st.warning("qa_report.json not found. Run the build script to generate QA outputs.")
 
 st.subheader("Department Mismatch Matrix")
-if not fact.empty:
-    matrix = pd.crosstab(fact["Department_actual"], fact["Department_quote"]).head(20)
+mismatch_counts = page_query("dept_mismatch_counts", data, filters)
+if not mismatch_counts.empty:
+    matrix = mismatch_counts.pivot(index="Department_actual", columns="Department_quote", values="rows").fillna(0).astype(int).head(20)
     st.dataframe(matrix, width="stretch")
 
 st.subheader("Coverage Stats")
-coverage = {
-    "Missing Department Actual": int((fact["Department_actual"].fillna("") == "").sum()),
-    "Missing Department Quote": int((fact["Department_quote"].fillna("") == "").sum()),
-    "Unquoted Tasks": int(fact["is_unquoted_task"].sum()),
-    "Quote-Only Tasks": int(fact["is_quote_only_task"].sum()),
-    "Unallocated Rows": int(fact["is_unallocated_row"].sum()),
-}
-coverage_df = pd.DataFrame(list(coverage.items()), columns=["metric", "count"])
+coverage = page_query("coverage", data, filters).iloc[0]
+coverage_df = pd.DataFrame({"metric": coverage.index, "count": coverage.astype(int).to_numpy()})
 st.dataframe(coverage_df, width="stretch")
+
+st.subheader("Filter Cache")
+cache_df = pd.DataFrame(list(filter_cache_stats().items()), columns=["metric", "value"])
+st.dataframe(cache_df, width="stretch")
@@ -0,0 +1,78 @@
+"""Synthetic data, timing and argument helpers shared by the benchmark and report scripts."""
+import argparse
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+def bench_parser(description: str, jobs: str = "1000,10000,100000") -> argparse.ArgumentParser:
+    """Parser with the ``--jobs`` sweep and ``--seed`` every synthetic benchmark takes; scripts add their own options."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--jobs", default=jobs, help="Comma-separated job counts")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def parse_counts(text: str) -> List[int]:
+    return [int(count) for count in text.split(",") if count]
+
+
+def timed(func, *args):
+    """``(result, seconds)`` of one call."""
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+
+def percentiles(timings, quantiles=(50, 99)) -> List[float]:
+    return [float(np.percentile(timings, q)) for q in quantiles]
+
+
+def make_fact(
+    n_jobs: int,
+    rows_per_job: int,
+    rng: np.random.Generator,
+    n_tasks: int = 300,
+    n_months: int = 12,
+) -> pd.DataFrame:
+    """Fact-shaped rows: Zipf-distributed task names, six departments and eight products assigned per job."""
+    n_rows = n_jobs * rows_per_job
+    job = rng.integers(0, n_jobs, n_rows)
+    months = pd.date_range("2025-07-01", periods=n_months, freq="MS")
+    hours = rng.exponential(6.0, n_rows).round(2)
+    revenue = rng.exponential(800.0, n_rows).round(2)
+    dept = pd.Series(job % 6).map("D{}".format)
+    return pd.DataFrame({
+        "job_no": pd.Series(job).map("J{:06d}".format),
+        "task_name": pd.Series(rng.zipf(1.3, n_rows) % n_tasks).map("T{:04d}".format),
+        "Department_actual": dept,
+        "Department_quote": dept,
+        "Department_reporting": dept,
+        "Product": pd.Series(job % 8).map("P{}".format),
+        "month_key": months[rng.integers(0, n_months, n_rows)],
+        "revenue_monthly": revenue,
+        "rev_alloc": revenue,
+        "actual_cost": (hours * rng.uniform(60, 140, n_rows)).round(2),
+        "actual_hours": hours,
+        "billable_hours": hours * (rng.random(n_rows) < 0.8),
+        "onshore_hours": hours * (rng.random(n_rows) < 0.6),
+        "quoted_time": np.where(rng.random(n_rows) < 0.8, hours * rng.uniform(0.6, 1.4, n_rows), np.nan),
+        "gp": (revenue * rng.uniform(-0.2, 0.6, n_rows)).round(2),
+        "is_unallocated_row": rng.random(n_rows) < 0.05,
+        "is_unquoted_task": rng.random(n_rows) < 0.15,
+        "dept_mismatch": rng.random(n_rows) < 0.1,
+    })
+
+
+def make_template_fact(n_jobs: int, rng: np.random.Generator, n_tasks: int = 120, n_templates: int = 40) -> pd.DataFrame:
+    """Jobs in two segments, each drawing tasks from a few overlapping templates, so comparables are well defined."""
+    templates = [rng.choice(n_tasks, size=rng.integers(5, 25), replace=False) for _ in range(n_templates)]
+    rows = []
+    for job in range(n_jobs):
+        tasks = set(templates[rng.integers(0, len(templates))])
+        tasks ^= set(rng.choice(n_tasks, size=rng.integers(0, 4), replace=False))
+        for task in tasks:
+            rows.append((f"J{job:06d}", f"T{task:03d}", float(rng.exponential(5.0)), "CREATIVE", f"P{job % 2}"))
+    return pd.DataFrame(rows, columns=["job_no", "task_name", "actual_hours", "Department_reporting", "Product"])
@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.job_index import job_offsets, job_rows, offsets_lookup
+from src.schema import apply_schema
+
+from _bench_common import bench_parser, make_fact, parse_counts, percentiles, timed
+
+
+def parse_args():
+    parser = bench_parser("Benchmark single-job lookups: boolean scan vs the job offset index")
+    parser.add_argument("--rows-per-job", type=int, default=40, help="Average fact rows per job")
+    parser.add_argument("--lookups", type=int, default=200)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'jobs':>9} {'rows':>11} {'index (s)':>10} {'scan p50':>9} {'scan p99':>9} {'slice p50':>10} {'slice p99':>10}  (ms)")
+    for n_jobs in parse_counts(args.jobs):
+        fact = make_fact(n_jobs, args.rows_per_job, rng)
+        fact = apply_schema(fact.sort_values("job_no", kind="mergesort").reset_index(drop=True))
+        offsets, index_seconds = timed(lambda: offsets_lookup(job_offsets(fact)))
+
+        scan, sliced = [], []
+        for job_no in rng.choice(offsets[0], size=args.lookups):
+            start = time.perf_counter()
+            expected = fact[fact["job_no"] == job_no]
+            scan.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            rows = job_rows(fact, offsets, job_no)
+            sliced.append((time.perf_counter() - start) * 1000)
+            if not rows.equals(expected):
+                raise AssertionError(f"Slice for {job_no} differs from the boolean scan")
+
+        print(f"{n_jobs:>9,} {len(fact):>11,} {index_seconds:>10.2f} {percentiles(scan)[0]:>9.2f} {percentiles(scan)[1]:>9.2f} {percentiles(sliced)[0]:>10.3f} {percentiles(sliced)[1]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
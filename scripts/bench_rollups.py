@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.metrics import build_job_month_summary, build_job_total_summary
+
+from _bench_common import bench_parser, make_fact, parse_counts, timed
+
+
+def parse_args():
+    parser = bench_parser("Benchmark the job-month and job-total summaries")
+    parser.add_argument("--rows-per-job", type=int, default=12, help="Average fact rows per job")
+    parser.add_argument("--months", type=int, default=12, help="Distinct months")
+    parser.add_argument("--legacy-max-jobs", type=int, default=1000, help="Largest job count to also time the lambda implementation on")
+    return parser.parse_args()
+
+
+def legacy_rollup(fact: pd.DataFrame, keys) -> pd.DataFrame:
+    return fact.groupby(keys, as_index=False).agg(
+        rev_alloc=("rev_alloc", "sum"),
+        actual_cost=("actual_cost", "sum"),
+        actual_hours=("actual_hours", "sum"),
+        unallocated_revenue=("rev_alloc", lambda s: s[fact.loc[s.index, "is_unallocated_row"]].sum()),
+        unquoted_hours=("actual_hours", lambda s: s[fact.loc[s.index, "is_unquoted_task"]].sum()),
+        dept_mismatch_hours=("actual_hours", lambda s: s[fact.loc[s.index, "dept_mismatch"]].sum()),
+    )
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    job_counts = parse_counts(args.jobs)
+    empty_quotes = pd.DataFrame(columns=["job_no", "quoted_time", "quoted_amount", "Client", "Job_Name"])
+
+    print(f"{'jobs':>9} {'rows':>10} {'summary':>10} {'masked (s)':>11} {'lambda (s)':>11} {'speedup':>8}")
+    for n_jobs in job_counts:
+        fact = make_fact(n_jobs, args.rows_per_job, rng, n_months=args.months)
+        for name, keys, build in [
+            ("job_month", ["job_no", "month_key"], lambda: build_job_month_summary(fact)),
+            ("job_total", ["job_no"], lambda: build_job_total_summary(fact, empty_quotes)),
+        ]:
+            _, masked_secs = timed(build)
+            line = f"{n_jobs:>9,} {len(fact):>10,} {name:>10} {masked_secs:>11.3f}"
+            if n_jobs <= args.legacy_max_jobs:
+                _, legacy_secs = timed(legacy_rollup, fact, keys)
+                line += f" {legacy_secs:>11.3f} {legacy_secs / masked_secs:>7.0f}x"
+            else:
+                line += f" {'-':>11} {'-':>8}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.arrow_store import arrow_path, read_arrow
+from src.io import ARTIFACT_FILES, read_parquet
+from src.schema import CATEGORIES_FILE, encode_categories, read_categories
+from src.snapshots import resolve_processed_dir
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure process memory per additional app session: pickled Parquet copies vs the shared Arrow mmap")
+    parser.add_argument("--processed-dir", default="data/processed")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--mode", choices=["parquet", "arrow"], help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def memory_mb() -> dict:
+    """Resident memory of this process from /proc (Linux): total, private anonymous and file-backed (shareable)."""
+    fields = {}
+    with open("/proc/self/status", "r", encoding="utf-8") as handle:
+        for line in handle:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+
+def touch(frames) -> float:
+    # Read every numeric column so mapped pages are resident before measuring.
+    return sum(float(np.nansum(df[col].to_numpy(dtype=float))) for df in frames for col in df.select_dtypes("number").columns)
+
+
+def load_parquet(directory: str) -> dict:
+    categories = read_categories(os.path.join(directory, CATEGORIES_FILE))
+    frames = {}
+    for name, filename in ARTIFACT_FILES.items():
+        df = encode_categories(read_parquet(os.path.join(directory, filename)), categories)
+        if "month_key" in df.columns:
+            df["month_key"] = pd.to_datetime(df["month_key"], errors="coerce")
+        frames[name] = df
+    return frames
+
+
+def run_sessions(directory: str, mode: str, sessions: int) -> dict:
+    """One cached load, then ``sessions`` sessions each taking every artifact the way the cache hands them out."""
+    before = memory_mb()
+    if mode == "arrow":
+        cached = {name: read_arrow(arrow_path(directory, name)) for name in ARTIFACT_FILES}
+    else:
+        cached = load_parquet(directory)
+    touch(cached.values())
+    loaded = memory_mb()
+
+    held = []
+    for _ in range(sessions):
+        if mode == "arrow":
+            # st.cache_resource: every session gets the same objects.
+            session = dict(cached)
+        else:
+            # st.cache_data: every session gets its own unpickled copy.
+            session = {name: pickle.loads(pickle.dumps(df)) for name, df in cached.items()}
+        touch(session.values())
+        held.append(session)
+    after = memory_mb()
+    return {
+        "load_private": loaded["RssAnon"] - before["RssAnon"],
+        "load_file": loaded["RssFile"] - before["RssFile"],
+        "per_session": (after["VmRSS"] - loaded["VmRSS"]) / max(sessions, 1),
+    }
+
+
+def main():
+    args = parse_args()
+    directory = resolve_processed_dir(args.processed_dir)
+    if args.mode:
+        print(json.dumps(run_sessions(directory, args.mode, args.sessions)))
+        return
+
+    print(f"{'store':>8} {'private MB/process':>19} {'shared file MB':>15} {'MB/extra session':>17}")
+    for mode in ["parquet", "arrow"]:
+        if mode == "arrow" and not all(os.path.exists(arrow_path(directory, name)) for name in ARTIFACT_FILES):
+            print(f"{mode:>8}  (no Arrow store in {directory}; rebuild with snapshots.arrow_store enabled)")
+            continue
+        # A fresh interpreter per mode, so the first load is measured from a clean process.
+        output = subprocess.run(
+            [sys.executable, __file__, "--processed-dir", args.processed_dir, "--sessions", str(args.sessions), "--mode", mode],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>8} {result['load_private']:>19.1f} {result['load_file']:>15.1f} {result['per_session']:>17.2f}")
+    print("\nPrivate memory is paid again by every worker process; file-backed pages are the shared page cache.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.similarity import JobSimilarityIndex
+
+from _bench_common import bench_parser, make_fact, parse_counts, percentiles, timed
+
+
+def parse_args():
+    parser = bench_parser("Benchmark comparable-job queries against the similarity index")
+    parser.add_argument("--tasks", type=int, default=400, help="Distinct task names")
+    parser.add_argument("--tasks-per-job", type=int, default=15, help="Average tasks per job")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-n", type=int, default=10)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    job_counts = parse_counts(args.jobs)
+
+    print(f"{'jobs':>9} {'nnz':>10} {'build (s)':>10} {'load (ms)':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'segment p99':>12}")
+    for n_jobs in job_counts:
+        fact = make_fact(n_jobs, args.tasks_per_job, rng, n_tasks=args.tasks)
+        index, build_seconds = timed(JobSimilarityIndex.build, fact)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.npz")
+            index.save(path)
+            index, load_seconds = timed(JobSimilarityIndex.load, path)
+
+        tasks = index.tasks[:50]
+        timings = {"all": [], "segment": []}
+        for _ in range(args.queries):
+            draft = dict(zip(rng.choice(tasks, size=12, replace=False), rng.exponential(10.0, 12)))
+            for name, segment in [("all", {}), ("segment", {"dept": "D1", "product": "P3"})]:
+                start = time.perf_counter()
+                index.query(draft, k=args.top_n, **segment)
+                timings[name].append((time.perf_counter() - start) * 1000)
+
+        p50, p99 = percentiles(timings["all"])
+        print(
+            f"{n_jobs:>9,} {index.matrix.nnz:>10,} {build_seconds:>10.2f} {load_seconds * 1000:>10.1f} "
+            f"{p50:>9.2f} {p99:>9.2f} {percentiles(timings['segment'])[1]:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.quote_intelligence import build_task_catalog
+
+from _bench_common import bench_parser, make_fact, parse_counts, timed
+
+
+def parse_args():
+    parser = bench_parser("Benchmark build_task_catalog against per-group percentile lambdas", jobs="1000,10000,50000")
+    parser.add_argument("--tasks", type=int, default=300, help="Distinct task names")
+    parser.add_argument("--tasks-per-job", type=int, default=15, help="Average task rows per job")
+    parser.add_argument("--legacy-max-jobs", type=int, default=10000, help="Largest job count to also time the lambda implementation on")
+    return parser.parse_args()
+
+
+def legacy_statistics(fact: pd.DataFrame) -> pd.DataFrame:
+    """The per-group lambdas build_task_catalog used for p75, p90 and volatility."""
+    df = fact[fact["task_name"] != "__UNALLOCATED__"].copy()
+    df["dept"] = df["Department_actual"].where(df["Department_actual"].fillna("") != "", df["Department_quote"])
+    df["Product"] = df["Product"].fillna("")
+    job_task = df.groupby(["job_no", "dept", "Product", "task_name"], as_index=False).agg(actual_hours=("actual_hours", "sum"))
+    return job_task.groupby(["dept", "Product", "task_name"], as_index=False).agg(
+        hours_per_job_p75=("actual_hours", lambda s: float(np.percentile(s, 75)) if len(s) else 0.0),
+        hours_per_job_p90=("actual_hours", lambda s: float(np.percentile(s, 90)) if len(s) else 0.0),
+        volatility=("actual_hours", lambda s: float(np.std(s)) / float(np.mean(s)) if np.mean(s) else 0.0),
+    )
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    job_counts = parse_counts(args.jobs)
+
+    print(f"{'jobs':>9} {'groups':>8} {'catalog (s)':>12} {'lambdas (s)':>12} {'speedup':>8} {'p75/p90 equal':>14} {'max vol diff':>13}")
+    for n_jobs in job_counts:
+        fact = make_fact(n_jobs, args.tasks_per_job, rng, n_tasks=args.tasks)
+        catalog, seconds = timed(build_task_catalog, fact)
+        row = f"{n_jobs:>9,} {len(catalog):>8,} {seconds:>12.2f}"
+        if n_jobs <= args.legacy_max_jobs:
+            legacy, legacy_seconds = timed(legacy_statistics, fact)
+            equal = all(np.array_equal(catalog[col].to_numpy(), legacy[col].to_numpy()) for col in ["hours_per_job_p75", "hours_per_job_p90"])
+            vol_diff = np.abs(catalog["volatility"].to_numpy() - legacy["volatility"].to_numpy()).max()
+            row += f" {legacy_seconds:>12.2f} {legacy_seconds / seconds:>7.1f}x {str(equal):>14} {vol_diff:>13.1e}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils import grouped_weighted_mode, normalize_text
+
+from _bench_common import parse_counts, timed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the grouped weighted-mode kernel")
+    parser.add_argument("--sizes", default="10000,100000,1000000,5000000", help="Comma-separated row counts")
+    parser.add_argument("--rows-per-group", type=int, default=8, help="Average rows per group")
+    parser.add_argument("--legacy-max-rows", type=int, default=100000, help="Largest size to also time the per-group implementation on")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def make_frame(n_rows: int, rows_per_group: int, rng: np.random.Generator) -> pd.DataFrame:
+    n_groups = max(1, n_rows // rows_per_group)
+    values = np.array(["Creative", "creative ", "TECH", "Strategy", "", "Ops", "Client  Services"], dtype=object)
+    return pd.DataFrame({
+        "group": rng.integers(0, n_groups, n_rows),
+        "value": values[rng.integers(0, len(values), n_rows)],
+        "weight": rng.exponential(3.0, n_rows).round(2),
+    })
+
+
+def legacy_weighted_mode(frame: pd.DataFrame) -> pd.DataFrame:
+    def per_group(group: pd.DataFrame) -> pd.Series:
+        tmp = pd.DataFrame({"v": group["value"].fillna("").astype(str).map(normalize_text), "w": group["weight"]})
+        tmp = tmp[tmp["v"] != ""]
+        if tmp.empty:
+            return pd.Series({"top_value": "", "top_share": 0.0})
+        dist = tmp.groupby("v", as_index=False)["w"].sum().sort_values("w", ascending=False)
+        total = float(dist["w"].sum())
+        return pd.Series({"top_value": dist.iloc[0]["v"], "top_share": float(dist.iloc[0]["w"] / total) if total else 0.0})
+
+    return frame.groupby("group").apply(per_group)
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    sizes = parse_counts(args.sizes)
+
+    print(f"{'rows':>10} {'groups':>9} {'grouped (s)':>12} {'rows/s':>12} {'per-group (s)':>14} {'speedup':>8}")
+    for n_rows in sizes:
+        frame = make_frame(n_rows, args.rows_per_group, rng)
+        n_groups = frame["group"].nunique()
+        _, grouped_secs = timed(grouped_weighted_mode, frame, "group", "value", "weight")
+        line = f"{n_rows:>10,} {n_groups:>9,} {grouped_secs:>12.3f} {n_rows / grouped_secs:>12,.0f}"
+        if n_rows <= args.legacy_max_rows:
+            _, legacy_secs = timed(legacy_weighted_mode, frame)
+            line += f" {legacy_secs:>14.3f} {legacy_secs / grouped_secs:>7.0f}x"
+        else:
+            line += f" {'-':>14} {'-':>8}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,12 +12,24 @@ def parse_args():
     parser.add_argument("--input", required=True, help="Path to Excel input file")
     parser.add_argument("--fy", default=None, help="Filter by financial year label (e.g., FY26)")
     parser.add_argument("--output", default="data/processed", help="Output directory")
+    parser.add_argument("--cache-dir", default="data/cache", help="Directory for parsed-sheet cache")
+    parser.add_argument("--no-cache", action="store_true", help="Force a fresh parse of the Excel workbook")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for independent build stages")
+    parser.add_argument("--incremental", action="store_true", help="Recompute only jobs whose inputs changed since the last build")
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
-    build_dataset(args.input, output_dir=args.output, fy=args.fy)
+    build_dataset(
+        args.input,
+        output_dir=args.output,
+        fy=args.fy,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+        incremental=args.incremental,
+        workers=args.workers,
+    )
 
 
 if __name__ == "__main__":
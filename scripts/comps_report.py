@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.comps import comps_recall_report
+from src.io import ARTIFACT_FILES, read_parquet
+from src.schema import decode_schema
+from src.snapshots import resolve_processed_dir
+
+from _bench_common import make_template_fact
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare the comps engines with brute-force Jaccard")
+    parser.add_argument("--input", default=None, help="Fact table to evaluate (default: the published build's fact)")
+    parser.add_argument("--synthetic-jobs", type=int, default=0, help="Evaluate a synthetic fact with this many jobs instead of --input")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--bands", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    input_path = args.input or os.path.join(resolve_processed_dir("data/processed"), ARTIFACT_FILES["fact"])
+    fact = make_template_fact(args.synthetic_jobs, rng) if args.synthetic_jobs else decode_schema(read_parquet(input_path))
+
+    lsh = {"lsh_min_jobs": 0, "lsh_num_perm": args.num_perm, "lsh_bands": args.bands}
+    start = time.perf_counter()
+    report = comps_recall_report(fact, top_n=args.top_n, engines={"exact": {"lsh_min_jobs": np.inf}, "lsh": lsh})
+    print(f"Evaluated {len(report) // 2} segments in {time.perf_counter() - start:.1f}s (brute force included)\n")
+
+    jobs = report["jobs"]
+    summary = report.assign(
+        identical_jobs=report["identical_share"] * jobs,
+        recall_jobs=report["recall"] * jobs,
+    ).groupby("engine").agg(jobs=("jobs", "sum"), identical_jobs=("identical_jobs", "sum"), recall_jobs=("recall_jobs", "sum"))
+    summary["identical_share"] = summary["identical_jobs"] / summary["jobs"]
+    summary["recall"] = summary["recall_jobs"] / summary["jobs"]
+    print(summary[["jobs", "identical_share", "recall"]].to_string(float_format="{:.4f}".format))
+
+    worst = report[report["engine"] == "lsh"].sort_values("recall").head(10)
+    print("\nLowest-recall segments (lsh):")
+    print(worst.to_string(index=False, float_format="{:.4f}".format))
+
+
+if __name__ == "__main__":
+    main()
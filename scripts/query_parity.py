@@ -0,0 +1,29 @@
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.query_parity import parity_report
+from src.snapshots import resolve_processed_dir
+from src.utils import read_settings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check that the pandas and DuckDB query backends return the same numbers")
+    parser.add_argument("--processed-dir", default="data/processed")
+    parser.add_argument("--rtol", type=float, default=1e-9, help="Relative tolerance for summed floats")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    checks, failures = parity_report(resolve_processed_dir(args.processed_dir), read_settings(), args.rtol)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{checks - len(failures)}/{checks} checks match")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.io import ARTIFACT_FILES, read_parquet
+from src.quote_intelligence import build_task_catalog, task_catalog_from_sketches
+from src.schema import decode_schema
+from src.snapshots import resolve_processed_dir
+
+from _bench_common import timed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare sketch-merged task catalogs with catalogs rebuilt from fact")
+    parser.add_argument("--processed-dir", default="data/processed")
+    parser.add_argument("--windows", default="3,6,12", help="Comma-separated trailing windows in months")
+    return parser.parse_args()
+
+
+def read_artifact(processed_dir: str, name: str) -> pd.DataFrame:
+    return decode_schema(read_parquet(os.path.join(processed_dir, ARTIFACT_FILES[name])))
+
+
+def relative_errors(exact: pd.DataFrame, estimate: pd.DataFrame) -> pd.Series:
+    keys = ["dept", "Product", "task_name"]
+    merged = exact.merge(estimate, on=keys, suffixes=("", "_sketch"))
+    columns = [col for col in exact.columns if col not in keys and col != "period_label" and f"{col}_sketch" in merged]
+    errors = {}
+    for col in columns:
+        truth = merged[col].to_numpy(dtype=float)
+        errors[col] = float(np.max(np.abs(merged[f"{col}_sketch"].to_numpy(dtype=float) - truth) / np.where(truth != 0, np.abs(truth), 1.0), initial=0.0))
+    return pd.Series(errors)
+
+
+def main():
+    args = parse_args()
+    args.processed_dir = resolve_processed_dir(args.processed_dir)
+    fact = read_artifact(args.processed_dir, "fact")
+    stats = read_artifact(args.processed_dir, "task_month_stats")
+    sketch = read_artifact(args.processed_dir, "task_sketch")
+
+    exact, exact_seconds = timed(build_task_catalog, fact)
+    estimate, sketch_seconds = timed(task_catalog_from_sketches, stats, sketch)
+    print(f"Full period: rebuilt from fact in {exact_seconds * 1000:.0f} ms, merged from sketches in {sketch_seconds * 1000:.0f} ms")
+    print("Max relative error per column (medians and percentiles are bounded by smart_quote.sketch_relative_accuracy):")
+    print(relative_errors(exact, estimate).to_string(float_format="{:.2e}".format))
+
+    end = stats["month_key"].max()
+    print(f"\n{'window':>8} {'tasks':>7} {'rescan (ms)':>12} {'sketch (ms)':>12}")
+    for months in [int(value) for value in args.windows.split(",") if value]:
+        start = end - pd.DateOffset(months=months - 1)
+        _, rescan_seconds = timed(build_task_catalog, fact, start, end)
+        window, window_seconds = timed(task_catalog_from_sketches, stats, sketch, start, end)
+        print(f"{months:>7}m {len(window):>7,} {rescan_seconds * 1000:>12.0f} {window_seconds * 1000:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
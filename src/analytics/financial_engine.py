@@ -1,20 +1,47 @@
+from functools import cached_property
+
 import pandas as pd
 
+from src.queries import run_sql
+
+KPI_SQL = """
+    SELECT
+        coalesce(sum(revenue_allocated), 0) AS revenue,
+        coalesce(sum(actual_cost), 0) AS cost,
+        coalesce(sum(revenue_allocated) FILTER (WHERE task_name = '__UNALLOCATED__'), 0) AS unallocated
+    FROM fact WHERE {where}
+"""
+TREND_SQL = """
+    SELECT month_key, sum(revenue_allocated) AS revenue_allocated, sum(actual_cost) AS actual_cost
+    FROM fact WHERE {where} AND month_key IS NOT NULL
+    GROUP BY month_key ORDER BY month_key
+"""
+
 
 class FinancialEngine:
-    def __init__(self, fact_df):
-        self.df = fact_df.copy()
-        if "month_key" in self.df.columns:
-            self.df["month_key"] = pd.to_datetime(self.df["month_key"], errors="coerce")
+    """Portfolio KPIs and trend over ``fact_df``, or in SQL over the ``fact`` view of a DuckDB ``connection``.
 
-    def get_kpis(self):
-        revenue = self.df["revenue_allocated"].sum() if "revenue_allocated" in self.df.columns else 0.0
-        cost = self.df["actual_cost"].sum() if "actual_cost" in self.df.columns else 0.0
-        margin_pct = ((revenue - cost) / revenue * 100) if revenue else 0.0
+    ``fact_df`` is not copied; each result is computed once on first use.
+    """
+
+    def __init__(self, fact_df=None, connection=None, filters=None):
+        self.connection = connection
+        self.filters = filters
+        self.df = fact_df
 
-        unallocated = 0.0
-        if "task_name" in self.df.columns and "revenue_allocated" in self.df.columns:
-            unallocated = self.df.loc[self.df["task_name"] == "__UNALLOCATED__", "revenue_allocated"].sum()
+    @cached_property
+    def _kpis(self):
+        if self.connection is not None:
+            row = run_sql(self.connection, KPI_SQL, self.filters).iloc[0]
+            revenue, cost, unallocated = float(row["revenue"]), float(row["cost"]), float(row["unallocated"])
+        else:
+            revenue = self.df["revenue_allocated"].sum() if "revenue_allocated" in self.df.columns else 0.0
+            cost = self.df["actual_cost"].sum() if "actual_cost" in self.df.columns else 0.0
+
+            unallocated = 0.0
+            if "task_name" in self.df.columns and "revenue_allocated" in self.df.columns:
+                unallocated = self.df.loc[self.df["task_name"] == "__UNALLOCATED__", "revenue_allocated"].sum()
+        margin_pct = ((revenue - cost) / revenue * 100) if revenue else 0.0
 
         return {
             "Total Revenue": revenue,
@@ -23,14 +50,24 @@ class FinancialEngine:
             "Unallocated Revenue": unallocated,
         }
 
-    def get_monthly_trend(self):
+    @cached_property
+    def _monthly_trend(self):
+        if self.connection is not None:
+            return run_sql(self.connection, TREND_SQL, self.filters)
         if "month_key" not in self.df.columns:
             return pd.DataFrame(columns=["month_key", "revenue_allocated", "actual_cost"])
 
+        month_key = pd.to_datetime(self.df["month_key"], errors="coerce")
         trend = (
-            self.df.groupby("month_key", as_index=False)
+            self.df.groupby(month_key, as_index=False)
             .agg(revenue_allocated=("revenue_allocated", "sum"),
                  actual_cost=("actual_cost", "sum"))
             .sort_values("month_key")
         )
         return trend
+
+    def get_kpis(self):
+        return dict(self._kpis)
+
+    def get_monthly_trend(self):
+        return self._monthly_trend.copy()
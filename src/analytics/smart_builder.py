@@ -1,19 +1,22 @@
+from functools import cached_property
+
 import pandas as pd
 
+from src.analytics.variance_engine import quote_attribute_columns
 
-class SmartBuilder:
-    def __init__(self, fact_df):
-        self.df = fact_df.copy()
 
-    def get_product_benchmarks(self, product_name):
-        """
-        Analyzes historical performance for a product line to suggest hours.
-        """
-        df = self.df.copy()
-        df = df[df["task_name"] != "__UNALLOCATED__"]
+class SmartBuilder:
+    """Product benchmarks over ``fact_df``, which is not copied; the job x task rollup is built once on first use."""
 
-        job_task = (
-            df.groupby(["job_no", "task_name"], as_index=False)
+    def __init__(self, fact_df):
+        self.df = fact_df
+        self._benchmarks = {}
+
+    @cached_property
+    def _job_tasks(self) -> pd.DataFrame:
+        df = self.df[self.df["task_name"] != "__UNALLOCATED__"].rename(columns=quote_attribute_columns(self.df))
+        return (
+            df.groupby(["job_no", "task_name"], as_index=False, observed=True)
             .agg(
                 actual_hours=("actual_hours", "sum"),
                 quoted_time=("quoted_time", "max"),
@@ -21,6 +24,16 @@ class SmartBuilder:
             )
         )
 
+    def get_product_benchmarks(self, product_name):
+        """
+        Analyzes historical performance for a product line to suggest hours.
+        """
+        if product_name not in self._benchmarks:
+            self._benchmarks[product_name] = self._product_benchmarks(product_name)
+        return self._benchmarks[product_name].copy()
+
+    def _product_benchmarks(self, product_name):
+        job_task = self._job_tasks
         cohort = job_task[
             (job_task["Product_quote"] == product_name)
             & (job_task["quoted_time"] > 0)
@@ -32,7 +45,7 @@ class SmartBuilder:
         cohort["realization_factor"] = cohort["actual_hours"] / cohort["quoted_time"]
 
         stats = (
-            cohort.groupby("task_name", as_index=False)
+            cohort.groupby("task_name", as_index=False, observed=True)
             .agg(
                 avg_hours=("actual_hours", "mean"),
                 median_hours=("actual_hours", "median"),
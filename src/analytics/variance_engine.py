@@ -1,70 +1,123 @@
+from functools import cached_property
+from typing import Dict
+
 import pandas as pd
 import numpy as np
 
+from src.job_index import job_offsets, job_rows, offsets_lookup
+from src.queries import run_sql
+
+# Job attributes fact carries from the quote, and the names the engine reports them under.
+QUOTE_ATTRIBUTES = {"Product": "Product_quote", "Client": "Client_quote", "Job_Name": "Job_Name_quote", "Job_Status": "Job_Status_quote"}
+
+
+def quote_attribute_columns(df: pd.DataFrame) -> Dict[str, str]:
+    """Source column in ``df`` -> reported name for each quote attribute.
+
+    The ETL pipeline's fact already has the ``*_quote`` columns; the processed
+    build's fact has the bare ones.
+    """
+    return {(quote if quote in df.columns else bare): quote for bare, quote in QUOTE_ATTRIBUTES.items()}
+
+# "first" follows fact's (job_no, task_name, month_key) row order, as pandas does.
+JOB_TASK_SQL = """
+    SELECT
+        job_no,
+        task_name,
+        sum(actual_hours) AS actual_hours,
+        sum(actual_cost) AS actual_cost,
+        sum(revenue_allocated) AS revenue_allocated,
+        first(Department_actual ORDER BY month_key) FILTER (WHERE Department_actual IS NOT NULL) AS Department_actual,
+        max(quoted_time) AS quoted_time,
+        max(quoted_amount) AS quoted_amount,
+        max(Department_quote) AS Department_quote,
+        max(Product) AS Product_quote,
+        max(Client) AS Client_quote,
+        max(Job_Name) AS Job_Name_quote,
+        max(Job_Status) AS Job_Status_quote
+    FROM fact
+    WHERE {where} AND task_name IS DISTINCT FROM '__UNALLOCATED__' AND task_name IS NOT NULL
+    GROUP BY job_no, task_name ORDER BY task_name
+"""
+PROBLEM_JOBS_SQL = """
+    WITH scoped AS (
+        SELECT * FROM fact WHERE {where} AND task_name IS DISTINCT FROM '__UNALLOCATED__' AND job_no IS NOT NULL
+    ),
+    actuals AS (
+        SELECT job_no, sum(revenue_allocated) AS revenue_allocated, sum(actual_cost) AS actual_cost, sum(actual_hours) AS actual_hours
+        FROM scoped GROUP BY job_no
+    ),
+    task_quotes AS (
+        SELECT job_no, task_name, max(quoted_time) AS quoted_time, max(quoted_amount) AS quoted_amount,
+               max(Client) AS Client_quote, max(Job_Name) AS Job_Name_quote
+        FROM scoped WHERE task_name IS NOT NULL GROUP BY job_no, task_name
+    ),
+    quotes AS (
+        SELECT job_no, sum(quoted_time) AS quoted_time, sum(quoted_amount) AS quoted_amount,
+               first(Client_quote ORDER BY task_name) FILTER (WHERE Client_quote IS NOT NULL) AS Client_quote,
+               first(Job_Name_quote ORDER BY task_name) FILTER (WHERE Job_Name_quote IS NOT NULL) AS Job_Name_quote
+        FROM task_quotes GROUP BY job_no
+    )
+    SELECT a.*, q.quoted_time, q.quoted_amount, q.Client_quote, q.Job_Name_quote,
+           a.revenue_allocated - a.actual_cost AS margin,
+           CASE WHEN a.revenue_allocated > 0 THEN (a.revenue_allocated - a.actual_cost) / a.revenue_allocated * 100 ELSE 0.0 END AS margin_pct,
+           a.revenue_allocated - coalesce(q.quoted_amount, 0) AS quote_gap
+    FROM actuals a LEFT JOIN quotes q USING (job_no)
+    WHERE a.revenue_allocated > $min_revenue
+    ORDER BY margin_pct, job_no LIMIT 20
+"""
+
 
 class VarianceEngine:
-    def __init__(self, fact_df):
-        self.df = fact_df.copy()
+    """Job variance diagnostics over ``fact_df``, or in SQL over the ``fact`` view of a DuckDB ``connection``.
 
-    def _job_task_rollup(self, job_id: str) -> pd.DataFrame:
-        job_data = self.df[self.df["job_no"] == job_id].copy()
-        job_data = job_data[job_data["task_name"] != "__UNALLOCATED__"]
-
-        quote_fields = [
-            "quoted_time",
-            "quoted_amount",
-            "Department_quote",
-            "Product_quote",
-            "Client_quote",
-            "Job_Name_quote",
-            "Job_Status_quote",
-        ]
-
-        quote_agg = job_data.groupby(["job_no", "task_name"], as_index=False)[quote_fields].max()
-        actual_agg = (
-            job_data.groupby(["job_no", "task_name"], as_index=False)
-            .agg(
-                actual_hours=("actual_hours", "sum"),
-                actual_cost=("actual_cost", "sum"),
-                revenue_allocated=("revenue_allocated", "sum"),
-                Department_actual=("Department_actual", "first"),
-            )
-        )
+    ``fact_df`` is not copied; the job x task and job rollups are built from it
+    on first use and per-job and per-threshold results are memoized, so do not
+    modify it while the engine is in use.
+    """
 
-        return actual_agg.merge(quote_agg, on=["job_no", "task_name"], how="left")
+    def __init__(self, fact_df=None, connection=None, filters=None):
+        self.connection = connection
+        self.filters = filters
+        self.df = fact_df
+        self._diagnoses = {}
+        self._problem_jobs = {}
 
-    def get_job_diagnosis(self, job_id):
-        """Returns detailed variance breakdown for a specific job."""
-        job_data = self._job_task_rollup(job_id)
+    @cached_property
+    def _allocated(self) -> pd.DataFrame:
+        return self.df[self.df["task_name"] != "__UNALLOCATED__"]
 
-        job_data["scope_variance"] = job_data["actual_hours"] - job_data["quoted_time"].fillna(0)
-        job_data["price_recovery"] = job_data["revenue_allocated"] - job_data["quoted_amount"].fillna(0)
-        return job_data
+    @cached_property
+    def _job_tasks(self) -> pd.DataFrame:
+        """Actuals and quote fields per (job_no, task_name), sorted by job_no."""
+        attributes = quote_attribute_columns(self._allocated)
+        quote_fields = ["quoted_time", "quoted_amount", "Department_quote"] + list(attributes)
+        grouped = self._allocated.groupby(["job_no", "task_name"], as_index=False, observed=True)
+        actual_agg = grouped.agg(
+            actual_hours=("actual_hours", "sum"),
+            actual_cost=("actual_cost", "sum"),
+            revenue_allocated=("revenue_allocated", "sum"),
+            Department_actual=("Department_actual", "first"),
+        )
+        quotes = grouped[quote_fields].max().rename(columns=attributes)
+        return actual_agg.merge(quotes, on=["job_no", "task_name"], how="left")
 
-    def get_problem_jobs(self, min_revenue=1000):
-        """Identifies jobs with significant margin erosion."""
-        df = self.df.copy()
-        df = df[df["task_name"] != "__UNALLOCATED__"]
+    @cached_property
+    def _job_task_offsets(self):
+        return offsets_lookup(job_offsets(self._job_tasks))
 
+    @cached_property
+    def _jobs(self) -> pd.DataFrame:
+        """Actuals and summed task quotes per job, with margin and quote gap."""
         job_actuals = (
-            df.groupby("job_no", as_index=False)
+            self._allocated.groupby("job_no", as_index=False, observed=True)
             .agg(
                 revenue_allocated=("revenue_allocated", "sum"),
                 actual_cost=("actual_cost", "sum"),
                 actual_hours=("actual_hours", "sum"),
             )
         )
-
-        job_quotes = (
-            df.groupby(["job_no", "task_name"], as_index=False)
-            .agg(
-                quoted_time=("quoted_time", "max"),
-                quoted_amount=("quoted_amount", "max"),
-                Client_quote=("Client_quote", "max"),
-                Job_Name_quote=("Job_Name_quote", "max"),
-            )
-        )
-        job_quotes = job_quotes.groupby("job_no", as_index=False).agg(
+        job_quotes = self._job_tasks.groupby("job_no", as_index=False, observed=True).agg(
             quoted_time=("quoted_time", "sum"),
             quoted_amount=("quoted_amount", "sum"),
             Client_quote=("Client_quote", "first"),
@@ -72,8 +125,6 @@ class VarianceEngine:
         )
 
         jobs = job_actuals.merge(job_quotes, on="job_no", how="left")
-        jobs = jobs[jobs["revenue_allocated"] > min_revenue]
-
         jobs["margin"] = jobs["revenue_allocated"] - jobs["actual_cost"]
         jobs["margin_pct"] = np.where(
             jobs["revenue_allocated"] > 0,
@@ -81,5 +132,29 @@ class VarianceEngine:
             0.0,
         )
         jobs["quote_gap"] = jobs["revenue_allocated"] - jobs["quoted_amount"].fillna(0)
+        return jobs
+
+    def _job_task_rollup(self, job_id: str) -> pd.DataFrame:
+        if self.connection is not None:
+            return run_sql(self.connection, JOB_TASK_SQL, self.filters, job_id)
+        return job_rows(self._job_tasks, self._job_task_offsets, job_id).reset_index(drop=True)
+
+    def get_job_diagnosis(self, job_id):
+        """Returns detailed variance breakdown for a specific job."""
+        if job_id not in self._diagnoses:
+            job_data = self._job_task_rollup(job_id).copy()
+            job_data["scope_variance"] = job_data["actual_hours"] - job_data["quoted_time"].fillna(0)
+            job_data["price_recovery"] = job_data["revenue_allocated"] - job_data["quoted_amount"].fillna(0)
+            self._diagnoses[job_id] = job_data
+        return self._diagnoses[job_id].copy()
+
+    def get_problem_jobs(self, min_revenue=1000):
+        """Identifies jobs with significant margin erosion."""
+        if self.connection is not None:
+            return run_sql(self.connection, PROBLEM_JOBS_SQL, self.filters, min_revenue=min_revenue)
 
-        return jobs.sort_values("margin_pct").head(20)
+        if min_revenue not in self._problem_jobs:
+            jobs = self._jobs[self._jobs["revenue_allocated"] > min_revenue]
+            # Top 20 without sorting every job; ties keep job_no order.
+            self._problem_jobs[min_revenue] = jobs.nsmallest(20, "margin_pct", keep="first")
+        return self._problem_jobs[min_revenue].copy()
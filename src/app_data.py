@@ -1,69 +1,379 @@
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
+import pyarrow.parquet as pq
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from src.arrow_store import arrow_path, read_arrow
+from src.cube import EXACT_JOBS_MAX, cube_kpis, cube_rollup
+from src.dimensions import DIMENSION_COLUMNS, DIMENSIONS_FILE, build_dimensions, prefix_slice
+from src.fact_dataset import FACT_DATASET_DIR, read_fact_dataset
+from src.io import ARTIFACT_FILES, read_parquet
+from src.job_index import JobOffsets, index_lookup, job_rows
+from src.queries import connect_duckdb, fact_query, fact_query_sql, filter_fact, filter_fact_flags, query_backend
+from src.quote_intelligence import task_catalog_from_sketches
+from src.schema import CATEGORIES_FILE, coerce_datetimes, domain_categories, encode_categories, memory_mb, read_categories
+from src.similarity import SIMILARITY_INDEX_FILE, JobSimilarityIndex
+from src.snapshots import current_snapshot, snapshot_path
+from src.utils import read_settings, setup_logger
+
+PROCESSED_DIR = "data/processed"
+
+# Cached frames (filtered views, mapped artifacts) are shared by every session
+# and handed out as shallow copies. Under copy-on-write, the pandas 3 default,
+# a write to one of them copies the touched data first, so a page can add
+# columns or edit values without changing what other sessions see.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Columns apply_filters reads, added to every page's projection.
+FILTER_COLUMNS = {
+    "fact": ["job_no", "task_name", "month_key", "Department_reporting", "Product", "dept_mismatch", "billable_hours", "onshore_hours"],
+    "job_month": ["job_no", "month_key"],
+    "job_total": ["job_no"],
+    "job_driver": ["job_no"],
+    "task_catalog": ["dept", "Product"],
+    "job_template": ["dept", "Product"],
+}
+
+
+# Every loader below is cached per snapshot id. load_data pins the snapshot
+# for the script run (Streamlit runs each session's script on its own
+# thread), so one page render never mixes artifacts from two builds, and the
+# next rerun after a publish reads the new snapshot.
+_run = threading.local()
+_published = {"checked": float("-inf"), "snapshot": ""}
+_published_lock = threading.Lock()
+
+
+def _published_snapshot() -> str:
+    """The build's CURRENT snapshot, re-read at most every ``snapshots.poll_seconds``."""
+    interval = read_settings().get("snapshots", {}).get("poll_seconds", 2)
+    with _published_lock:
+        now = time.monotonic()
+        previous = _published["snapshot"]
+        first = _published["checked"] == float("-inf")
+        if now - _published["checked"] >= interval:
+            _published.update(checked=now, snapshot=current_snapshot(PROCESSED_DIR) or "")
+        snapshot = _published["snapshot"]
+    if snapshot != previous and not first:
+        # Only the thread that saw the publish gets here. Every other cache
+        # (other modules' st.cache_data, the filter LRU) is left alone; sessions
+        # still on the old snapshot reload from its directory.
+        for loader in _snapshot_loaders():
+            loader.clear()
+    return snapshot
+
+
+def _snapshot_loaders() -> list:
+    """The loaders cached by snapshot id: what a publish leaves behind for the previous snapshot."""
+    return [
+        load_categories,
+        _load_dimensions,
+        _map_artifact,
+        _read_artifact,
+        _load_fact_slice,
+        _load_recent_task_catalog,
+        _load_similarity_index,
+        _duckdb_connection,
+        _load_job_index,
+    ]
+
+
+def snapshot_id() -> str:
+    """Snapshot this script run reads ("" for outputs built before snapshots existed)."""
+    pinned = getattr(_run, "snapshot", None)
+    return pinned if pinned is not None else _published_snapshot()
+
+
+def _snapshot_dir(snapshot: str) -> str:
+    return snapshot_path(PROCESSED_DIR, snapshot) if snapshot else PROCESSED_DIR
+
+
+def processed_path(filename: str, snapshot: Optional[str] = None) -> str:
+    return os.path.join(_snapshot_dir(snapshot_id() if snapshot is None else snapshot), filename)
 
-from src.io import read_parquet
-from src.utils import read_settings
 
+@st.cache_data
+def load_categories(snapshot: str) -> Optional[Dict[str, List[str]]]:
+    return read_categories(processed_path(CATEGORIES_FILE, snapshot))
+
+
+def _encode(df: pd.DataFrame, snapshot: str) -> pd.DataFrame:
+    # Builds without categories.json only share categories within the frame.
+    return encode_categories(df, load_categories(snapshot) or domain_categories([df]))
+
+
+@st.cache_data
+def _load_dimensions(snapshot: str) -> Dict:
+    path = processed_path(DIMENSIONS_FILE, snapshot)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    # Outputs built before the manifest existed.
+    return build_dimensions(_load_artifact(snapshot, "fact", tuple(["month_key"] + DIMENSION_COLUMNS)))
+
+
+def load_dimensions() -> Dict:
+    """Month range, FY options and member lists with row counts, from the build's dimension manifest."""
+    return _load_dimensions(snapshot_id())
+
+
+def search_jobs(prefix: str) -> List[str]:
+    """Job numbers starting with ``prefix``, in sorted order (binary search over the manifest's job list)."""
+    jobs = load_dimensions()["members"].get("job_no", {}).get("values", [])
+    return jobs[prefix_slice(jobs, prefix)]
 
-def _ensure_datetime(df: pd.DataFrame, col: str) -> pd.DataFrame:
-    if col in df.columns:
-        df[col] = pd.to_datetime(df[col], errors="coerce")
+
+def _with_counts(member: Dict[str, list], total: int):
+    counts = dict(zip(member["values"], member["rows"]))
+    counts["ALL"] = total
+    return lambda value: f"{value} ({counts.get(value, 0):,} rows)"
+
+
+def _log_load(name: str, df: pd.DataFrame, started: float) -> pd.DataFrame:
+    # Only cache misses get here, so each line is a real read.
+    setup_logger().info("Loaded %s: %d rows x %d columns in %.3fs", name, len(df), df.shape[1], time.perf_counter() - started)
     return df
 
 
+@st.cache_resource
+def _map_artifact(snapshot: str, name: str, columns: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
+    """Memory-mapped view of the snapshot's Arrow copy, one object shared by every session; never mutate it."""
+    started = time.perf_counter()
+    df = read_arrow(arrow_path(_snapshot_dir(snapshot), name), list(columns) if columns is not None else None)
+    return _log_load(name, df, started)
+
+
 @st.cache_data
-def load_data():
-    base = "data/processed"
-    paths = {
-        "fact": os.path.join(base, "fact_job_task_month.parquet"),
-        "job_month": os.path.join(base, "job_month_summary.parquet"),
-        "job_total": os.path.join(base, "job_total_summary.parquet"),
-        "job_driver": os.path.join(base, "job_driver_summary.parquet"),
-        "task_catalog": os.path.join(base, "task_catalog.parquet"),
-        "job_template": os.path.join(base, "job_template_library.parquet"),
-        "job_comps": os.path.join(base, "job_comps_index.parquet"),
-        "qa": os.path.join(base, "qa_report.json"),
-    }
+def _read_artifact(snapshot: str, name: str, columns: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
+    path = processed_path(ARTIFACT_FILES[name], snapshot)
+    if not os.path.exists(path):
+        st.error("Data not found. Run `python scripts/build_dataset.py --input data/raw/Quoted_Task_Report_FY26.xlsx --fy FY26` first.")
+        st.stop()
+    started = time.perf_counter()
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [col for col in columns if col in available]
+    df = coerce_datetimes(_encode(read_parquet(path, columns=columns), snapshot))
+    return _log_load(name, df, started)
 
-    for key, path in paths.items():
-        if key != "qa" and not os.path.exists(path):
-            st.error("Data not found. Run `python scripts/build_dataset.py --input data/raw/Quoted_Task_Report_FY26.xlsx --fy FY26` first.")
-            st.stop()
 
-    fact = read_parquet(paths["fact"])
-    job_month = read_parquet(paths["job_month"])
-    job_total = read_parquet(paths["job_total"])
-    job_driver = read_parquet(paths["job_driver"])
-    task_catalog = read_parquet(paths["task_catalog"])
-    job_template = read_parquet(paths["job_template"])
-    job_comps = read_parquet(paths["job_comps"])
+def _load_artifact(snapshot: str, name: str, columns: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
+    if os.path.exists(arrow_path(_snapshot_dir(snapshot), name)):
+        return _map_artifact(snapshot, name, columns).copy(deep=False)
+    # Snapshots built without the Arrow store.
+    return _read_artifact(snapshot, name, columns)
 
-    fact = _ensure_datetime(fact, "month_key")
-    job_month = _ensure_datetime(job_month, "month_key")
 
-    return {
-        "fact": fact,
-        "job_month": job_month,
-        "job_total": job_total,
-        "job_driver": job_driver,
-        "task_catalog": task_catalog,
-        "job_template": job_template,
-        "job_comps": job_comps,
-    }
+def load_artifact(name: str, columns: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
+    """One artifact, restricted to ``columns`` (all when None); each projection is cached separately."""
+    return _load_artifact(snapshot_id(), name, columns)
+
+
+@st.cache_data
+def _load_fact_slice(
+    snapshot: str,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    dept: str,
+    product: str,
+    columns: Optional[Tuple[str, ...]] = None,
+) -> pd.DataFrame:
+    root = processed_path(FACT_DATASET_DIR, snapshot)
+    fact = read_fact_dataset(root, start, end, dept, product, list(columns) if columns is not None else None)
+    return coerce_datetimes(_encode(fact, snapshot))
+
+
+def load_fact_slice(
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    dept: str,
+    product: str,
+    columns: Optional[Tuple[str, ...]] = None,
+) -> pd.DataFrame:
+    """Fact rows for the sidebar period, department and product, read with dataset filter pushdown."""
+    return _load_fact_slice(snapshot_id(), start, end, dept, product, columns)
+
+
+def _exact_jobs_max() -> int:
+    return read_settings().get("cube", {}).get("exact_jobs_max", EXACT_JOBS_MAX)
+
+
+def portfolio_kpis(filters: dict) -> Dict[str, float]:
+    """Sidebar-filtered portfolio KPIs answered from the pre-aggregated cube instead of fact."""
+    cube, jobs, members = (load_artifact(name) for name in ["kpi_cube", "kpi_cube_jobs", "kpi_cube_members"])
+    return cube_kpis(cube, jobs, filters, members, _exact_jobs_max())
+
+
+def portfolio_rollup(filters: dict, by: List[str]) -> pd.DataFrame:
+    cube, jobs, members = (load_artifact(name) for name in ["kpi_cube", "kpi_cube_jobs", "kpi_cube_members"])
+    return cube_rollup(cube, jobs, filters, by, members, _exact_jobs_max())
+
+
+@st.cache_data
+def _load_recent_task_catalog(snapshot: str, months: int) -> pd.DataFrame:
+    stats = _load_artifact(snapshot, "task_month_stats")
+    end = stats["month_key"].max()
+    start = end - pd.DateOffset(months=months - 1)
+    return _encode(task_catalog_from_sketches(stats, _load_artifact(snapshot, "task_sketch"), start, end), snapshot)
+
+
+def load_recent_task_catalog(months: int) -> pd.DataFrame:
+    """Task catalog over the last ``months`` months of the build, merged from the stored sketches."""
+    return _load_recent_task_catalog(snapshot_id(), months)
+
+
+@st.cache_resource
+def _load_similarity_index(snapshot: str) -> Optional[JobSimilarityIndex]:
+    path = processed_path(SIMILARITY_INDEX_FILE, snapshot)
+    if not os.path.exists(path):
+        return None
+    return JobSimilarityIndex.load(path)
+
+
+def load_similarity_index() -> Optional[JobSimilarityIndex]:
+    """The comparable-job index, loaded once per snapshot and shared by every session (read-only)."""
+    return _load_similarity_index(snapshot_id())
+
+
+@st.cache_resource
+def _duckdb_connection(snapshot: str):
+    return connect_duckdb(_snapshot_dir(snapshot), read_settings())
+
 
+def duckdb_connection():
+    """DuckDB database over the snapshot's Parquet files, shared by every session; query through ``.cursor()``."""
+    return _duckdb_connection(snapshot_id())
 
-def render_sidebar(fact: pd.DataFrame):
+
+def page_query(name: str, data: "DataHandle", filters: dict, **params) -> pd.DataFrame:
+    """A FACT_QUERIES aggregation on the ``app.query_backend`` backend.
+
+    With DuckDB the filters and aggregation run as one SQL statement against
+    the Parquet files, so the page never holds fact; with pandas it runs on
+    the cached ``apply_filters`` fact. Both return the same frame.
+    """
+    if query_backend(read_settings()) == "duckdb":
+        return fact_query_sql(duckdb_connection().cursor(), name, filters, **params)
+    job_no = params.pop("job_no", None)
+    if job_no is not None:
+        return fact_query(name, filter_fact(data.job_rows("fact", job_no), filters), **params)
+    return fact_query(name, apply_filters(data, filters)["fact"], **params)
+
+
+@st.cache_resource
+def _load_job_index(snapshot: str) -> Optional[Dict[str, JobOffsets]]:
+    path = processed_path(ARTIFACT_FILES["job_index"], snapshot)
+    if not os.path.exists(path):
+        return None
+    return index_lookup(read_parquet(path))
+
+
+def load_job_index() -> Optional[Dict[str, JobOffsets]]:
+    """Row offsets of every job in fact, job_month and job_driver, loaded once per snapshot."""
+    return _load_job_index(snapshot_id())
+
+
+class DataHandle:
+    """Processed artifacts, loaded on first access and restricted to the columns a page declares.
+
+    ``columns`` maps artifact name to the columns the page reads (None for all
+    of them). Without a declaration every artifact is available in full. The
+    fact projection always includes the columns the sidebar filters need.
+    """
+
+    def __init__(self, columns: Optional[Dict[str, Optional[List[str]]]] = None):
+        self.columns = dict(columns) if columns is not None else {name: None for name in ARTIFACT_FILES}
+        self.columns.setdefault("fact", [])
+
+    def projection(self, name: str) -> Optional[Tuple[str, ...]]:
+        columns = self.columns[name]
+        if columns is None:
+            return None
+        required = FILTER_COLUMNS.get(name, [])
+        return tuple(required + [col for col in columns if col not in required])
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        if name not in self.columns:
+            raise KeyError(f"Artifact '{name}' was not declared for this page")
+        return load_artifact(name, self.projection(name))
+
+    def job_rows(self, name: str, job_no: str) -> pd.DataFrame:
+        """One job's rows of the unfiltered artifact: a slice at its persisted offsets, or a scan without a job index."""
+        df = self[name]
+        index = load_job_index()
+        if index is None:
+            return df[df["job_no"] == job_no]
+        return job_rows(df, index[name], job_no)
+
+
+def _prefetch(data: DataHandle) -> None:
+    """Load the page's declared artifacts into their caches concurrently, so a cold start pays the slowest read, not the sum."""
+    names = list(data.columns)
+    if os.path.isdir(processed_path(FACT_DATASET_DIR)):
+        # Filtered fact comes from the partitioned dataset; the full table is only read for job lookups.
+        names.remove("fact")
+    if len(names) < 2:
+        return
+    snapshot, ctx = snapshot_id(), get_script_run_ctx()
+
+    def load(name: str) -> None:
+        # Lets st.error/st.stop inside a loader reach this session.
+        add_script_run_ctx(threading.current_thread(), ctx)
+        _load_artifact(snapshot, name, data.projection(name))
+
+    workers = min(len(names), read_settings().get("app", {}).get("load_workers", 8))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # result() re-raises a loader's exception (including st.stop) on the script thread.
+        for future in [pool.submit(load, name) for name in names]:
+            future.result()
+    setup_logger().debug("Prefetched %d artifacts in %.3fs", len(names), time.perf_counter() - started)
+
+
+def load_data(columns: Optional[Dict[str, Optional[List[str]]]] = None) -> DataHandle:
+    """Start of every page: pins the published snapshot for the rest of this script run and loads its artifacts."""
+    _run.snapshot = _published_snapshot()
+    data = DataHandle(columns)
+    _prefetch(data)
+    return data
+
+
+def _filtered_fact(data: DataHandle, filters: dict) -> pd.DataFrame:
+    if os.path.isdir(processed_path(FACT_DATASET_DIR)):
+        return load_fact_slice(filters["start"], filters["end"], filters["dept"], filters["product"], data.projection("fact"))
+
+    # Outputs built before the partitioned dataset existed.
+    fact = data["fact"]
+    fact = fact[(fact["month_key"] >= filters["start"]) & (fact["month_key"] <= filters["end"])]
+    if filters["dept"] != "ALL":
+        fact = fact[fact["Department_reporting"] == filters["dept"]]
+    if filters["product"] != "ALL":
+        fact = fact[fact["Product"] == filters["product"]]
+    return fact
+
+
+def render_sidebar(data: DataHandle):
     settings = read_settings()
+    dimensions = load_dimensions()
     st.sidebar.title("Filters")
 
-    month_min = fact["month_key"].min()
-    month_max = fact["month_key"].max()
+    month_min = pd.Timestamp(dimensions["month_min"])
+    month_max = pd.Timestamp(dimensions["month_max"])
 
-    years = sorted({m.year for m in fact["month_key"].dropna()})
-    fy_options = [f"FY{str(year)[-2:]}" for year in years]
+    fy_options = dimensions["fiscal_years"]
     default_fy = settings.get("app", {}).get("default_fy", fy_options[-1] if fy_options else "FY26")
 
     period_mode = st.sidebar.selectbox("Period Mode", ["FY", "Custom Range", "Last N Months"], index=0)
@@ -82,11 +392,12 @@ def render_sidebar(fact: pd.DataFrame):
         end = month_max
         start = (end - pd.DateOffset(months=n_months - 1)).to_pydatetime()
 
-    depts = ["ALL"] + sorted([d for d in fact["Department_reporting"].dropna().unique() if d != ""])
-    products = ["ALL"] + sorted([p for p in fact["Product"].dropna().unique() if p != ""])
+    members = dimensions["members"]
+    depts = ["ALL"] + members["Department_reporting"]["values"]
+    products = ["ALL"] + members["Product"]["values"]
 
-    dept_choice = st.sidebar.selectbox("Department", depts)
-    product_choice = st.sidebar.selectbox("Product", products)
+    dept_choice = st.sidebar.selectbox("Department", depts, format_func=_with_counts(members["Department_reporting"], dimensions["rows"]))
+    product_choice = st.sidebar.selectbox("Product", products, format_func=_with_counts(members["Product"], dimensions["rows"]))
 
     include_unallocated = st.sidebar.checkbox(
         "Include unallocated revenue rows",
@@ -117,58 +428,125 @@ def render_sidebar(fact: pd.DataFrame):
     }
 
 
-def apply_filters(data: dict, filters: dict):
-    fact = data["fact"].copy()
-    fact = fact[(fact["month_key"] >= filters["start"]) & (fact["month_key"] <= filters["end"])]
+class FilterCache:
+    """LRU of apply_filters results, evicting least recently used entries beyond ``max_mb`` of frame memory.
+
+    Entries are shared by every session; apply_filters hands out shallow
+    copies of them, never the stored frames.
+    """
+
+    def __init__(self, max_mb: float):
+        self.max_mb = max_mb
+        self.entries: "OrderedDict[tuple, Tuple[Dict[str, pd.DataFrame], float]]" = OrderedDict()
+        self.size_mb = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[Dict[str, pd.DataFrame]]:
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+    def put(self, key: tuple, views: Dict[str, pd.DataFrame]) -> None:
+        size = float(sum(memory_mb(df) for df in views.values()))
+        if size > self.max_mb:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size_mb -= self.entries.pop(key)[1]
+            while self.entries and self.size_mb + size > self.max_mb:
+                self.size_mb -= self.entries.popitem(last=False)[1][1]
+                self.evictions += 1
+            self.entries[key] = (views, size)
+            self.size_mb += size
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "size_mb": round(self.size_mb, 2),
+                "max_mb": self.max_mb,
+            }
+
+
+@st.cache_resource
+def filter_cache() -> FilterCache:
+    return FilterCache(read_settings().get("app", {}).get("filter_cache_mb", 256))
+
+
+def filter_cache_stats() -> Dict[str, float]:
+    return filter_cache().stats()
+
+
+def _filter_key(data: DataHandle, filters: dict) -> tuple:
+    return (
+        snapshot_id(),
+        pd.Timestamp(filters["start"]),
+        pd.Timestamp(filters["end"]),
+        str(filters["dept"]),
+        str(filters["product"]),
+        bool(filters["include_unallocated"]),
+        bool(filters["show_mismatches"]),
+        bool(filters["billable_only"]),
+        bool(filters["onshore_only"]),
+        tuple(sorted((name, data.projection(name)) for name in data.columns)),
+    )
 
-    if filters["dept"] != "ALL":
-        fact = fact[fact["Department_reporting"] == filters["dept"]]
 
+def filter_segments(segment: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    if filters["dept"] != "ALL":
+        segment = segment[segment["dept"] == filters["dept"]]
     if filters["product"] != "ALL":
-        fact = fact[fact["Product"] == filters["product"]]
+        segment = segment[segment["Product"] == filters["product"]]
+    return segment
+
 
-    if not filters["include_unallocated"]:
-        fact = fact[fact["task_name"] != "__UNALLOCATED__"]
+def apply_filters(data: DataHandle, filters: dict) -> Dict[str, pd.DataFrame]:
+    """Filtered views of the page's artifacts, served from the shared LRU when the same filters and projections repeat.
 
-    if filters["show_mismatches"]:
-        fact = fact[fact["dept_mismatch"] == True]
+    Each call gets its own shallow copies (no data is copied up front); writes
+    to them copy on write and never reach the cached frames.
+    """
+    cache = filter_cache()
+    key = _filter_key(data, filters)
+    views = cache.get(key)
+    if views is None:
+        views = _apply_filters(data, filters)
+        cache.put(key, views)
+    return {name: df.copy(deep=False) for name, df in views.items()}
 
-    if filters["billable_only"]:
-        fact = fact[fact["billable_hours"] > 0]
 
-    if filters["onshore_only"]:
-        fact = fact[fact["onshore_hours"] > 0]
+def _apply_filters(data: DataHandle, filters: dict) -> Dict[str, pd.DataFrame]:
+    fact = filter_fact_flags(_filtered_fact(data, filters), filters)
 
     job_nos = fact["job_no"].dropna().unique().tolist()
 
-    job_month = data["job_month"].copy()
-    job_month = job_month[(job_month["month_key"] >= filters["start"]) & (job_month["month_key"] <= filters["end"])]
-    job_month = job_month[job_month["job_no"].isin(job_nos)]
+    filtered = {"fact": fact}
 
-    job_total = data["job_total"].copy()
-    job_total = job_total[job_total["job_no"].isin(job_nos)]
+    if "job_month" in data:
+        job_month = data["job_month"]
+        job_month = job_month[(job_month["month_key"] >= filters["start"]) & (job_month["month_key"] <= filters["end"])]
+        filtered["job_month"] = job_month[job_month["job_no"].isin(job_nos)]
 
-    job_driver = data["job_driver"].copy()
-    job_driver = job_driver[job_driver["job_no"].isin(job_nos)]
+    for name in ["job_total", "job_driver"]:
+        if name in data:
+            filtered[name] = data[name][data[name]["job_no"].isin(job_nos)]
 
-    task_catalog = data["task_catalog"].copy()
-    if filters["dept"] != "ALL":
-        task_catalog = task_catalog[task_catalog["dept"] == filters["dept"]]
-    if filters["product"] != "ALL":
-        task_catalog = task_catalog[task_catalog["Product"] == filters["product"]]
+    for name in ["task_catalog", "job_template"]:
+        if name in data:
+            filtered[name] = filter_segments(data[name], filters)
 
-    job_template = data["job_template"].copy()
-    if filters["dept"] != "ALL":
-        job_template = job_template[job_template["dept"] == filters["dept"]]
-    if filters["product"] != "ALL":
-        job_template = job_template[job_template["Product"] == filters["product"]]
-
-    return {
-        "fact": fact,
-        "job_month": job_month,
-        "job_total": job_total,
-        "job_driver": job_driver,
-        "task_catalog": task_catalog,
-        "job_template": job_template,
-        "job_comps": data["job_comps"],
-    }
+    if "job_comps" in data:
+        filtered["job_comps"] = data["job_comps"]
+    return filtered
@@ -0,0 +1,57 @@
+import os
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from src.io import ARTIFACT_FILES, read_parquet
+from src.schema import coerce_datetimes, encode_categories
+
+# Uncompressed Arrow IPC copies of the Parquet artifacts, stored with the
+# shared category sets and datetime month_key already applied. Readers
+# memory-map them, so every session and worker process maps the same page
+# cache pages instead of holding a private decoded copy.
+ARROW_STORE_DIR = "arrow"
+
+
+def arrow_path(directory: str, name: str) -> str:
+    return os.path.join(directory, ARROW_STORE_DIR, f"{name}.arrow")
+
+
+def _table(df: pd.DataFrame) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # from_pandas turns NaN into nulls, and columns with nulls cannot be handed
+    # to pandas as views; keep NaN as a float value instead.
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type) and table.column(i).null_count:
+            table = table.set_column(i, field, pa.array(df[field.name].to_numpy(), type=field.type, from_pandas=False))
+    return table
+
+
+def write_arrow_store(directory: str, categories: Dict[str, List[str]]) -> List[str]:
+    """Export the Parquet artifacts in ``directory`` as uncompressed Arrow IPC files; returns the names written."""
+    os.makedirs(os.path.join(directory, ARROW_STORE_DIR), exist_ok=True)
+    written = []
+    for name, filename in ARTIFACT_FILES.items():
+        source = os.path.join(directory, filename)
+        if not os.path.exists(source):
+            continue
+        df = coerce_datetimes(encode_categories(read_parquet(source), categories))
+        path = arrow_path(directory, name)
+        feather.write_feather(_table(df), f"{path}.tmp", compression="uncompressed", chunksize=max(len(df), 1))
+        os.replace(f"{path}.tmp", path)
+        written.append(name)
+    return written
+
+
+def read_arrow(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Memory-map ``path`` read-only as a DataFrame.
+
+    Numeric, bool, datetime and string columns are views of the mapped file
+    (read-only arrays); categoricals decode their codes into a small private copy.
+    """
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    if columns is not None:
+        table = table.select([col for col in columns if col in table.column_names])
+    return table.to_pandas(split_blocks=True, self_destruct=False)
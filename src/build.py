@@ -1,19 +1,40 @@
 import os
-from typing import Optional
+from functools import partial
+from typing import List, Optional
 
 import pandas as pd
 
 from src.allocation import allocate_revenue
+from src.arrow_store import write_arrow_store
+from src.clean import load_normalization_cache, save_normalization_cache
 from src.comps import build_job_comps_index
+from src.cube import build_kpi_cube, build_kpi_cube_jobs, build_kpi_cube_members
+from src.dag import Stage, run_dag
+from src.dimensions import DIMENSIONS_FILE, build_dimensions
 from src.drivers import build_driver_summary
-from src.io import read_excel_sheets, write_parquet
+from src.fact_dataset import write_fact
+from src.incremental import (
+    ARTIFACT_KEYS,
+    MANIFEST_FILE,
+    build_manifest,
+    canonical_order,
+    changed_job_nos,
+    incremental_rebuild,
+    is_compatible,
+    load_manifest,
+)
+from src.io import ARTIFACT_FILES, read_excel_sheets, read_parquet
+from src.job_index import build_job_index
 from src.metrics import build_fact_table, build_job_month_summary, build_job_task_summary, build_job_total_summary
 from src.qa import run_qa
-from src.quote_intelligence import build_job_template_library, build_task_catalog
+from src.quote_intelligence import build_job_template_library, build_task_catalog, build_task_month_stats, build_task_sketch
 from src.revenue import build_revenue_monthly
+from src.schema import CATEGORIES_FILE, decode_schema, read_categories, write_artifact, write_categories
+from src.similarity import SIMILARITY_INDEX_FILE, build_similarity_index, write_similarity_index
+from src.snapshots import DEFAULT_RETENTION, new_snapshot_id, prune_snapshots, publish_snapshot, resolve_processed_dir, snapshot_path, write_snapshot_manifest
 from src.timesheet import build_timesheet_task_month
 from src.quotation import build_quote_task
-from src.utils import ensure_dir, fiscal_year_label, setup_logger, write_json
+from src.utils import ensure_dir, fiscal_year_label, read_settings, setup_logger, write_json
 
 
 def _filter_fy(df: pd.DataFrame, month_col: str, fy: Optional[str], fy_col: Optional[str] = None) -> pd.DataFrame:
@@ -26,52 +47,145 @@ def _filter_fy(df: pd.DataFrame, month_col: str, fy: Optional[str], fy_col: Opti
     return tmp[fiscal_year_label(tmp[month_col]) == fy]
 
 
-def build_dataset(input_path: str, output_dir: str = "data/processed", fy: Optional[str] = None) -> None:
+def _stage_revenue(sheet: pd.DataFrame, fy: Optional[str]) -> pd.DataFrame:
+    revenue = build_revenue_monthly(sheet)
+    if fy:
+        revenue = _filter_fy(revenue, "month_key", fy, fy_col="FY") if "FY" in sheet.columns else _filter_fy(revenue, "month_key", fy)
+    return revenue
+
+
+def _stage_timesheet(sheet: pd.DataFrame, fy: Optional[str]) -> pd.DataFrame:
+    return _filter_fy(build_timesheet_task_month(sheet), "month_key", fy)
+
+
+def _stage_quote_task(sheet: pd.DataFrame, fy: Optional[str]) -> pd.DataFrame:
+    quote_task = build_quote_task(sheet)
+    if fy and "quote_month_key" in quote_task.columns:
+        quote_task = _filter_fy(quote_task, "quote_month_key", fy)
+    return quote_task
+
+
+def _stage_normalized(stage, cache_path: Optional[str], sheet: pd.DataFrame, fy: Optional[str]) -> pd.DataFrame:
+    """Run a staging stage with the persistent key-normalization cache loaded, then merge new entries back."""
+    if cache_path:
+        load_normalization_cache(cache_path)
+    result = stage(sheet, fy)
+    if cache_path:
+        save_normalization_cache(cache_path)
+    return result
+
+
+def _stage_fact(allocated: pd.DataFrame, quote_task: pd.DataFrame) -> pd.DataFrame:
+    return canonical_order(build_fact_table(allocated, quote_task), ARTIFACT_KEYS["fact"])
+
+
+def _stage_artifact(name: str, builder, *args) -> pd.DataFrame:
+    return canonical_order(builder(*args), ARTIFACT_KEYS[name])
+
+
+def _stage_job_template(fact: pd.DataFrame, task_catalog: pd.DataFrame) -> pd.DataFrame:
+    return canonical_order(build_job_template_library(fact, catalog=task_catalog), ARTIFACT_KEYS["job_template"])
+
+
+def _staging_stages(output_dir: str, fy: Optional[str], normalization_cache: Optional[str] = None) -> List[Stage]:
+    def stage(func):
+        return partial(_stage_normalized, func, normalization_cache, fy=fy)
+
+    return [
+        Stage("revenue", stage(_stage_revenue), ["revenue_sheet"], os.path.join(output_dir, "revenue_monthly.parquet")),
+        Stage("timesheet", stage(_stage_timesheet), ["timesheet_sheet"], os.path.join(output_dir, "timesheet_task_month.parquet")),
+        Stage("quote_task", stage(_stage_quote_task), ["quote_sheet"], os.path.join(output_dir, "quote_task.parquet")),
+    ]
+
+
+def _artifact_stages(output_dir: str) -> List[Stage]:
+    """Stages downstream of the staged inputs; everything after ``fact`` is independent."""
+    def path(name: str) -> str:
+        return os.path.join(output_dir, ARTIFACT_FILES[name])
+
+    return [
+        Stage("allocated", allocate_revenue, ["timesheet", "revenue"]),
+        Stage("fact", _stage_fact, ["allocated", "quote_task"], path("fact"), write_fact),
+        Stage("job_month", partial(_stage_artifact, "job_month", build_job_month_summary), ["fact"], path("job_month"), write_artifact),
+        Stage("job_total", partial(_stage_artifact, "job_total", build_job_total_summary), ["fact", "quote_task"], path("job_total"), write_artifact),
+        Stage("job_task", partial(_stage_artifact, "job_task", build_job_task_summary), ["fact"], path("job_task"), write_artifact),
+        Stage("job_driver", partial(_stage_artifact, "job_driver", build_driver_summary), ["fact"], path("job_driver"), write_artifact),
+        Stage("task_catalog", partial(_stage_artifact, "task_catalog", build_task_catalog), ["fact"], path("task_catalog"), write_artifact),
+        Stage("task_month_stats", partial(_stage_artifact, "task_month_stats", build_task_month_stats), ["fact"], path("task_month_stats"), write_artifact),
+        Stage("task_sketch", partial(_stage_artifact, "task_sketch", build_task_sketch), ["fact"], path("task_sketch"), write_artifact),
+        Stage("job_template", _stage_job_template, ["fact", "task_catalog"], path("job_template"), write_artifact),
+        Stage("kpi_cube", partial(_stage_artifact, "kpi_cube", build_kpi_cube), ["fact"], path("kpi_cube"), write_artifact),
+        Stage("kpi_cube_jobs", partial(_stage_artifact, "kpi_cube_jobs", build_kpi_cube_jobs), ["fact"], path("kpi_cube_jobs"), write_artifact),
+        Stage("kpi_cube_members", partial(_stage_artifact, "kpi_cube_members", build_kpi_cube_members), ["fact"], path("kpi_cube_members"), write_artifact),
+        Stage("job_comps", partial(_stage_artifact, "job_comps", build_job_comps_index), ["fact"], path("job_comps"), write_artifact),
+        Stage("job_index", partial(_stage_artifact, "job_index", build_job_index), ["fact", "job_month", "job_driver"], path("job_index"), write_artifact),
+        Stage(
+            "similarity_index",
+            build_similarity_index,
+            ["fact"],
+            os.path.join(output_dir, SIMILARITY_INDEX_FILE),
+            write_similarity_index,
+        ),
+        Stage("qa", run_qa, ["fact"], os.path.join(output_dir, "qa_report.json")),
+    ]
+
+
+def build_dataset(
+    input_path: str,
+    output_dir: str = "data/processed",
+    fy: Optional[str] = None,
+    cache_dir: Optional[str] = "data/cache",
+    use_cache: bool = True,
+    incremental: bool = False,
+    workers: int = 1,
+) -> None:
+    """Build every artifact into a new snapshot under ``output_dir`` and publish it as current."""
     logger = setup_logger()
+    root = output_dir
+    previous_dir = resolve_processed_dir(root)
+    snapshot_id = new_snapshot_id()
+    output_dir = snapshot_path(root, snapshot_id)
     ensure_dir(output_dir)
 
-    logger.info("Loading Excel sheets")
-    sheets = read_excel_sheets(input_path)
-
-    revenue = build_revenue_monthly(sheets["revenue"])
-    timesheet = build_timesheet_task_month(sheets["timesheet"])
-    quote_task = build_quote_task(sheets["quote"])
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    previous = load_manifest(previous_dir) if incremental else None
 
-    if fy:
-        revenue = _filter_fy(revenue, "month_key", fy, fy_col="FY") if "FY" in sheets["revenue"].columns else _filter_fy(revenue, "month_key", fy)
-        timesheet = _filter_fy(timesheet, "month_key", fy)
-        if "quote_month_key" in quote_task.columns:
-            quote_task = _filter_fy(quote_task, "quote_month_key", fy)
-
-    write_parquet(revenue, os.path.join(output_dir, "revenue_monthly.parquet"))
-    write_parquet(timesheet, os.path.join(output_dir, "timesheet_task_month.parquet"))
-    write_parquet(quote_task, os.path.join(output_dir, "quote_task.parquet"))
-
-    logger.info("Allocating revenue")
-    allocated = allocate_revenue(timesheet, revenue)
-
-    logger.info("Building fact table")
-    fact = build_fact_table(allocated, quote_task)
-    job_month = build_job_month_summary(fact)
-    job_total = build_job_total_summary(fact, quote_task)
-    job_task = build_job_task_summary(fact)
-
-    logger.info("Building drivers and smart quote intelligence")
-    driver_summary = build_driver_summary(fact)
-    task_catalog = build_task_catalog(fact)
-    template_library = build_job_template_library(fact)
-    comps_index = build_job_comps_index(fact)
-
-    write_parquet(fact, os.path.join(output_dir, "fact_job_task_month.parquet"))
-    write_parquet(job_month, os.path.join(output_dir, "job_month_summary.parquet"))
-    write_parquet(job_total, os.path.join(output_dir, "job_total_summary.parquet"))
-    write_parquet(job_task, os.path.join(output_dir, "job_task_summary.parquet"))
-    write_parquet(driver_summary, os.path.join(output_dir, "job_driver_summary.parquet"))
-    write_parquet(task_catalog, os.path.join(output_dir, "task_catalog.parquet"))
-    write_parquet(template_library, os.path.join(output_dir, "job_template_library.parquet"))
-    write_parquet(comps_index, os.path.join(output_dir, "job_comps_index.parquet"))
-
-    qa_report = run_qa(fact)
-    write_json(qa_report, os.path.join(output_dir, "qa_report.json"))
-
-    logger.info("Build complete")
+    logger.info("Loading Excel sheets")
+    sheets = read_excel_sheets(input_path, cache_dir=cache_dir, use_cache=use_cache)
+    initial = {f"{key}_sheet": sheet for key, sheet in sheets.items()}
+
+    normalization_cache = os.path.join(cache_dir, "normalization_cache.json") if use_cache and cache_dir else None
+    stages = _staging_stages(output_dir, fy, normalization_cache)
+    if not incremental:
+        stages += _artifact_stages(output_dir)
+    values, _ = run_dag(stages, initial, workers=workers)
+    revenue, timesheet, quote_task = values["revenue"], values["timesheet"], values["quote_task"]
+    manifest = build_manifest({"revenue": revenue, "timesheet": timesheet, "quote": quote_task}, fy)
+
+    artifacts = values
+    if incremental:
+        previous_paths = {name: os.path.join(previous_dir, filename) for name, filename in ARTIFACT_FILES.items()}
+        artifact_paths = {name: os.path.join(output_dir, filename) for name, filename in ARTIFACT_FILES.items()}
+        if is_compatible(previous, manifest) and all(os.path.exists(path) for path in previous_paths.values()):
+            changed = changed_job_nos(previous, manifest)
+            logger.info("Incremental build: %d changed jobs", len(changed))
+            existing = {name: decode_schema(read_parquet(path)) for name, path in previous_paths.items()}
+            outputs = incremental_rebuild(existing, revenue, timesheet, quote_task, changed) if changed else existing
+            for name, path in artifact_paths.items():
+                (write_fact if name == "fact" else write_artifact)(outputs[name], path)
+            write_similarity_index(build_similarity_index(outputs["fact"]), os.path.join(output_dir, SIMILARITY_INDEX_FILE))
+            write_json(run_qa(outputs["fact"]), os.path.join(output_dir, "qa_report.json"))
+            artifacts = outputs
+        else:
+            logger.info("No compatible build manifest; running a full build")
+            artifacts, _ = run_dag(_artifact_stages(output_dir), {"revenue": revenue, "timesheet": timesheet, "quote_task": quote_task}, workers=workers)
+
+    write_categories([artifacts[name] for name in ARTIFACT_FILES], os.path.join(output_dir, CATEGORIES_FILE))
+    if read_settings().get("snapshots", {}).get("arrow_store", True):
+        write_arrow_store(output_dir, read_categories(os.path.join(output_dir, CATEGORIES_FILE)))
+    write_json(build_dimensions(artifacts["fact"]), os.path.join(output_dir, DIMENSIONS_FILE))
+    write_json(manifest, manifest_path)
+    write_snapshot_manifest(root, snapshot_id)
+    publish_snapshot(root, snapshot_id)
+    removed = prune_snapshots(root, read_settings().get("snapshots", {}).get("retention", DEFAULT_RETENTION))
+    logger.info("Build complete: published snapshot %s (pruned %d old)", snapshot_id, len(removed))
@@ -1,21 +1,125 @@
+import hashlib
+import inspect
+import json
+import os
+from typing import Callable, Dict
+
 import pandas as pd
 
 from src.utils import (
-    apply_mapping,
     load_mapping,
+    map_unique,
     normalize_department,
     normalize_job_no,
     normalize_task_name,
     normalize_text,
 )
 
+# Bump when normalization semantics change in a way the source hash below
+# cannot see (e.g. a helper the normalizers call). A stored cache written
+# under another version or other normalizer source is discarded.
+NORMALIZATION_VERSION = 1
+# Entries kept per normalizer in the persisted cache; the least recently used go first.
+MAX_NORMALIZATION_ENTRIES = 100_000
+
+# Raw string -> canonical value for each normalizer, in least- to most-recently
+# used order. Filled lazily, and shared across builds through
+# load/save_normalization_cache.
+_NORMALIZATION_CACHE: Dict[str, Dict[str, str]] = {}
+
+
+def _normalizers_fingerprint() -> str:
+    digest = hashlib.sha256(str(NORMALIZATION_VERSION).encode("utf-8"))
+    for func in (normalize_text, normalize_job_no, normalize_task_name, normalize_department):
+        digest.update(inspect.getsource(func).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+NORMALIZATION_FINGERPRINT = _normalizers_fingerprint()
+
+
+def _memoized(func: Callable[[object], str]) -> Callable[[object], str]:
+    memo = _NORMALIZATION_CACHE.setdefault(func.__name__, {})
+
+    def normalize(value: object) -> str:
+        if not isinstance(value, str):
+            return func(value)
+        result = memo.pop(value, None)
+        if result is None:
+            result = func(value)
+        memo[value] = result
+        return result
+
+    return normalize
+
+
+def _read_cache_file(path: str) -> Dict[str, Dict[str, str]]:
+    """Stored entries, or {} when the file is missing, unreadable or from other normalizer code (which is deleted)."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            stored = json.load(handle)
+    except ValueError:
+        stored = {}
+    if stored.get("version") != NORMALIZATION_FINGERPRINT:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return {}
+    return stored.get("entries", {})
+
+
+def load_normalization_cache(path: str) -> None:
+    for name, values in _read_cache_file(path).items():
+        memo = _NORMALIZATION_CACHE.setdefault(name, {})
+        # Entries already used in this process stay the most recent.
+        recent = dict(memo)
+        memo.clear()
+        memo.update(values)
+        memo.update(recent)
+
+
+def save_normalization_cache(path: str) -> None:
+    """Merge this process's cache into ``path``, keeping the ``MAX_NORMALIZATION_ENTRIES`` most recent per normalizer.
+
+    Concurrent writers can only lose entries, never corrupt them.
+    """
+    stored = _read_cache_file(path)
+    for name, values in _NORMALIZATION_CACHE.items():
+        merged = {key: value for key, value in stored.get(name, {}).items() if key not in values}
+        merged.update(values)
+        stored[name] = dict(list(merged.items())[-MAX_NORMALIZATION_ENTRIES:])
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump({"version": NORMALIZATION_FINGERPRINT, "entries": stored}, handle)
+    os.replace(tmp_path, path)
+
+
+def normalize_series(series: pd.Series, func: Callable[[object], str]) -> pd.Series:
+    """Normalize each distinct value of ``series`` once (memoized across builds) and broadcast back."""
+    return map_unique(series, _memoized(func))
+
+
+def _mapped(mapping: Dict[str, str], normalizer: Callable[[object], str]) -> Callable[[object], str]:
+    text = _memoized(normalize_text)
+    final = _memoized(normalizer)
+
+    def apply(value: object) -> str:
+        key = text(value)
+        return final(mapping.get(key, key))
+
+    return apply
+
 
 def standardize_keys(df: pd.DataFrame, job_col: str, task_col: str) -> pd.DataFrame:
     df = df.copy()
     df["job_no_raw"] = df[job_col]
     df["task_name_raw"] = df[task_col]
-    df["job_no"] = df[job_col].map(normalize_job_no)
-    df["task_name"] = df[task_col].map(normalize_task_name)
+    df["job_no"] = normalize_series(df[job_col], normalize_job_no)
+    df["task_name"] = normalize_series(df[task_col], normalize_task_name)
     return df
 
 
@@ -23,7 +127,7 @@ def map_task_names(df: pd.DataFrame, mapping_path: str = "config/task_name_map.c
     df = df.copy()
     mapping = load_mapping(mapping_path, "raw_task_name", "task_name")
     if mapping:
-        df["task_name"] = apply_mapping(df["task_name_raw"], mapping).map(normalize_task_name)
+        df["task_name"] = map_unique(df["task_name_raw"], _mapped(mapping, normalize_task_name))
     return df
 
 
@@ -31,8 +135,9 @@ def map_departments(df: pd.DataFrame, column: str, mapping_path: str = "config/d
     df = df.copy()
     mapping = load_mapping(mapping_path, "raw_department", "department")
     if mapping:
-        df[column] = apply_mapping(df[column], mapping)
-    df[column] = df[column].map(normalize_department)
+        df[column] = map_unique(df[column], _mapped(mapping, normalize_department))
+    else:
+        df[column] = normalize_series(df[column], normalize_department)
     return df
 
 
@@ -40,5 +145,5 @@ def normalize_columns(df: pd.DataFrame, columns) -> pd.DataFrame:
     df = df.copy()
     for col in columns:
         if col in df.columns:
-            df[col] = df[col].map(normalize_text)
+            df[col] = normalize_series(df[col], normalize_text)
     return df
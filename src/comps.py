@@ -1,50 +1,293 @@
 import json
-from itertools import combinations
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
+from scipy import sparse
 
+from src.utils import job_labels, read_settings
 
-def build_job_comps_index(fact: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
-    df = fact.copy()
-    df = df[df["task_name"] != "__UNALLOCATED__"]
+# Cells of the dense similarity block scored at once by the exact engine.
+BLOCK_CELLS = 4_000_000
+# Modulus of the MinHash hash family (a Mersenne prime, so products fit in uint64).
+MINHASH_PRIME = (1 << 31) - 1
 
-    job_meta = (
-        df.groupby("job_no", as_index=False)
-        .agg(
-            dept=("Department_reporting", "first"),
-            Product=("Product", "first"),
-        )
-    )
+Neighbours = List[Tuple[np.ndarray, np.ndarray]]
+
+
+def _comps_settings() -> Dict:
+    settings = read_settings().get("comps", {})
+    return {
+        "top_n": settings.get("top_n", 10),
+        "similarity": settings.get("similarity", "jaccard"),
+        "weights": settings.get("weights", "binary"),
+        "lsh_min_jobs": settings.get("lsh_min_jobs", 2000),
+        "lsh_num_perm": settings.get("lsh_num_perm", 128),
+        "lsh_bands": settings.get("lsh_bands", 32),
+        "lsh_max_bucket": settings.get("lsh_max_bucket", 50),
+    }
+
+
+# A job's segment is its hours-weighted Department_reporting and Product, so it
+# does not depend on the order of the fact rows.
+JOB_SEGMENT_LABELS = {"dept": "Department_reporting", "Product": "Product"}
 
-    job_tasks = (
-        df.groupby(["job_no", "task_name"], as_index=False)
-        .agg(hours=("actual_hours", "sum"))
+
+def _job_segments_and_tasks(fact: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    df = fact[fact["task_name"] != "__UNALLOCATED__"]
+    job_meta = job_labels(df, JOB_SEGMENT_LABELS, "actual_hours")
+    job_tasks = df.groupby(["job_no", "task_name"], as_index=False).agg(hours=("actual_hours", "sum"))
+    return job_meta, job_tasks[job_tasks["hours"] > 0]
+
+
+def incidence_matrix(job_tasks: pd.DataFrame, jobs: pd.Index, weights: str = "binary") -> Tuple[sparse.csr_matrix, pd.Index]:
+    """Sparse job x task matrix over ``jobs`` (rows in that order): 1 per task worked, or its hours."""
+    task_codes, tasks = pd.factorize(job_tasks["task_name"], sort=True)
+    job_codes = jobs.get_indexer(job_tasks["job_no"])
+    keep = job_codes >= 0
+    values = job_tasks["hours"].to_numpy(dtype=float) if weights == "hours" else np.ones(len(job_tasks))
+    matrix = sparse.csr_matrix(
+        (values[keep], (job_codes[keep], task_codes[keep])),
+        shape=(len(jobs), len(tasks)),
     )
-    job_task_sets = job_tasks[job_tasks["hours"] > 0].groupby("job_no")
+    matrix.sum_duplicates()
+    return matrix, tasks
+
+
+def _pair_scores(left: sparse.csr_matrix, right: sparse.csr_matrix, left_stats: np.ndarray, right_stats: np.ndarray, similarity: str) -> np.ndarray:
+    """Dense scores between every row of ``left`` and every row of ``right``."""
+    products = (left @ right.T).toarray()
+    if similarity == "cosine":
+        denominator = left_stats[:, None] * right_stats[None, :]
+    else:
+        denominator = left_stats[:, None] + right_stats[None, :] - products
+    return np.divide(products, denominator, out=np.zeros_like(products), where=denominator > 0)
+
+
+def _row_stats(matrix: sparse.csr_matrix, similarity: str) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """Matrix to multiply and per-row statistic: task counts for Jaccard, L2 norms for cosine."""
+    if similarity == "cosine":
+        return matrix, np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    binary = matrix.copy()
+    binary.data = np.ones_like(binary.data)
+    return binary, np.asarray(binary.sum(axis=1)).ravel()
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the ``k`` largest scores per row, ties broken by lower index (a stable descending sort, in linear time)."""
+    kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1:k]
+    above = scores > kth
+    tied = scores == kth
+    keep = above | (tied & (np.cumsum(tied, axis=1) <= k - above.sum(axis=1, keepdims=True)))
+    columns = np.nonzero(keep)[1].reshape(len(scores), k)
+    picked = np.take_along_axis(scores, columns, axis=1)
+    return np.take_along_axis(columns, np.argsort(-picked, axis=1, kind="stable"), axis=1)
+
+
+def exact_neighbours(matrix: sparse.csr_matrix, top_n: int, similarity: str = "jaccard") -> Neighbours:
+    """Top-N neighbours of every row by Jaccard (task sets) or cosine (rows as weighted vectors).
+
+    Scores come from sparse matrix products in row blocks. Ties, including zero
+    scores, are broken by row order, the same as the pairwise brute force.
+    """
+    n_rows = matrix.shape[0]
+    k = min(top_n, n_rows - 1)
+    if k <= 0:
+        return [(np.empty(0, dtype=int), np.empty(0))] * n_rows
+    matrix, stats = _row_stats(matrix, similarity)
+    block = max(1, BLOCK_CELLS // n_rows)
+    neighbours = []
+    for start in range(0, n_rows, block):
+        stop = min(n_rows, start + block)
+        scores = _pair_scores(matrix[start:stop], matrix, stats[start:stop], stats, similarity)
+        scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        order = _top_k(scores, k)
+        neighbours.extend(zip(order, np.take_along_axis(scores, order, axis=1)))
+    return neighbours
+
+
+def minhash_signatures(matrix: sparse.csr_matrix, num_perm: int = 128, seed: int = 0) -> np.ndarray:
+    """MinHash signature (``num_perm`` values) of each row's set of non-zero columns.
+
+    Empty rows get the all-``MINHASH_PRIME`` signature.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MINHASH_PRIME, num_perm, dtype=np.uint64)
+    b = rng.integers(0, MINHASH_PRIME, num_perm, dtype=np.uint64)
+    signatures = np.full((matrix.shape[0], num_perm), MINHASH_PRIME, dtype=np.uint64)
+    nonempty = np.flatnonzero(np.diff(matrix.indptr) > 0)
+    if len(nonempty):
+        hashes = (matrix.indices.astype(np.uint64)[:, None] * a + b) % MINHASH_PRIME
+        signatures[nonempty] = np.minimum.reduceat(hashes, matrix.indptr[nonempty], axis=0)
+    return signatures
+
 
-    task_sets = {job: set(group["task_name"].tolist()) for job, group in job_task_sets}
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int, max_bucket: int = 50, skip: Optional[np.ndarray] = None) -> np.ndarray:
+    """Distinct (i, j) row pairs, i < j, that share a bucket in at least one LSH band.
 
+    Buckets larger than ``max_bucket`` are split into consecutive chunks so a
+    block of near-identical rows cannot produce a quadratic number of pairs.
+    Rows flagged in ``skip`` (e.g. empty sets) are never paired.
+    """
+    n_rows, num_perm = signatures.shape
+    rows_per_band = max(1, num_perm // bands)
+    rows = np.arange(n_rows) if skip is None else np.flatnonzero(~skip)
+    triangles: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+    encoded = []
+    for start in range(0, rows_per_band * bands, rows_per_band):
+        _, bucket = np.unique(signatures[rows, start:start + rows_per_band], axis=0, return_inverse=True)
+        bucket = bucket.ravel()
+        order = np.lexsort((rows, bucket))
+        sorted_bucket, members = bucket[order], rows[order]
+        starts = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+        sizes = np.diff(np.r_[starts, len(order)])
+        for bucket_start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+            for chunk_start in range(bucket_start, bucket_start + size, max_bucket):
+                chunk = members[chunk_start:min(chunk_start + max_bucket, bucket_start + size)]
+                if len(chunk) not in triangles:
+                    triangles[len(chunk)] = np.triu_indices(len(chunk), k=1)
+                left, right = triangles[len(chunk)]
+                encoded.append(chunk[left].astype(np.int64) * n_rows + chunk[right])
+    if not encoded:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = pd.unique(np.concatenate(encoded))
+    return np.column_stack([pairs // n_rows, pairs % n_rows])
+
+
+def lsh_neighbours(
+    matrix: sparse.csr_matrix,
+    top_n: int,
+    similarity: str = "jaccard",
+    num_perm: int = 128,
+    bands: int = 32,
+    max_bucket: int = 50,
+    seed: int = 0,
+) -> Neighbours:
+    """Approximate top-N neighbours: MinHash-LSH candidates, scored exactly.
+
+    Only candidate pairs are scored, so rows sharing no bucket with anyone get
+    no neighbours, and the zero-score padding of the exact engine is omitted.
+    """
+    matrix, stats = _row_stats(matrix, similarity)
+    signatures = minhash_signatures(matrix, num_perm=num_perm, seed=seed)
+    pairs = lsh_candidate_pairs(signatures, bands, max_bucket, skip=np.diff(matrix.indptr) == 0)
+    left, right = pairs[:, 0], pairs[:, 1]
+    products = np.asarray(matrix[left].multiply(matrix[right]).sum(axis=1)).ravel()
+    if similarity == "cosine":
+        denominator = stats[left] * stats[right]
+    else:
+        denominator = stats[left] + stats[right] - products
+    scores = np.divide(products, denominator, out=np.zeros_like(products), where=denominator > 0)
+
+    source = np.r_[left, right]
+    target = np.r_[right, left]
+    scores = np.r_[scores, scores]
+    order = np.lexsort((target, -scores, source))
+    source, target, scores = source[order], target[order], scores[order]
+    bounds = np.searchsorted(source, np.arange(matrix.shape[0] + 1))
+    return [
+        (target[lo:min(hi, lo + top_n)], scores[lo:min(hi, lo + top_n)])
+        for lo, hi in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def _segment_neighbours(matrix: sparse.csr_matrix, config: Dict) -> Neighbours:
+    if matrix.shape[0] > config["lsh_min_jobs"]:
+        return lsh_neighbours(
+            matrix,
+            config["top_n"],
+            config["similarity"],
+            num_perm=config["lsh_num_perm"],
+            bands=config["lsh_bands"],
+            max_bucket=config["lsh_max_bucket"],
+        )
+    return exact_neighbours(matrix, config["top_n"], config["similarity"])
+
+
+def _comps_rows(job_meta: pd.DataFrame, job_tasks: pd.DataFrame, config: Dict) -> List[Dict]:
+    all_jobs = pd.Index(job_meta["job_no"])
+    matrix, _ = incidence_matrix(job_tasks, all_jobs, config["weights"])
     comps = []
     for (dept, product), group in job_meta.groupby(["dept", "Product"]):
         jobs = group["job_no"].tolist()
-        for job in jobs:
-            base_set = task_sets.get(job, set())
-            scores = []
-            for other in jobs:
-                if other == job:
-                    continue
-                other_set = task_sets.get(other, set())
-                if not base_set and not other_set:
-                    score = 0.0
-                else:
-                    score = len(base_set & other_set) / len(base_set | other_set) if (base_set | other_set) else 0.0
-                scores.append((other, score))
-            scores.sort(key=lambda x: x[1], reverse=True)
+        neighbours = _segment_neighbours(matrix[group.index.to_numpy()], config)
+        for job, (indices, scores) in zip(jobs, neighbours):
             comps.append({
                 "job_no": job,
                 "dept": dept,
                 "Product": product,
-                "comps": json.dumps(scores[:top_n]),
+                "comps": json.dumps([(jobs[index], score) for index, score in zip(indices.tolist(), scores.tolist())]),
             })
+    return comps
+
+
+def build_job_comps_index(fact: pd.DataFrame, top_n: Optional[int] = None, **overrides) -> pd.DataFrame:
+    """Top-N comparable jobs for every job within its (dept, Product) segment.
 
-    return pd.DataFrame(comps)
+    Segments with more than ``comps.lsh_min_jobs`` jobs use MinHash-LSH
+    candidates; the rest are exact. ``overrides`` replace the ``comps``
+    settings (similarity, weights, lsh_*). ``weights: hours`` only affects
+    cosine similarity; Jaccard always compares task sets.
+    """
+    config = {**_comps_settings(), **overrides}
+    if top_n is not None:
+        config["top_n"] = top_n
+    job_meta, job_tasks = _job_segments_and_tasks(fact)
+    return pd.DataFrame(_comps_rows(job_meta, job_tasks, config))
+
+
+def _brute_force_comps(task_sets: Dict[str, set], jobs: List[str], top_n: int) -> List[List[Tuple[str, float]]]:
+    """Pairwise set Jaccard, the reference the engines are checked against."""
+    result = []
+    for job in jobs:
+        base_set = task_sets.get(job, set())
+        scores = []
+        for other in jobs:
+            if other == job:
+                continue
+            union = base_set | task_sets.get(other, set())
+            scores.append((other, len(base_set & task_sets.get(other, set())) / len(union) if union else 0.0))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        result.append(scores[:top_n])
+    return result
+
+
+def comps_recall_report(fact: pd.DataFrame, top_n: int = 10, engines: Optional[Dict[str, Dict]] = None) -> pd.DataFrame:
+    """Per-segment agreement of each engine with brute-force Jaccard.
+
+    ``identical_share`` is the share of jobs whose comps list matches exactly.
+    ``recall`` counts a returned neighbour as a hit when its true score reaches
+    the lowest positive score in the brute-force list, so ties at the cut-off
+    are not penalised.
+    """
+    if engines is None:
+        engines = {"exact": {"lsh_min_jobs": np.inf}, "lsh": {"lsh_min_jobs": 0}}
+    job_meta, job_tasks = _job_segments_and_tasks(fact)
+    task_sets = {job: set(group["task_name"].tolist()) for job, group in job_tasks.groupby("job_no")}
+    base_config = {**_comps_settings(), "top_n": top_n, "similarity": "jaccard", "weights": "binary"}
+    matrix, _ = incidence_matrix(job_tasks, pd.Index(job_meta["job_no"]), "binary")
+
+    rows = []
+    for (dept, product), group in job_meta.groupby(["dept", "Product"]):
+        jobs = group["job_no"].tolist()
+        reference = _brute_force_comps(task_sets, jobs, top_n)
+        segment = matrix[group.index.to_numpy()]
+        for engine, overrides in engines.items():
+            neighbours = _segment_neighbours(segment, {**base_config, **overrides})
+            identical, recalls = 0, []
+            for job, expected, (indices, scores) in zip(jobs, reference, neighbours):
+                got = [(jobs[index], score) for index, score in zip(indices.tolist(), scores.tolist())]
+                identical += got == expected
+                positive = [score for _, score in expected if score > 0]
+                if positive:
+                    hits = sum(score >= positive[-1] for _, score in got)
+                    recalls.append(min(hits, len(positive)) / len(positive))
+            rows.append({
+                "dept": dept,
+                "Product": product,
+                "jobs": len(jobs),
+                "engine": engine,
+                "identical_share": identical / len(jobs),
+                "recall": float(np.mean(recalls)) if recalls else 1.0,
+            })
+    return pd.DataFrame(rows)
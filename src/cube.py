@@ -0,0 +1,147 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.sketches import hll_estimate, hll_registers
+
+CUBE_DIMENSIONS = ["month_key", "Department_reporting", "Product"]
+# Row flags, so every sidebar toggle selects whole cube cells.
+CUBE_FLAGS = ["is_unquoted_task", "is_unallocated_row", "dept_mismatch", "billable", "onshore"]
+CUBE_KEYS = CUBE_DIMENSIONS + CUBE_FLAGS
+CUBE_MEASURES = ["rev_alloc", "actual_cost", "actual_hours", "billable_hours", "onshore_hours", "hour_overrun"]
+# Slices with at most this many jobs (by the sketch) are counted exactly from
+# kpi_cube_members; larger ones use the HyperLogLog estimate.
+EXACT_JOBS_MAX = 50_000
+
+
+def _with_flags(fact: pd.DataFrame) -> pd.DataFrame:
+    df = fact[CUBE_DIMENSIONS + CUBE_FLAGS[:3] + CUBE_MEASURES + ["job_no"]].copy()
+    df["billable"] = df["billable_hours"] > 0
+    df["onshore"] = df["onshore_hours"] > 0
+    return df
+
+
+def build_kpi_cube(fact: pd.DataFrame) -> pd.DataFrame:
+    """Additive fact measures at month x Department_reporting x Product x flag grain."""
+    return _with_flags(fact).groupby(CUBE_KEYS, as_index=False, dropna=False, observed=True).agg(
+        rows=("job_no", "size"),
+        **{measure: (measure, "sum") for measure in CUBE_MEASURES},
+    )
+
+
+def build_kpi_cube_jobs(fact: pd.DataFrame) -> pd.DataFrame:
+    """HyperLogLog sketch of the distinct jobs in every kpi_cube cell, as (register, max rank) rows."""
+    df = _with_flags(fact)
+    df = df[df["job_no"].notna()]
+    df["register"], df["rank"] = hll_registers(df["job_no"].to_numpy())
+    return df.groupby(CUBE_KEYS + ["register"], as_index=False, dropna=False, observed=True).agg(rank=("rank", "max"))
+
+
+def build_kpi_cube_members(fact: pd.DataFrame) -> pd.DataFrame:
+    """The distinct jobs in every kpi_cube cell, one (cell, job_no) row each."""
+    df = _with_flags(fact)
+    return df.loc[df["job_no"].notna(), CUBE_KEYS + ["job_no"]].drop_duplicates()
+
+
+def cube_slice(cube: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """Cells of ``cube`` (or kpi_cube_jobs / kpi_cube_members) matching the sidebar filters, as apply_filters selects fact rows."""
+    mask = (cube["month_key"] >= filters["start"]) & (cube["month_key"] <= filters["end"])
+    if filters["dept"] != "ALL":
+        mask &= cube["Department_reporting"] == filters["dept"]
+    if filters["product"] != "ALL":
+        mask &= cube["Product"] == filters["product"]
+    if not filters["include_unallocated"]:
+        mask &= ~cube["is_unallocated_row"]
+    if filters["show_mismatches"]:
+        mask &= cube["dept_mismatch"]
+    if filters["billable_only"]:
+        mask &= cube["billable"]
+    if filters["onshore_only"]:
+        mask &= cube["onshore"]
+    return cube[mask]
+
+
+def _distinct_jobs(jobs: pd.DataFrame, by: List[str]) -> pd.Series:
+    if not by:
+        return pd.Series([hll_estimate(np.zeros(len(jobs), dtype=np.intp), jobs["register"], jobs["rank"], 1)[0]])
+    grouper = jobs.groupby(by, observed=True, sort=True)
+    keys = grouper.size().index
+    group_ids = grouper.ngroup()
+    grouped = group_ids.notna().to_numpy()
+    estimate = hll_estimate(group_ids[grouped].to_numpy(dtype=np.intp), jobs["register"][grouped], jobs["rank"][grouped], len(keys))
+    return pd.Series(estimate, index=keys)
+
+
+def _job_counts(
+    jobs: pd.DataFrame,
+    members: Optional[pd.DataFrame],
+    filters: dict,
+    by: List[str],
+    exact_max: int,
+) -> pd.Series:
+    """Distinct jobs per ``by`` group: exact from ``members`` for small slices, the HyperLogLog estimate otherwise."""
+    sketch = cube_slice(jobs, filters)
+    if members is not None and _distinct_jobs(sketch, []).iloc[0] <= exact_max:
+        cells = cube_slice(members, filters)
+        if not by:
+            return pd.Series([cells["job_no"].nunique()])
+        return cells.groupby(by, observed=True, sort=True)["job_no"].nunique()
+    return _distinct_jobs(sketch, by).round().astype(int)
+
+
+def cube_kpis(
+    cube: pd.DataFrame,
+    jobs: pd.DataFrame,
+    filters: dict,
+    members: Optional[pd.DataFrame] = None,
+    exact_max: int = EXACT_JOBS_MAX,
+) -> Dict[str, float]:
+    """Portfolio KPIs over the fact rows the sidebar filters select.
+
+    ``jobs`` is exact when ``members`` is given and the slice holds at most
+    ``exact_max`` jobs, and a HyperLogLog estimate (about 1%) otherwise.
+    """
+    cells = cube_slice(cube, filters)
+    revenue = float(cells["rev_alloc"].sum())
+    cost = float(cells["actual_cost"].sum())
+    hours = float(cells["actual_hours"].sum())
+    return {
+        "revenue": revenue,
+        "cost": cost,
+        "gp": revenue - cost,
+        "margin": (revenue - cost) / revenue * 100 if revenue else 0.0,
+        "hours": hours,
+        "jobs": int(_job_counts(jobs, members, filters, [], exact_max).iloc[0]),
+        "unquoted_hours": float(cells.loc[cells["is_unquoted_task"], "actual_hours"].sum()),
+        "unquoted_share": float(cells.loc[cells["is_unquoted_task"], "actual_hours"].sum()) / hours * 100 if hours else 0.0,
+        "unallocated_revenue": float(cells.loc[cells["is_unallocated_row"], "rev_alloc"].sum()),
+        "unallocated_share": float(cells.loc[cells["is_unallocated_row"], "rev_alloc"].sum()) / revenue * 100 if revenue else 0.0,
+        "dept_mismatch_hours": float(cells.loc[cells["dept_mismatch"], "actual_hours"].sum()),
+    }
+
+
+def cube_rollup(
+    cube: pd.DataFrame,
+    jobs: pd.DataFrame,
+    filters: dict,
+    by: List[str],
+    members: Optional[pd.DataFrame] = None,
+    exact_max: int = EXACT_JOBS_MAX,
+) -> pd.DataFrame:
+    """Revenue, cost, GP, hours, unquoted cost, overrun hours and jobs per ``by`` (e.g. month trend, department leaderboard).
+
+    Jobs are counted as in cube_kpis.
+    """
+    cells = cube_slice(cube, filters)
+    cells = cells.assign(unquoted_cost=cells["actual_cost"].where(cells["is_unquoted_task"], 0.0))
+    rollup = cells.groupby(by, as_index=False, observed=True).agg(
+        revenue=("rev_alloc", "sum"),
+        cost=("actual_cost", "sum"),
+        hours=("actual_hours", "sum"),
+        unquoted_cost=("unquoted_cost", "sum"),
+        overrun_hours=("hour_overrun", "sum"),
+    )
+    rollup.insert(rollup.columns.get_loc("cost") + 1, "gp", rollup["revenue"] - rollup["cost"])
+    distinct = _job_counts(jobs, members, filters, by, exact_max).rename("jobs")
+    return rollup.merge(distinct.reset_index(), on=by, how="left")
@@ -0,0 +1,134 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.io import write_parquet
+from src.utils import setup_logger, write_json
+
+
+class Stage:
+    """A build step: ``func(*inputs)`` produces the value named ``name``, optionally written to ``path``.
+
+    ``func`` (and ``writer``, which replaces the default Parquet/JSON writer)
+    must be picklable (a module-level function or a functools.partial of one)
+    so the stage can run in a worker process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        inputs: List[str],
+        path: Optional[str] = None,
+        writer: Optional[Callable[[Any, str], None]] = None,
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.path = path
+        self.writer = writer
+
+
+def _write_output(value: Any, path: str, writer: Optional[Callable[[Any, str], None]] = None) -> None:
+    if writer is not None:
+        writer(value, path)
+    elif path.endswith(".json"):
+        write_json(value, path)
+    elif isinstance(value, pd.DataFrame):
+        write_parquet(value, path)
+    else:
+        raise ValueError(f"Don't know how to write {type(value).__name__} to {path}")
+
+
+def _run_stage(func: Callable, args: Tuple, path: Optional[str], writer: Optional[Callable] = None) -> Tuple[Any, float, float]:
+    start = time.time()
+    value = func(*args)
+    if path:
+        _write_output(value, path, writer)
+    return value, start, time.time()
+
+
+def _topological_order(stages: List[Stage], available: set) -> List[Stage]:
+    ordered, done, pending = [], set(available), list(stages)
+    while pending:
+        ready = [stage for stage in pending if all(name in done for name in stage.inputs)]
+        if not ready:
+            missing = {name for stage in pending for name in stage.inputs if name not in done}
+            raise ValueError(f"Stage graph has unresolved inputs or a cycle: {sorted(missing)}")
+        for stage in ready:
+            ordered.append(stage)
+            done.add(stage.name)
+            pending.remove(stage)
+    return ordered
+
+
+def critical_path(stages: List[Stage], timings: Dict[str, Dict[str, float]]) -> Tuple[List[str], float]:
+    """Longest chain of dependent stages by measured duration."""
+    external = {name for stage in stages for name in stage.inputs} - {stage.name for stage in stages}
+    best: Dict[str, Tuple[float, List[str]]] = {}
+    for stage in _topological_order(stages, available=external):
+        upstream = [best[name] for name in stage.inputs if name in best]
+        length, path = max(upstream, key=lambda item: item[0]) if upstream else (0.0, [])
+        best[stage.name] = (length + timings[stage.name]["seconds"], path + [stage.name])
+    if not best:
+        return [], 0.0
+    length, path = max(best.values(), key=lambda item: item[0])
+    return path, length
+
+
+def run_dag(stages: List[Stage], initial: Dict[str, Any], workers: int = 1) -> Tuple[Dict[str, Any], Dict]:
+    """Run ``stages`` as soon as their inputs are available, on up to ``workers`` processes.
+
+    ``workers <= 1`` runs every stage in-process in topological order, which
+    gives the same values as the parallel run. Returns all stage values plus a
+    timing report with the critical path.
+    """
+    logger = setup_logger()
+    values = dict(initial)
+    timings: Dict[str, Dict[str, float]] = {}
+    ordered = _topological_order(stages, available=set(initial))
+    run_start = time.time()
+
+    def record(stage: Stage, value: Any, start: float, end: float) -> None:
+        values[stage.name] = value
+        timings[stage.name] = {"start": start - run_start, "end": end - run_start, "seconds": end - start}
+        logger.info("Stage %s finished in %.2fs", stage.name, end - start)
+
+    if workers <= 1:
+        for stage in ordered:
+            record(stage, *_run_stage(stage.func, tuple(values[name] for name in stage.inputs), stage.path, stage.writer))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or workers)) as pool:
+            pending = list(ordered)
+            running = {}
+            while pending or running:
+                for stage in [stage for stage in pending if all(name in values for name in stage.inputs)]:
+                    args = tuple(values[name] for name in stage.inputs)
+                    running[pool.submit(_run_stage, stage.func, args, stage.path, stage.writer)] = stage
+                    pending.remove(stage)
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record(running.pop(future), *future.result())
+
+    path, path_seconds = critical_path(stages, timings)
+    report = {
+        "workers": workers,
+        "wall_seconds": time.time() - run_start,
+        "stage_seconds": sum(timing["seconds"] for timing in timings.values()),
+        "critical_path": path,
+        "critical_path_seconds": path_seconds,
+        "stages": timings,
+    }
+    logger.info(
+        "Ran %d stages in %.2fs wall (%.2fs of stage time, %d workers); critical path %.2fs: %s",
+        len(stages),
+        report["wall_seconds"],
+        report["stage_seconds"],
+        workers,
+        path_seconds,
+        " -> ".join(path),
+    )
+    return values, report
@@ -0,0 +1,33 @@
+from bisect import bisect_left
+from typing import Dict, Sequence
+
+import pandas as pd
+
+DIMENSIONS_FILE = "dimensions.json"
+# Sidebar and drilldown option lists, stored sorted with their fact row counts.
+DIMENSION_COLUMNS = ["Department_reporting", "Product", "Client", "job_no"]
+
+
+def _members(values: pd.Series) -> Dict[str, list]:
+    values = values.astype(object)
+    counts = values[values.notna() & (values != "")].astype(str).value_counts().sort_index()
+    return {"values": counts.index.tolist(), "rows": [int(count) for count in counts]}
+
+
+def build_dimensions(fact: pd.DataFrame) -> Dict:
+    """Month range, FY options and sorted member lists with row counts, so the sidebar never scans fact."""
+    month_key = pd.to_datetime(fact["month_key"], errors="coerce").dropna()
+    years = sorted(month_key.dt.year.unique().tolist())
+    return {
+        "rows": int(len(fact)),
+        "month_min": month_key.min().strftime("%Y-%m-%d") if len(month_key) else None,
+        "month_max": month_key.max().strftime("%Y-%m-%d") if len(month_key) else None,
+        "fiscal_years": [f"FY{str(year)[-2:]}" for year in years],
+        "members": {col: _members(fact[col]) for col in DIMENSION_COLUMNS if col in fact.columns},
+    }
+
+
+def prefix_slice(values: Sequence[str], prefix: str) -> slice:
+    """Positions of the entries of sorted ``values`` that start with ``prefix``, found by two binary searches."""
+    start = bisect_left(values, prefix)
+    return slice(start, bisect_left(values, prefix + "\U0010ffff", lo=start))
@@ -1,20 +1,42 @@
+from typing import Iterable, Optional, Tuple
+
 import pandas as pd
 import numpy as np
 
+from src.utils import job_labels
+
 
-def build_driver_summary(fact: pd.DataFrame) -> pd.DataFrame:
+def _rate_frame(fact: pd.DataFrame) -> pd.DataFrame:
     df = fact.copy()
     df = df[df["task_name"] != "__UNALLOCATED__"]
     df["cost_per_hour"] = np.where(df["actual_hours"] > 0, df["actual_cost"] / df["actual_hours"], 0.0)
     df["dept_for_rate"] = df["Department_actual"].where(df["Department_actual"].fillna("") != "", df["Department_quote"])
+    return df
 
+
+def _baseline_from_rates(df: pd.DataFrame) -> Tuple[pd.DataFrame, float]:
     dept_baseline = (
         df[df["actual_hours"] > 0]
         .groupby("dept_for_rate", as_index=False)
         .agg(baseline_rate=("cost_per_hour", "median"))
     )
+    return dept_baseline, df["cost_per_hour"].median()
+
+
+def dept_baseline_rates(fact: pd.DataFrame) -> Tuple[pd.DataFrame, float]:
+    """Department median cost-per-hour baselines and the portfolio fallback rate."""
+    return _baseline_from_rates(_rate_frame(fact))
+
+
+def build_driver_summary(fact: pd.DataFrame, job_nos: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Driver tree per job. Baselines always come from the full ``fact``; ``job_nos`` limits the output rows."""
+    df = _rate_frame(fact)
+    dept_baseline, fallback_rate = _baseline_from_rates(df)
+    if job_nos is not None:
+        df = df[df["job_no"].isin(set(job_nos))]
+        fact = fact[fact["job_no"].isin(set(job_nos))]
     df = df.merge(dept_baseline, on="dept_for_rate", how="left")
-    df["baseline_rate"] = df["baseline_rate"].fillna(df["cost_per_hour"].median())
+    df["baseline_rate"] = df["baseline_rate"].fillna(fallback_rate)
 
     df["overrun_hours"] = (df["actual_hours"] - df["quoted_time"]).clip(lower=0)
     df["quoted_overrun_cost"] = df["overrun_hours"] * df["cost_per_hour"]
@@ -36,9 +58,8 @@ def build_driver_summary(fact: pd.DataFrame) -> pd.DataFrame:
             unquoted_work_cost=("unquoted_work_cost", "sum"),
             rate_mix_impact=("rate_mix_impact", "sum"),
             nonbillable_leakage=("nonbillable_leakage", "sum"),
-            Client=("Client", "first"),
-            Job_Name=("Job_Name", "first"),
         )
+        .merge(job_labels(df, {"Client": "Client", "Job_Name": "Job_Name"}, "actual_hours"), on="job_no", how="left")
     )
 
     unallocated = fact[fact["is_unallocated_row"]].groupby("job_no", as_index=False).agg(
@@ -2,6 +2,8 @@ import pandas as pd
 import re
 import numpy as np
 
+from src.utils import grouped_weighted_mode as _grouped_weighted_mode
+
 def norm_str(x: object) -> str:
     """Normalize string-ish values (strip + collapse whitespace)."""
     if pd.isna(x):
@@ -29,15 +31,16 @@ def month_key_first_of_month(d: pd.Series) -> pd.Series:
     dt = pd.to_datetime(d, errors="coerce")
     return dt.dt.to_period("M").dt.to_timestamp()
 
+def grouped_weighted_mode(df: pd.DataFrame, keys, value_col: str, weight_col: str, **kwargs):
+    """Batched weighted mode per group using this pipeline's string normalization."""
+    return _grouped_weighted_mode(df, keys, value_col, weight_col, normalizer=norm_str, **kwargs)
+
 def weighted_mode(values: pd.Series, weights: pd.Series) -> tuple:
     """Return (top_value, top_share, {value: weight_sum}). Ignores blanks."""
-    tmp = pd.DataFrame({"v": values.fillna("").astype(str), "w": pd.to_numeric(weights, errors="coerce").fillna(0.0)})
-    tmp["v"] = tmp["v"].map(norm_str)
-    tmp = tmp[tmp["v"] != ""]
-    if tmp.empty:
+    frame = pd.DataFrame({"group": 0, "v": values.to_numpy(), "w": weights.to_numpy()})
+    summary, dist = grouped_weighted_mode(frame, "group", "v", "w", return_distribution=True)
+    if dist.empty:
         return ("", 0.0, {})
-    dist = tmp.groupby("v", as_index=False)["w"].sum().sort_values("w", ascending=False)
-    top_v = str(dist.iloc[0]["v"])
-    total = float(dist["w"].sum())
-    top_share = float(dist.iloc[0]["w"] / total) if total else 0.0
-    return (top_v, top_share, {})
\ No newline at end of file
+    top_v = str(summary["top_value"].iloc[0])
+    top_share = float(summary["top_share"].iloc[0])
+    return (top_v, top_share, dict(zip(dist["value"], dist["weight"])))
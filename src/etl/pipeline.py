@@ -6,9 +6,9 @@ from src.etl.cleaners import (
     clean_job_no,
     clean_task_name,
     clean_dept,
+    grouped_weighted_mode,
     month_key_first_of_month,
     truthy_excluded,
-    weighted_mode,
 )
 
 # Configuration
@@ -16,11 +16,6 @@ RAW_DATA_PATH = "data/raw/Quoted_Task_Report_FY26.xlsx"
 OUTPUT_DIR = "data/processed"
 
 
-def _first_non_null(series: pd.Series):
-    non_null = series.dropna()
-    return non_null.iloc[0] if not non_null.empty else pd.NaT
-
-
 def _safe_str(value) -> str:
     return "" if pd.isna(value) else str(value)
 
@@ -65,23 +60,28 @@ def run_pipeline(excel_path: str = RAW_DATA_PATH, output_dir: str = OUTPUT_DIR):
     ts["billable_value"] = (ts["hours"] * ts["billable_rate"]).astype(float)
     ts["Department_clean"] = ts["Department"].map(clean_dept)
 
-    def agg_timesheet(group: pd.DataFrame) -> pd.Series:
-        total_hours = group["hours"].sum()
-        dept_top, dept_share, _ = weighted_mode(group["Department_clean"], group["hours"])
-        return pd.Series({
-            "actual_hours": total_hours,
-            "actual_cost": group["cost"].sum(),
-            "billable_value": group["billable_value"].sum(),
-            "Department_actual": dept_top,
-            "department_actual_share": dept_share,
-            "distinct_staff": group["[Staff] Name"].nunique(),
-        })
-
+    ts_keys = ["job_no", "task_name", "month_key"]
     timesheet_task_month = (
-        ts.groupby(["job_no", "task_name", "month_key"])
-        .apply(agg_timesheet)
+        ts.groupby(ts_keys)
+        .agg(
+            actual_hours=("hours", "sum"),
+            actual_cost=("cost", "sum"),
+            billable_value=("billable_value", "sum"),
+            distinct_staff=("[Staff] Name", "nunique"),
+        )
         .reset_index()
     )
+    dept_actual = grouped_weighted_mode(ts, ts_keys, "Department_clean", "hours")
+    timesheet_task_month["Department_actual"] = dept_actual["top_value"].to_numpy()
+    timesheet_task_month["department_actual_share"] = dept_actual["top_share"].to_numpy()
+    timesheet_task_month = timesheet_task_month[ts_keys + [
+        "actual_hours",
+        "actual_cost",
+        "billable_value",
+        "Department_actual",
+        "department_actual_share",
+        "distinct_staff",
+    ]]
 
     # 4. Allocate Revenue
     print("Allocating Revenue...")
@@ -141,24 +141,39 @@ def run_pipeline(excel_path: str = RAW_DATA_PATH, output_dir: str = OUTPUT_DIR):
         .fillna(qt["[Job Task] Due Date"])
     )
 
-    def agg_quote(group: pd.DataFrame) -> pd.Series:
-        dept_top, _, _ = weighted_mode(group["Department_quote_clean"], group["quoted_time"].replace(0, 1))
-        return pd.Series({
-            "quoted_time": group["quoted_time"].sum(),
-            "quoted_amount": group["quoted_amount"].sum(),
-            "Department_quote": dept_top,
-            "Client_quote": _safe_str(group["[Job] Client"].iloc[0]) if not group["[Job] Client"].empty else "",
-            "Job_Name_quote": _safe_str(group["[Job] Name"].iloc[0]) if not group["[Job] Name"].empty else "",
-            "Job_Status_quote": _safe_str(group["[Job] Status"].iloc[0]) if "[Job] Status" in group else "",
-            "Product_quote": _safe_str(group["Product"].iloc[0]) if "Product" in group else "",
-            "quote_month_key": _first_non_null(group["quote_month_key"]),
-        })
-
+    qt_keys = ["job_no", "task_name"]
+    qt["quote_weight"] = qt["quoted_time"].replace(0, 1)
     quote_task = (
-        qt.groupby(["job_no", "task_name"])
-        .apply(agg_quote)
+        qt.groupby(qt_keys)
+        .agg(
+            quoted_time=("quoted_time", "sum"),
+            quoted_amount=("quoted_amount", "sum"),
+            quote_month_key=("quote_month_key", "first"),
+        )
         .reset_index()
     )
+    dept_quote = grouped_weighted_mode(qt, qt_keys, "Department_quote_clean", "quote_weight")
+    quote_task["Department_quote"] = dept_quote["top_value"].to_numpy()
+
+    # Descriptive fields come from the first quote line of each job-task, blanks included.
+    first_lines = qt.drop_duplicates(qt_keys).sort_values(qt_keys, kind="mergesort").reset_index(drop=True)
+    for source, target in [
+        ("[Job] Client", "Client_quote"),
+        ("[Job] Name", "Job_Name_quote"),
+        ("[Job] Status", "Job_Status_quote"),
+        ("Product", "Product_quote"),
+    ]:
+        quote_task[target] = first_lines[source].map(_safe_str).to_numpy() if source in qt.columns else ""
+    quote_task = quote_task[qt_keys + [
+        "quoted_time",
+        "quoted_amount",
+        "Department_quote",
+        "Client_quote",
+        "Job_Name_quote",
+        "Job_Status_quote",
+        "Product_quote",
+        "quote_month_key",
+    ]]
 
     # 6. Quote-only tasks (no actuals)
     actual_keys = timesheet_task_month[["job_no", "task_name"]].drop_duplicates()
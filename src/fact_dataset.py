@@ -0,0 +1,112 @@
+import os
+import shutil
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from src.incremental import ARTIFACT_KEYS, canonical_order
+from src.schema import apply_schema, write_artifact
+from src.utils import fiscal_year_label
+
+FACT_DATASET_DIR = "fact_job_task_month"
+PARTITION_COLUMNS = ["fiscal_year", "month"]
+# Rows inside each partition are sorted by these so row-group statistics let
+# department/product filters skip most of a file.
+CLUSTER_COLUMNS = ["Department_reporting", "Product"]
+ROW_GROUP_SIZE = 65536
+
+
+def fact_dataset_path(fact_path: str) -> str:
+    return os.path.join(os.path.dirname(fact_path), FACT_DATASET_DIR)
+
+
+def write_fact_dataset(fact: pd.DataFrame, root: str) -> None:
+    """Write ``fact`` as a Hive-partitioned dataset: ``root/fiscal_year=FY26/month=2025-07/part-0.parquet``.
+
+    The dataset is written under a temporary name next to ``root`` and only
+    renamed to ``root`` once complete, so ``root`` never holds a partial
+    dataset. A previous dataset is renamed aside first and deleted after the
+    swap; readers arriving in between find no dataset and fall back to the
+    flat fact file.
+    """
+    df = apply_schema(fact)
+    month_key = pd.to_datetime(df["month_key"], errors="coerce")
+    df["fiscal_year"] = fiscal_year_label(month_key).where(month_key.notna())
+    df["month"] = month_key.dt.strftime("%Y-%m")
+    df = df.sort_values(
+        PARTITION_COLUMNS + CLUSTER_COLUMNS + ARTIFACT_KEYS["fact"],
+        kind="mergesort",
+        na_position="last",
+    )
+
+    tmp_root = f"{root}.tmp"
+    shutil.rmtree(tmp_root, ignore_errors=True)
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        tmp_root,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([(col, pa.string()) for col in PARTITION_COLUMNS]), flavor="hive"),
+        basename_template="part-{i}.parquet",
+        max_rows_per_group=ROW_GROUP_SIZE,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    old_root = f"{root}.old"
+    if os.path.exists(root):
+        shutil.rmtree(old_root, ignore_errors=True)
+        os.replace(root, old_root)
+    os.replace(tmp_root, root)
+    shutil.rmtree(old_root, ignore_errors=True)
+
+
+def write_fact(fact: pd.DataFrame, path: str) -> None:
+    """Write the flat fact artifact and its partitioned copy."""
+    write_artifact(fact, path)
+    write_fact_dataset(fact, fact_dataset_path(path))
+
+
+def fact_filter(
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    dept: Optional[str] = None,
+    product: Optional[str] = None,
+) -> Optional[ds.Expression]:
+    """Dataset expression for the sidebar filters; ``None``/"ALL" means unfiltered.
+
+    The month partition bounds prune whole directories; the month_key bounds
+    keep the exact semantics of filtering the flat table.
+    """
+    conditions = []
+    if start is not None and not pd.isna(start):
+        start = pd.Timestamp(start)
+        conditions += [ds.field("month") >= start.strftime("%Y-%m"), ds.field("month_key") >= start.to_pydatetime()]
+    if end is not None and not pd.isna(end):
+        end = pd.Timestamp(end)
+        conditions += [ds.field("month") <= end.strftime("%Y-%m"), ds.field("month_key") <= end.to_pydatetime()]
+    if dept and dept != "ALL":
+        conditions.append(ds.field("Department_reporting") == dept)
+    if product and product != "ALL":
+        conditions.append(ds.field("Product") == product)
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+def read_fact_dataset(
+    root: str,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    dept: Optional[str] = None,
+    product: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Read only the partitions and row groups matching the filters, in the flat table's row order."""
+    dataset = ds.dataset(root, format="parquet", partitioning="hive")
+    stored = [name for name in dataset.schema.names if name not in PARTITION_COLUMNS]
+    columns = stored if columns is None else [col for col in columns if col in stored]
+    table = dataset.to_table(columns=columns, filter=fact_filter(start, end, dept, product))
+    return canonical_order(table.to_pandas(), ARTIFACT_KEYS["fact"])
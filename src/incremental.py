@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from src.allocation import allocate_revenue
+from src.comps import JOB_SEGMENT_LABELS, build_job_comps_index
+from src.cube import CUBE_KEYS, build_kpi_cube, build_kpi_cube_jobs, build_kpi_cube_members
+from src.drivers import build_driver_summary, dept_baseline_rates
+from src.job_index import build_job_index
+from src.metrics import build_fact_table, build_job_month_summary, build_job_task_summary, build_job_total_summary
+from src.quote_intelligence import build_job_template_library, build_task_catalog, build_task_month_stats, build_task_sketch
+from src.utils import job_labels
+
+MANIFEST_FILE = "build_manifest.json"
+MANIFEST_VERSION = 1
+
+# Every artifact is written sorted by these keys so that a spliced incremental
+# build and a full rebuild produce identical files.
+ARTIFACT_KEYS = {
+    "fact": ["job_no", "task_name", "month_key"],
+    "job_month": ["job_no", "month_key"],
+    "job_total": ["job_no"],
+    "job_task": ["job_no", "task_name"],
+    "job_driver": ["job_no"],
+    "task_catalog": ["dept", "Product", "task_name"],
+    "task_month_stats": ["dept", "Product", "month_key", "task_name"],
+    "task_sketch": ["dept", "Product", "month_key", "task_name", "measure", "bucket"],
+    "job_template": ["dept", "Product"],
+    "job_comps": ["dept", "Product", "job_no"],
+    "kpi_cube": CUBE_KEYS,
+    "kpi_cube_jobs": CUBE_KEYS + ["register"],
+    "kpi_cube_members": CUBE_KEYS + ["job_no"],
+    "job_index": ["artifact", "job_no"],
+}
+
+SEGMENT_KEYS = ["dept", "Product"]
+
+
+def canonical_order(df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    if df.empty or not set(keys).issubset(df.columns):
+        return df.reset_index(drop=True)
+    return df.sort_values(keys, kind="mergesort", na_position="last").reset_index(drop=True)
+
+
+def job_fingerprints(df: pd.DataFrame, job_col: str = "job_no") -> Dict[str, str]:
+    """Order-independent hash of every row belonging to each job."""
+    if df.empty:
+        return {}
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+    codes, jobs = pd.factorize(df[job_col], sort=True)
+    valid = codes >= 0
+    codes, row_hashes = codes[valid], row_hashes[valid]
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sums = np.add.reduceat(row_hashes[order], starts)
+    return {str(jobs[code]): f"{int(value):016x}" for code, value in zip(sorted_codes[starts], sums)}
+
+
+def config_fingerprint(paths: Iterable[str] = ("config/settings.yaml",)) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "rb") as handle:
+                digest.update(handle.read())
+    return digest.hexdigest()
+
+
+def build_manifest(inputs: Dict[str, pd.DataFrame], fy: Optional[str]) -> Dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "fy": fy,
+        "config": config_fingerprint(),
+        "fingerprints": {name: job_fingerprints(df) for name, df in inputs.items()},
+    }
+
+
+def load_manifest(output_dir: str) -> Optional[Dict]:
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def is_compatible(previous: Optional[Dict], current: Dict) -> bool:
+    """An incremental build is only valid against a manifest from the same logic, FY and config."""
+    if not previous:
+        return False
+    return all(previous.get(key) == current.get(key) for key in ["version", "fy", "config"])
+
+
+def changed_job_nos(previous: Dict, current: Dict) -> Set[str]:
+    changed = set()
+    for name, fingerprints in current["fingerprints"].items():
+        old = previous.get("fingerprints", {}).get(name, {})
+        changed |= {job for job in set(old) | set(fingerprints) if old.get(job) != fingerprints.get(job)}
+    return changed
+
+
+def _segment_frame(df: pd.DataFrame, dept: pd.Series) -> pd.DataFrame:
+    return pd.DataFrame({"dept": dept, "Product": df["Product"].fillna("")}, index=df.index)
+
+
+def catalog_segment_index(fact: pd.DataFrame) -> pd.MultiIndex:
+    """(dept, Product) segment of every fact row as grouped by build_task_catalog (NaN dept for excluded rows)."""
+    dept = fact["Department_actual"].where(fact["Department_actual"].fillna("") != "", fact["Department_quote"])
+    dept = dept.where(fact["task_name"] != "__UNALLOCATED__")
+    return pd.MultiIndex.from_frame(_segment_frame(fact, dept))
+
+
+def reporting_segment_index(fact: pd.DataFrame) -> pd.MultiIndex:
+    """(dept, Product) segment of every fact row as matched by build_job_template_library."""
+    return pd.MultiIndex.from_frame(_segment_frame(fact, fact["Department_reporting"].fillna("")))
+
+
+def comps_segments(fact: pd.DataFrame) -> pd.DataFrame:
+    """Per-job (dept, Product) segment as assigned by build_job_comps_index."""
+    df = fact[fact["task_name"] != "__UNALLOCATED__"]
+    return job_labels(df, JOB_SEGMENT_LABELS, "actual_hours").dropna(subset=SEGMENT_KEYS)
+
+
+def _segments(index: pd.MultiIndex) -> Set[tuple]:
+    return {segment for segment in index.unique() if not pd.isna(segment[0])}
+
+
+def _in_segments(df: pd.DataFrame, segments: Set[tuple]) -> np.ndarray:
+    if df.empty or not segments:
+        return np.zeros(len(df), dtype=bool)
+    return pd.MultiIndex.from_frame(df[SEGMENT_KEYS]).isin(list(segments))
+
+
+def _in_jobs(df: pd.DataFrame, job_nos: Iterable[str]) -> np.ndarray:
+    if df.empty:
+        return np.zeros(len(df), dtype=bool)
+    return df["job_no"].isin(set(job_nos)).to_numpy()
+
+
+def _same_rate(old: float, new: float) -> bool:
+    return old == new or (pd.isna(old) and pd.isna(new))
+
+
+def splice(existing: pd.DataFrame, recomputed: pd.DataFrame, drop_mask: np.ndarray, keys: List[str]) -> pd.DataFrame:
+    kept = existing[~drop_mask]
+    pieces = [piece for piece in [kept, recomputed] if not piece.empty]
+    if not pieces:
+        return existing.iloc[0:0]
+    return canonical_order(pd.concat(pieces, ignore_index=True, sort=False), keys)
+
+
+def incremental_rebuild(
+    existing: Dict[str, pd.DataFrame],
+    revenue: pd.DataFrame,
+    timesheet: pd.DataFrame,
+    quote_task: pd.DataFrame,
+    changed: Set[str],
+) -> Dict[str, pd.DataFrame]:
+    """Recompute job- and segment-level artifacts only where ``changed`` jobs reach, splicing into ``existing``."""
+    changed = sorted(changed)
+    old_fact = existing["fact"]
+    old_changed = old_fact[old_fact["job_no"].isin(changed)]
+
+    quote_changed = quote_task[quote_task["job_no"].isin(changed)]
+    allocated = allocate_revenue(timesheet[timesheet["job_no"].isin(changed)], revenue[revenue["job_no"].isin(changed)])
+    fact_changed = canonical_order(build_fact_table(allocated, quote_changed), ARTIFACT_KEYS["fact"])
+
+    outputs = {}
+    outputs["fact"] = splice(old_fact, fact_changed, _in_jobs(old_fact, changed), ARTIFACT_KEYS["fact"])
+    fact = outputs["fact"]
+    for name, recomputed in [
+        ("job_month", build_job_month_summary(fact_changed)),
+        ("job_total", build_job_total_summary(fact_changed, quote_changed)),
+        ("job_task", build_job_task_summary(fact_changed)),
+    ]:
+        outputs[name] = splice(existing[name], recomputed, _in_jobs(existing[name], changed), ARTIFACT_KEYS[name])
+
+    # Driver baselines are department medians over the whole fact, so jobs in
+    # departments whose baseline moved are recomputed too.
+    old_baseline, old_fallback = dept_baseline_rates(old_fact)
+    new_baseline, new_fallback = dept_baseline_rates(fact)
+    baseline = old_baseline.merge(new_baseline, on="dept_for_rate", how="outer", suffixes=("_old", "_new"))
+    moved = baseline.loc[baseline["baseline_rate_old"] != baseline["baseline_rate_new"], "dept_for_rate"]
+    rate_dept = fact["Department_actual"].where(fact["Department_actual"].fillna("") != "", fact["Department_quote"])
+    driver_jobs = set(changed) | set(fact.loc[rate_dept.isin(moved), "job_no"])
+    if not _same_rate(old_fallback, new_fallback):
+        driver_jobs |= set(fact.loc[~rate_dept.isin(new_baseline["dept_for_rate"]), "job_no"])
+    outputs["job_driver"] = splice(
+        existing["job_driver"],
+        build_driver_summary(fact, job_nos=driver_jobs),
+        _in_jobs(existing["job_driver"], driver_jobs),
+        ARTIFACT_KEYS["job_driver"],
+    )
+
+    catalog_index = catalog_segment_index(fact)
+    catalog_segments = _segments(catalog_segment_index(old_changed)) | _segments(catalog_segment_index(fact_changed))
+    catalog_rows = fact[catalog_index.isin(list(catalog_segments))]
+    for name, builder in [
+        ("task_catalog", build_task_catalog),
+        ("task_month_stats", build_task_month_stats),
+        ("task_sketch", build_task_sketch),
+    ]:
+        outputs[name] = splice(
+            existing[name],
+            builder(catalog_rows) if catalog_segments else existing[name].iloc[0:0],
+            _in_segments(existing[name], catalog_segments),
+            ARTIFACT_KEYS[name],
+        )
+
+    reporting_index = reporting_segment_index(fact)
+    template_segments = (
+        catalog_segments
+        | _segments(reporting_segment_index(old_changed))
+        | _segments(reporting_segment_index(fact_changed))
+    )
+    # Templates read task lists from the spliced catalog and job hours from rows reporting under the segment.
+    template_rows = reporting_index.isin(list(template_segments))
+    template_catalog = outputs["task_catalog"][_in_segments(outputs["task_catalog"], template_segments)]
+    templates = build_job_template_library(fact[template_rows], catalog=template_catalog) if template_segments else pd.DataFrame()
+    if not templates.empty:
+        templates = templates[_in_segments(templates, template_segments)]
+    outputs["job_template"] = splice(
+        existing["job_template"],
+        templates,
+        _in_segments(existing["job_template"], template_segments),
+        ARTIFACT_KEYS["job_template"],
+    )
+
+    job_segments = comps_segments(fact)
+    comp_segments = set()
+    for frame in [comps_segments(old_changed), comps_segments(fact_changed)]:
+        comp_segments |= set(zip(frame["dept"], frame["Product"]))
+    comp_jobs = job_segments.loc[_in_segments(job_segments, comp_segments), "job_no"]
+    comps = build_job_comps_index(fact[fact["job_no"].isin(comp_jobs)]) if comp_segments else pd.DataFrame()
+    outputs["job_comps"] = splice(
+        existing["job_comps"],
+        comps,
+        _in_segments(existing["job_comps"], comp_segments) | _in_jobs(existing["job_comps"], changed),
+        ARTIFACT_KEYS["job_comps"],
+    )
+
+    # The cube is a single grouped pass over fact, so it is rebuilt from the spliced fact.
+    outputs["kpi_cube"] = canonical_order(build_kpi_cube(fact), ARTIFACT_KEYS["kpi_cube"])
+    outputs["kpi_cube_jobs"] = canonical_order(build_kpi_cube_jobs(fact), ARTIFACT_KEYS["kpi_cube_jobs"])
+    outputs["kpi_cube_members"] = canonical_order(build_kpi_cube_members(fact), ARTIFACT_KEYS["kpi_cube_members"])
+    outputs["job_index"] = canonical_order(
+        build_job_index(fact, outputs["job_month"], outputs["job_driver"]),
+        ARTIFACT_KEYS["job_index"],
+    )
+    return outputs
@@ -1,17 +1,141 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
 import pandas as pd
 
+from src.utils import ensure_dir, setup_logger
+
+SHEETS = {
+    "revenue": "Monthly Revenue",
+    "timesheet": "Timesheet Data",
+    "quote": "Quotation Data",
+}
+
+# Columns read by the sheet builders; everything else in the workbook is skipped at parse time.
+SHEET_COLUMNS = {
+    "revenue": ["Job Number", "Month", "Excluded", "Amount", "FY"],
+    "timesheet": [
+        "[Job] Job No.",
+        "[Job Task] Name",
+        "Month Key",
+        "[Time] Date",
+        "[Time] Time",
+        "[Task] Base Rate",
+        "[Task] Billable Rate",
+        "Billable?",
+        "Onshore",
+        "Department",
+        "[Staff] Name",
+        "Role",
+        "[Category] Category",
+        "Deliverable",
+        "Function",
+    ],
+    "quote": [
+        "[Job] Job No.",
+        "[Job Task] Name",
+        "[Job Task] Quoted Time",
+        "[Job Task] Quoted Amount",
+        "Department",
+        "Product",
+        "[Job] Client",
+        "[Job] Category",
+        "[Job] Status",
+        "[Job] Name",
+        "[Job Task] Start Date",
+        "[Job] Start Date",
+        "[Job Task] Due Date",
+        "[Job] Due Date",
+    ],
+}
+
+# Processed artifacts written by the build, keyed by the names used across the app.
+ARTIFACT_FILES = {
+    "fact": "fact_job_task_month.parquet",
+    "job_month": "job_month_summary.parquet",
+    "job_total": "job_total_summary.parquet",
+    "job_task": "job_task_summary.parquet",
+    "job_driver": "job_driver_summary.parquet",
+    "task_catalog": "task_catalog.parquet",
+    "task_month_stats": "task_month_stats.parquet",
+    "task_sketch": "task_sketch.parquet",
+    "job_template": "job_template_library.parquet",
+    "job_comps": "job_comps_index.parquet",
+    "kpi_cube": "kpi_cube.parquet",
+    "kpi_cube_jobs": "kpi_cube_jobs.parquet",
+    "kpi_cube_members": "kpi_cube_members.parquet",
+    "job_index": "job_index.parquet",
+}
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _sheet_cache_path(cache_dir: str, content_hash: str, key: str) -> str:
+    columns_hash = hashlib.sha256(json.dumps(SHEET_COLUMNS[key]).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(cache_dir, content_hash, f"{key}_{columns_hash}.parquet")
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Stringify object columns that mix types (e.g. numbers and text) so they serialize to Parquet.
+
+    Builders only ever str()/to_numeric()/to_datetime() these raw cells, so the
+    conversion does not change their outputs.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed"):
+            df[col] = df[col].map(lambda value: value if pd.isna(value) else str(value)).astype(object)
+    return df
+
+
+def read_excel_sheets(path: str, cache_dir: Optional[str] = "data/cache", use_cache: bool = True) -> Dict[str, pd.DataFrame]:
+    """Read the revenue, timesheet and quote sheets, opening the workbook at most once.
+
+    Parsed sheets are cached as Parquet under ``cache_dir/<sha256 of workbook>/``
+    so reruns on an unchanged workbook skip Excel parsing entirely.
+    """
+    logger = setup_logger()
+    use_cache = use_cache and bool(cache_dir)
+    cache_paths = {}
+    if use_cache:
+        content_hash = file_sha256(path)
+        cache_paths = {key: _sheet_cache_path(cache_dir, content_hash, key) for key in SHEETS}
+
+    sheets = {}
+    for key, cache_path in cache_paths.items():
+        if os.path.exists(cache_path):
+            sheets[key] = pd.read_parquet(cache_path)
+            logger.info("Loaded sheet '%s' from cache", SHEETS[key])
+
+    missing = [key for key in SHEETS if key not in sheets]
+    if missing:
+        with pd.ExcelFile(path) as workbook:
+            for key in missing:
+                wanted = set(SHEET_COLUMNS[key])
+                sheet = workbook.parse(SHEETS[key], usecols=lambda col: col in wanted)
+                sheets[key] = _arrow_safe(sheet)
+                logger.info("Parsed sheet '%s' (%d rows)", SHEETS[key], len(sheet))
+                if use_cache:
+                    ensure_dir(os.path.dirname(cache_paths[key]))
+                    tmp_path = f"{cache_paths[key]}.tmp"
+                    write_parquet(sheets[key], tmp_path)
+                    os.replace(tmp_path, cache_paths[key])
 
-def read_excel_sheets(path: str) -> dict:
-    return {
-        "revenue": pd.read_excel(path, sheet_name="Monthly Revenue"),
-        "timesheet": pd.read_excel(path, sheet_name="Timesheet Data"),
-        "quote": pd.read_excel(path, sheet_name="Quotation Data"),
-    }
+    return {key: sheets[key] for key in SHEETS}
 
 
 def write_parquet(df: pd.DataFrame, path: str) -> None:
     df.to_parquet(path, index=False)
 
 
-def read_parquet(path: str) -> pd.DataFrame:
-    return pd.read_parquet(path)
+def read_parquet(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    # Columns and row groups are decoded on pyarrow's CPU pool.
+    return pd.read_parquet(path, columns=columns, use_threads=True)
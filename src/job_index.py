@@ -0,0 +1,53 @@
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Artifacts written sorted by job_no (see ARTIFACT_KEYS), so each job's rows
+# are one contiguous block.
+JOB_INDEXED_ARTIFACTS = ["fact", "job_month", "job_driver"]
+
+JobOffsets = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def job_offsets(df: pd.DataFrame) -> pd.DataFrame:
+    """[start, end) row positions of every job in ``df``, which must be sorted by job_no."""
+    codes, jobs = pd.factorize(df["job_no"])
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=np.int64)
+    ends = np.r_[starts[1:], len(codes)].astype(np.int64)
+    keep = codes[starts] >= 0
+    if keep.sum() != len(jobs):
+        raise ValueError("Rows are not grouped by job_no")
+    offsets = pd.DataFrame({"job_no": np.asarray(jobs, dtype=object)[codes[starts[keep]]], "start": starts[keep], "end": ends[keep]})
+    return offsets.astype({"start": np.int64, "end": np.int64})
+
+
+def build_job_index(fact: pd.DataFrame, job_month: pd.DataFrame, job_driver: pd.DataFrame) -> pd.DataFrame:
+    """Row offsets of every job in the job-sorted artifacts, keyed by (artifact, job_no)."""
+    frames = dict(zip(JOB_INDEXED_ARTIFACTS, [fact, job_month, job_driver]))
+    return pd.concat(
+        [job_offsets(df).assign(artifact=name) for name, df in frames.items()],
+        ignore_index=True,
+    )[["artifact", "job_no", "start", "end"]]
+
+
+def offsets_lookup(offsets: pd.DataFrame) -> JobOffsets:
+    """job_no sorted for binary search, with the matching start and end arrays."""
+    jobs = offsets["job_no"].astype(str).to_numpy()
+    order = np.argsort(jobs, kind="stable")
+    return jobs[order], offsets["start"].to_numpy(dtype=np.int64)[order], offsets["end"].to_numpy(dtype=np.int64)[order]
+
+
+def index_lookup(index: pd.DataFrame) -> Dict[str, JobOffsets]:
+    """offsets_lookup for every artifact in a persisted job index."""
+    artifact = index["artifact"].astype(object)
+    return {name: offsets_lookup(index[artifact == name]) for name in JOB_INDEXED_ARTIFACTS}
+
+
+def job_rows(df: pd.DataFrame, offsets: JobOffsets, job_no: str) -> pd.DataFrame:
+    """Rows of ``job_no`` as a positional slice of ``df`` (no scan, no copy); empty when absent."""
+    jobs, starts, ends = offsets
+    position = int(np.searchsorted(jobs, job_no))
+    if position < len(jobs) and jobs[position] == job_no:
+        return df.iloc[starts[position]:ends[position]]
+    return df.iloc[0:0]
@@ -1,7 +1,9 @@
+from typing import Dict, List, Tuple
+
 import pandas as pd
 import numpy as np
 
-from src.utils import safe_divide
+from src.utils import job_labels, safe_divide
 
 
 def build_fact_table(allocated_df: pd.DataFrame, quote_task_df: pd.DataFrame) -> pd.DataFrame:
@@ -72,62 +74,62 @@ def build_fact_table(allocated_df: pd.DataFrame, quote_task_df: pd.DataFrame) ->
     return fact
 
 
-def build_job_month_summary(fact: pd.DataFrame) -> pd.DataFrame:
-    job_month = (
-        fact.groupby(["job_no", "month_key"], as_index=False)
-        .agg(
-            revenue_monthly=("revenue_monthly", "sum"),
-            rev_alloc=("rev_alloc", "sum"),
-            actual_cost=("actual_cost", "sum"),
-            actual_hours=("actual_hours", "sum"),
-            billable_hours=("billable_hours", "sum"),
-            onshore_hours=("onshore_hours", "sum"),
-            unallocated_revenue=("rev_alloc", lambda s: s[fact.loc[s.index, "is_unallocated_row"]].sum()),
-            unquoted_hours=("actual_hours", lambda s: s[fact.loc[s.index, "is_unquoted_task"]].sum()),
-            dept_mismatch_hours=("actual_hours", lambda s: s[fact.loc[s.index, "dept_mismatch"]].sum()),
-        )
-    )
-    job_month["gp"] = job_month["rev_alloc"] - job_month["actual_cost"]
-    job_month["margin"] = np.where(job_month["rev_alloc"] > 0, job_month["gp"] / job_month["rev_alloc"], 0.0)
-    job_month["rev_per_hour"] = np.where(job_month["actual_hours"] > 0, job_month["rev_alloc"] / job_month["actual_hours"], 0.0)
-    job_month["cost_per_hour"] = np.where(job_month["actual_hours"] > 0, job_month["actual_cost"] / job_month["actual_hours"], 0.0)
-    job_month["unquoted_share"] = np.where(job_month["actual_hours"] > 0, job_month["unquoted_hours"] / job_month["actual_hours"], 0.0)
-    job_month["dept_mismatch_share"] = np.where(job_month["actual_hours"] > 0, job_month["dept_mismatch_hours"] / job_month["actual_hours"], 0.0)
-    job_month["billable_share"] = np.where(job_month["actual_hours"] > 0, job_month["billable_hours"] / job_month["actual_hours"], 0.0)
-    job_month["onshore_share"] = np.where(job_month["actual_hours"] > 0, job_month["onshore_hours"] / job_month["actual_hours"], 0.0)
+# Flag-masked copies of the measures, so the summaries need no per-group lambdas.
+MASKED_MEASURES = {
+    "unallocated_revenue": ("rev_alloc", "is_unallocated_row"),
+    "unquoted_hours": ("actual_hours", "is_unquoted_task"),
+    "dept_mismatch_hours": ("actual_hours", "dept_mismatch"),
+}
+
+ROLLUP_AGGREGATIONS = {
+    "rev_alloc": ("rev_alloc", "sum"),
+    "actual_cost": ("actual_cost", "sum"),
+    "actual_hours": ("actual_hours", "sum"),
+    "billable_hours": ("billable_hours", "sum"),
+    "onshore_hours": ("onshore_hours", "sum"),
+    **{name: (name, "sum") for name in MASKED_MEASURES},
+}
+
+
+def _ratio(numerator: pd.Series, denominator: pd.Series) -> np.ndarray:
+    return np.where(denominator > 0, numerator / denominator, 0.0)
+
 
-    return job_month
+def add_rollup_ratios(rollup: pd.DataFrame) -> pd.DataFrame:
+    """GP and the ratio columns shared by the job-month and job-total summaries."""
+    rollup["gp"] = rollup["rev_alloc"] - rollup["actual_cost"]
+    rollup["margin"] = _ratio(rollup["gp"], rollup["rev_alloc"])
+    rollup["rev_per_hour"] = _ratio(rollup["rev_alloc"], rollup["actual_hours"])
+    rollup["cost_per_hour"] = _ratio(rollup["actual_cost"], rollup["actual_hours"])
+    rollup["unquoted_share"] = _ratio(rollup["unquoted_hours"], rollup["actual_hours"])
+    rollup["dept_mismatch_share"] = _ratio(rollup["dept_mismatch_hours"], rollup["actual_hours"])
+    rollup["billable_share"] = _ratio(rollup["billable_hours"], rollup["actual_hours"])
+    rollup["onshore_share"] = _ratio(rollup["onshore_hours"], rollup["actual_hours"])
+    return rollup
+
+
+def _rollup(fact: pd.DataFrame, keys: List[str], aggregations: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+    """One named-aggregation pass over the measures plus their flag-masked copies."""
+    columns = list(dict.fromkeys(col for col, _ in aggregations.values() if col not in MASKED_MEASURES))
+    frame = fact[keys + columns].assign(**{
+        name: fact[value_col].where(fact[flag_col].astype(bool), 0.0)
+        for name, (value_col, flag_col) in MASKED_MEASURES.items()
+    })
+    return add_rollup_ratios(frame.groupby(keys, as_index=False).agg(**aggregations))
+
+
+def build_job_month_summary(fact: pd.DataFrame) -> pd.DataFrame:
+    aggregations = {"revenue_monthly": ("revenue_monthly", "sum"), **ROLLUP_AGGREGATIONS}
+    return _rollup(fact, ["job_no", "month_key"], aggregations)
 
 
 def build_job_total_summary(fact: pd.DataFrame, quote_task_df: pd.DataFrame) -> pd.DataFrame:
-    job_total = (
-        fact.groupby("job_no", as_index=False)
-        .agg(
-            rev_alloc=("rev_alloc", "sum"),
-            actual_cost=("actual_cost", "sum"),
-            actual_hours=("actual_hours", "sum"),
-            billable_hours=("billable_hours", "sum"),
-            onshore_hours=("onshore_hours", "sum"),
-            unallocated_revenue=("rev_alloc", lambda s: s[fact.loc[s.index, "is_unallocated_row"]].sum()),
-            unquoted_hours=("actual_hours", lambda s: s[fact.loc[s.index, "is_unquoted_task"]].sum()),
-            dept_mismatch_hours=("actual_hours", lambda s: s[fact.loc[s.index, "dept_mismatch"]].sum()),
-        )
-    )
-    job_total["gp"] = job_total["rev_alloc"] - job_total["actual_cost"]
-    job_total["margin"] = np.where(job_total["rev_alloc"] > 0, job_total["gp"] / job_total["rev_alloc"], 0.0)
-    job_total["rev_per_hour"] = np.where(job_total["actual_hours"] > 0, job_total["rev_alloc"] / job_total["actual_hours"], 0.0)
-    job_total["cost_per_hour"] = np.where(job_total["actual_hours"] > 0, job_total["actual_cost"] / job_total["actual_hours"], 0.0)
-    job_total["unquoted_share"] = np.where(job_total["actual_hours"] > 0, job_total["unquoted_hours"] / job_total["actual_hours"], 0.0)
-    job_total["dept_mismatch_share"] = np.where(job_total["actual_hours"] > 0, job_total["dept_mismatch_hours"] / job_total["actual_hours"], 0.0)
-    job_total["billable_share"] = np.where(job_total["actual_hours"] > 0, job_total["billable_hours"] / job_total["actual_hours"], 0.0)
-    job_total["onshore_share"] = np.where(job_total["actual_hours"] > 0, job_total["onshore_hours"] / job_total["actual_hours"], 0.0)
+    job_total = _rollup(fact, ["job_no"], ROLLUP_AGGREGATIONS)
 
     quote_totals = quote_task_df.groupby("job_no", as_index=False).agg(
         quoted_time_total=("quoted_time", "sum"),
         quoted_amount_total=("quoted_amount", "sum"),
-        Client=("Client", "first"),
-        Job_Name=("Job_Name", "first"),
-    )
+    ).merge(job_labels(quote_task_df, {"Client": "Client", "Job_Name": "Job_Name"}, "quoted_time"), on="job_no", how="left")
     job_total = job_total.merge(quote_totals, on="job_no", how="left")
     job_total["quote_attainment_total"] = np.where(
         job_total["quoted_time_total"] > 0,
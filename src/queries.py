@@ -0,0 +1,246 @@
+import inspect
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.fact_dataset import FACT_DATASET_DIR
+from src.io import ARTIFACT_FILES
+
+QUERY_BACKENDS = ["pandas", "duckdb"]
+UNALLOCATED_TASK = "__UNALLOCATED__"
+
+
+def query_backend(settings: Dict) -> str:
+    backend = settings.get("app", {}).get("query_backend", "pandas")
+    if backend not in QUERY_BACKENDS:
+        raise ValueError(f"Unknown app.query_backend '{backend}'; expected one of {QUERY_BACKENDS}")
+    return backend
+
+
+def connect_duckdb(processed_dir: str, settings: Optional[Dict] = None):
+    """In-memory DuckDB database with a view over every processed Parquet artifact.
+
+    The views read the files in place, so queries stream row groups instead of
+    holding the artifacts in memory; ``duckdb.memory_limit`` caps the working
+    set and larger aggregations spill to ``duckdb.temp_directory``.
+    """
+    import duckdb
+
+    config = {key: value for key, value in (settings or {}).get("duckdb", {}).items() if value is not None}
+    connection = duckdb.connect(":memory:", config=config)
+    for name, filename in ARTIFACT_FILES.items():
+        path = os.path.join(processed_dir, filename)
+        if name == "fact" and os.path.isdir(os.path.join(processed_dir, FACT_DATASET_DIR)):
+            path = os.path.join(processed_dir, FACT_DATASET_DIR, "**", "*.parquet")
+        elif not os.path.exists(path):
+            continue
+        quoted = path.replace("'", "''")
+        connection.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet('{quoted}', hive_partitioning = true)")
+    return connection
+
+
+def filter_fact_flags(fact: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """Fact rows passing the sidebar toggles (unallocated, mismatches, billable, onshore)."""
+    if not filters["include_unallocated"]:
+        fact = fact[fact["task_name"] != UNALLOCATED_TASK]
+    if filters["show_mismatches"]:
+        fact = fact[fact["dept_mismatch"] == True]
+    if filters["billable_only"]:
+        fact = fact[fact["billable_hours"] > 0]
+    if filters["onshore_only"]:
+        fact = fact[fact["onshore_hours"] > 0]
+    return fact
+
+
+def filter_fact(fact: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """Fact rows the sidebar filters select, as ``fact_where`` selects them in SQL."""
+    fact = fact[(fact["month_key"] >= filters["start"]) & (fact["month_key"] <= filters["end"])]
+    if filters["dept"] != "ALL":
+        fact = fact[fact["Department_reporting"] == filters["dept"]]
+    if filters["product"] != "ALL":
+        fact = fact[fact["Product"] == filters["product"]]
+    return filter_fact_flags(fact, filters)
+
+
+def fact_where(filters: Optional[dict], job_no: Optional[str] = None) -> Tuple[str, Dict]:
+    """SQL predicate and named parameters for the sidebar filters (all rows when None)."""
+    clauses, params = [], {}
+    if filters is not None:
+        clauses.append("month_key BETWEEN $filter_start AND $filter_end")
+        params["filter_start"] = pd.Timestamp(filters["start"]).to_pydatetime()
+        params["filter_end"] = pd.Timestamp(filters["end"]).to_pydatetime()
+        if filters["dept"] != "ALL":
+            clauses.append("Department_reporting = $filter_dept")
+            params["filter_dept"] = filters["dept"]
+        if filters["product"] != "ALL":
+            clauses.append("Product = $filter_product")
+            params["filter_product"] = filters["product"]
+        if not filters["include_unallocated"]:
+            clauses.append(f"task_name IS DISTINCT FROM '{UNALLOCATED_TASK}'")
+        if filters["show_mismatches"]:
+            clauses.append("dept_mismatch")
+        if filters["billable_only"]:
+            clauses.append("billable_hours > 0")
+        if filters["onshore_only"]:
+            clauses.append("onshore_hours > 0")
+    if job_no is not None:
+        clauses.append("job_no = $filter_job_no")
+        params["filter_job_no"] = job_no
+    return " AND ".join(clauses) or "TRUE", params
+
+
+def run_sql(connection, sql: str, filters: Optional[dict] = None, job_no: Optional[str] = None, **params) -> pd.DataFrame:
+    """Run ``sql`` with its ``{where}`` placeholder bound to the sidebar filters."""
+    where, bound = fact_where(filters, job_no)
+    bound.update(params)
+    return connection.execute(sql.format(where=where), bound).df()
+
+
+def _scope(fact: pd.DataFrame, job_no: Optional[str]) -> pd.DataFrame:
+    return fact if job_no is None else fact[fact["job_no"] == job_no]
+
+
+def _task_gp(fact: pd.DataFrame, job_no: Optional[str] = None, limit: int = 10) -> pd.DataFrame:
+    tasks = _scope(fact, job_no).groupby("task_name", as_index=False, observed=True).agg(
+        gp=("gp", "sum"),
+        actual_hours=("actual_hours", "sum"),
+        actual_cost=("actual_cost", "sum"),
+    )
+    return tasks.sort_values("gp", kind="mergesort").head(limit).reset_index(drop=True)
+
+
+def _role_hours(fact: pd.DataFrame, job_no: Optional[str] = None, limit: int = 10) -> pd.DataFrame:
+    roles = _scope(fact, job_no).groupby("Role_top", as_index=False, observed=True).agg(
+        hours=("actual_hours", "sum"),
+        gp=("gp", "sum"),
+    )
+    return roles.sort_values("hours", ascending=False, kind="mergesort").head(limit).reset_index(drop=True)
+
+
+def _scope_jobs(fact: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({"job_no": sorted(fact["job_no"].dropna().unique().tolist())})
+
+
+def _task_points(fact: pd.DataFrame, job_no: Optional[str] = None) -> pd.DataFrame:
+    return _scope(fact, job_no)[["task_name", "actual_hours", "gp", "dept_match_status"]].reset_index(drop=True)
+
+
+def _dept_mismatch_counts(fact: pd.DataFrame) -> pd.DataFrame:
+    keys = fact[["Department_actual", "Department_quote"]].astype(object)
+    return keys.groupby(["Department_actual", "Department_quote"]).size().rename("rows").reset_index()
+
+
+def _coverage(fact: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame([{
+        "Missing Department Actual": int((fact["Department_actual"].fillna("") == "").sum()),
+        "Missing Department Quote": int((fact["Department_quote"].fillna("") == "").sum()),
+        "Unquoted Tasks": int(fact["is_unquoted_task"].sum()),
+        "Quote-Only Tasks": int(fact["is_quote_only_task"].sum()),
+        "Unallocated Rows": int(fact["is_unallocated_row"].sum()),
+    }])
+
+
+def _segment_jobs(fact: pd.DataFrame, dept: str, product: str, limit: int = 10) -> pd.DataFrame:
+    segment = fact[(fact["Department_reporting"] == dept) & (fact["Product"] == product)]
+    jobs = segment.groupby("job_no", as_index=False, observed=True).agg(
+        gp=("gp", "sum"),
+        rev_alloc=("rev_alloc", "sum"),
+        actual_cost=("actual_cost", "sum"),
+    )
+    jobs["margin"] = np.where(jobs["rev_alloc"] > 0, (jobs["gp"] / jobs["rev_alloc"]) * 100, 0.0)
+    return jobs.sort_values("margin", ascending=False, kind="mergesort").head(limit).reset_index(drop=True)
+
+
+def _job_rollup(fact: pd.DataFrame) -> pd.DataFrame:
+    jobs = fact.groupby("job_no", as_index=False, observed=True).agg(
+        rev_alloc=("rev_alloc", "sum"),
+        actual_cost=("actual_cost", "sum"),
+        gp=("gp", "sum"),
+    )
+    jobs["margin"] = np.where(jobs["rev_alloc"] > 0, (jobs["gp"] / jobs["rev_alloc"]) * 100, 0.0)
+    return jobs
+
+
+def _top_gp_jobs(fact: pd.DataFrame, limit: int = 10) -> pd.DataFrame:
+    jobs = _job_rollup(fact)
+    return jobs.sort_values("gp", ascending=False, kind="mergesort").head(limit).reset_index(drop=True)
+
+
+def _bottom_margin_jobs(fact: pd.DataFrame, limit: int = 10) -> pd.DataFrame:
+    jobs = _job_rollup(fact)
+    return jobs.sort_values("margin", kind="mergesort").head(limit).reset_index(drop=True)
+
+
+JOB_ROLLUP_SQL = """
+    SELECT job_no, rev_alloc, actual_cost, gp, CASE WHEN rev_alloc > 0 THEN gp / rev_alloc * 100 ELSE 0.0 END AS margin
+    FROM (
+        SELECT job_no, sum(rev_alloc) AS rev_alloc, sum(actual_cost) AS actual_cost, sum(gp) AS gp
+        FROM fact WHERE {where} AND job_no IS NOT NULL
+        GROUP BY job_no
+    )
+"""
+
+# Page aggregations over the filtered fact: name -> (pandas implementation,
+# DuckDB SQL). Both orderings break ties on the group key so limits agree.
+FACT_QUERIES = {
+    "task_gp": (_task_gp, """
+        SELECT task_name, sum(gp) AS gp, sum(actual_hours) AS actual_hours, sum(actual_cost) AS actual_cost
+        FROM fact WHERE {where} AND task_name IS NOT NULL
+        GROUP BY task_name ORDER BY gp, task_name LIMIT $limit
+    """),
+    "role_hours": (_role_hours, """
+        SELECT Role_top, sum(actual_hours) AS hours, sum(gp) AS gp
+        FROM fact WHERE {where} AND Role_top IS NOT NULL
+        GROUP BY Role_top ORDER BY hours DESC, Role_top LIMIT $limit
+    """),
+    "scope_jobs": (_scope_jobs, """
+        SELECT DISTINCT job_no FROM fact WHERE {where} AND job_no IS NOT NULL ORDER BY job_no
+    """),
+    "task_points": (_task_points, """
+        SELECT task_name, actual_hours, gp, dept_match_status FROM fact WHERE {where}
+    """),
+    "dept_mismatch_counts": (_dept_mismatch_counts, """
+        SELECT Department_actual, Department_quote, count(*) AS rows
+        FROM fact WHERE {where} AND Department_actual IS NOT NULL AND Department_quote IS NOT NULL
+        GROUP BY ALL ORDER BY ALL
+    """),
+    "coverage": (_coverage, """
+        SELECT
+            count(*) FILTER (WHERE coalesce(Department_actual, '') = '') AS "Missing Department Actual",
+            count(*) FILTER (WHERE coalesce(Department_quote, '') = '') AS "Missing Department Quote",
+            count(*) FILTER (WHERE is_unquoted_task) AS "Unquoted Tasks",
+            count(*) FILTER (WHERE is_quote_only_task) AS "Quote-Only Tasks",
+            count(*) FILTER (WHERE is_unallocated_row) AS "Unallocated Rows"
+        FROM fact WHERE {where}
+    """),
+    "segment_jobs": (_segment_jobs, """
+        SELECT job_no, gp, rev_alloc, actual_cost, CASE WHEN rev_alloc > 0 THEN gp / rev_alloc * 100 ELSE 0.0 END AS margin
+        FROM (
+            SELECT job_no, sum(gp) AS gp, sum(rev_alloc) AS rev_alloc, sum(actual_cost) AS actual_cost
+            FROM fact WHERE {where} AND Department_reporting = $dept AND Product = $product AND job_no IS NOT NULL
+            GROUP BY job_no
+        )
+        ORDER BY margin DESC, job_no LIMIT $limit
+    """),
+    "top_gp_jobs": (_top_gp_jobs, JOB_ROLLUP_SQL + "ORDER BY gp DESC, job_no LIMIT $limit"),
+    "bottom_margin_jobs": (_bottom_margin_jobs, JOB_ROLLUP_SQL + "ORDER BY margin, job_no LIMIT $limit"),
+}
+
+
+def fact_query(name: str, fact: pd.DataFrame, **params) -> pd.DataFrame:
+    """Run a FACT_QUERIES aggregation on an already filtered fact frame."""
+    return FACT_QUERIES[name][0](fact, **params)
+
+
+def fact_query_sql(connection, name: str, filters: dict, **params) -> pd.DataFrame:
+    """Run a FACT_QUERIES aggregation in DuckDB, filtering fact in the same statement."""
+    func, sql = FACT_QUERIES[name]
+    job_no = params.pop("job_no", None)
+    defaults = {
+        key: parameter.default
+        for key, parameter in inspect.signature(func).parameters.items()
+        if parameter.default is not inspect.Parameter.empty and key != "job_no"
+    }
+    return run_sql(connection, sql, filters, job_no, **{**defaults, **params})
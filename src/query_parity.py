@@ -0,0 +1,132 @@
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.financial_engine import FinancialEngine
+from src.analytics.variance_engine import VarianceEngine
+from src.io import ARTIFACT_FILES, read_parquet
+from src.queries import FACT_QUERIES, connect_duckdb, fact_query, fact_query_sql, filter_fact
+from src.schema import decode_schema
+
+# Rows come back in file order, which the backends do not share.
+UNORDERED_QUERIES = {"task_points"}
+JOB_QUERIES = {"task_gp", "role_hours", "task_points"}
+
+
+def filter_cases(fact: pd.DataFrame) -> Iterator[Tuple[str, dict]]:
+    """Sidebar filter combinations to compare the backends under, as (label, filters)."""
+    months = fact["month_key"].dropna()
+    base = {
+        "start": months.min(),
+        "end": months.max(),
+        "dept": "ALL",
+        "product": "ALL",
+        "include_unallocated": True,
+        "show_mismatches": False,
+        "billable_only": False,
+        "onshore_only": False,
+    }
+    yield "all", base
+    yield "no unallocated", {**base, "include_unallocated": False}
+    yield "mismatches", {**base, "show_mismatches": True}
+    yield "billable onshore", {**base, "billable_only": True, "onshore_only": True}
+    yield "last 3 months", {**base, "start": months.max() - pd.DateOffset(months=2)}
+    for dept in fact["Department_reporting"].dropna().astype(str).unique()[:3]:
+        yield f"dept {dept}", {**base, "dept": dept}
+    segment = fact[["Department_reporting", "Product"]].dropna().astype(str).drop_duplicates().head(1)
+    for dept, product in segment.itertuples(index=False):
+        yield f"segment {dept}/{product}", {**base, "dept": dept, "product": product}
+
+
+def normalise(df: pd.DataFrame, unordered: bool = False) -> pd.DataFrame:
+    df = df.reset_index(drop=True)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype) or df[col].dtype == object:
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+        elif pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].astype("datetime64[ns]")
+    if unordered:
+        df = df.sort_values(list(df.columns), kind="mergesort", na_position="last").reset_index(drop=True)
+    return df
+
+
+def frame_diff(expected: pd.DataFrame, actual: pd.DataFrame, rtol: float = 1e-9) -> str:
+    """First difference between two normalised frames ("" when they match)."""
+    if list(expected.columns) != list(actual.columns):
+        return f"columns {list(expected.columns)} != {list(actual.columns)}"
+    if len(expected) != len(actual):
+        return f"{len(expected)} rows != {len(actual)} rows"
+    for col in expected.columns:
+        left, right = expected[col], actual[col]
+        if pd.api.types.is_numeric_dtype(left) and pd.api.types.is_numeric_dtype(right):
+            same = np.isclose(left.to_numpy(dtype=float), right.to_numpy(dtype=float), rtol=rtol, atol=1e-9, equal_nan=True)
+        else:
+            same = (left == right) | (left.isna() & right.isna())
+        if not np.all(same):
+            row = int(np.argmin(same))
+            return f"column {col} row {row}: {left.iloc[row]!r} != {right.iloc[row]!r}"
+    return ""
+
+
+def read_fact(processed_dir: str) -> pd.DataFrame:
+    fact = decode_schema(read_parquet(os.path.join(processed_dir, ARTIFACT_FILES["fact"])))
+    fact["month_key"] = pd.to_datetime(fact["month_key"])
+    return fact
+
+
+def query_calls(name: str, filtered: pd.DataFrame) -> List[Dict]:
+    """Parameter sets to run FACT_QUERIES ``name`` with on one filtered fact."""
+    if name == "segment_jobs":
+        segments = filtered[["Department_reporting", "Product"]].dropna().astype(str).drop_duplicates().head(2)
+        return [{"dept": dept, "product": product} for dept, product in segments.itertuples(index=False)]
+    calls = [{}]
+    if name in JOB_QUERIES and filtered["job_no"].notna().any():
+        calls.append({"job_no": filtered["job_no"].dropna().iloc[0]})
+    return calls
+
+
+def query_results(fact: pd.DataFrame, connection, filters: dict) -> Iterator[Tuple[str, pd.DataFrame, pd.DataFrame]]:
+    """(label, pandas result, DuckDB result) for every FACT_QUERIES call under ``filters``."""
+    filtered = filter_fact(fact, filters)
+    for name in FACT_QUERIES:
+        unordered = name in UNORDERED_QUERIES
+        for params in query_calls(name, filtered):
+            expected = fact_query(name, filtered, **params)
+            actual = fact_query_sql(connection, name, filters, **params)
+            yield f"{name} {params}", normalise(expected, unordered), normalise(actual, unordered)
+
+
+def engine_results(fact: pd.DataFrame, connection, filters: Optional[dict] = None, jobs: int = 5) -> Iterator[Tuple[str, pd.DataFrame, pd.DataFrame]]:
+    """(label, pandas result, DuckDB result) for the FinancialEngine and VarianceEngine rollups."""
+    scoped = fact if filters is None else filter_fact(fact, filters)
+    pandas_financial, sql_financial = FinancialEngine(scoped), FinancialEngine(connection=connection, filters=filters)
+    pandas_variance, sql_variance = VarianceEngine(scoped), VarianceEngine(connection=connection, filters=filters)
+    results = {
+        "FinancialEngine.get_kpis": (pd.DataFrame([pandas_financial.get_kpis()]), pd.DataFrame([sql_financial.get_kpis()])),
+        "FinancialEngine.get_monthly_trend": (pandas_financial.get_monthly_trend(), sql_financial.get_monthly_trend()),
+        "VarianceEngine.get_problem_jobs": (pandas_variance.get_problem_jobs(), sql_variance.get_problem_jobs()),
+    }
+    for job_no in scoped["job_no"].dropna().unique()[:jobs]:
+        results[f"VarianceEngine.get_job_diagnosis({job_no})"] = (
+            pandas_variance.get_job_diagnosis(job_no),
+            sql_variance.get_job_diagnosis(job_no),
+        )
+    for label, (expected, actual) in results.items():
+        yield label, normalise(expected), normalise(actual)
+
+
+def parity_report(processed_dir: str, settings: Optional[Dict] = None, rtol: float = 1e-9) -> Tuple[int, List[str]]:
+    """Compare both backends over a processed snapshot's DuckDB views; returns (checks, failure messages)."""
+    fact = read_fact(processed_dir)
+    connection = connect_duckdb(processed_dir, settings)
+    checks, failures = 0, []
+    for label, filters in filter_cases(fact):
+        results = list(query_results(fact, connection, filters)) + list(engine_results(fact, connection, filters))
+        for name, expected, actual in results:
+            checks += 1
+            diff = frame_diff(expected, actual, rtol)
+            if diff:
+                failures.append(f"{name} [{label}]: {diff}")
+    return checks, failures
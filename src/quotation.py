@@ -1,6 +1,6 @@
 import pandas as pd
 
-from src.clean import map_departments, map_task_names, standardize_keys
+from src.clean import map_departments, map_task_names, normalize_series, standardize_keys
 from src.utils import normalize_text, to_month_key
 
 
@@ -15,11 +15,11 @@ def build_quote_task(df: pd.DataFrame) -> pd.DataFrame:
     data = map_departments(data, "Department")
     data["Department_quote"] = data["Department"]
 
-    data["Product"] = data.get("Product").map(normalize_text)
-    data["Client"] = data.get("[Job] Client").map(normalize_text)
-    data["Job_Category"] = data.get("[Job] Category").map(normalize_text)
-    data["Job_Status"] = data.get("[Job] Status").map(normalize_text)
-    data["Job_Name"] = data.get("[Job] Name").map(normalize_text)
+    data["Product"] = normalize_series(data["Product"], normalize_text)
+    data["Client"] = normalize_series(data["[Job] Client"], normalize_text)
+    data["Job_Category"] = normalize_series(data["[Job] Category"], normalize_text)
+    data["Job_Status"] = normalize_series(data["[Job] Status"], normalize_text)
+    data["Job_Name"] = normalize_series(data["[Job] Name"], normalize_text)
 
     start_date = data.get("[Job Task] Start Date").fillna(data.get("[Job] Start Date"))
     due_date = data.get("[Job Task] Due Date").fillna(data.get("[Job] Due Date"))
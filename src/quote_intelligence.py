@@ -2,20 +2,27 @@ import json
 import numpy as np
 import pandas as pd
 
-from src.utils import parse_period_label, read_settings
+from src.sketches import DEFAULT_RELATIVE_ACCURACY, sketch_buckets, sketch_quantiles
+from src.utils import grouped_quantiles, parse_period_label, read_settings
 
+# Always in the catalog; the Smart Quote Generator's conservative policy quotes p75.
+BASE_HOURS_QUANTILES = [0.75, 0.9]
 
-def _percentile(series: pd.Series, q: float) -> float:
-    if series.empty:
-        return 0.0
-    return float(np.percentile(series, q))
+SKETCH_KEYS = ["dept", "Product", "month_key", "task_name"]
+# Sketched job-level task measure -> job_task_frame column.
+SKETCH_MEASURES = {"hours": "actual_hours", "cost_per_hour": "cost_per_hour", "rev_per_hour": "rev_per_hour"}
 
 
-def build_task_catalog(fact: pd.DataFrame, period_start=None, period_end=None) -> pd.DataFrame:
-    settings = read_settings()
-    weights = settings.get("smart_quote", {}).get("risk_weights", {})
-    coverage_target = settings.get("smart_quote", {}).get("coverage_target", 0.8)
+def hours_quantile_column(q: float) -> str:
+    return f"hours_per_job_p{q * 100:g}"
 
+
+def hours_quantiles(settings: dict) -> list:
+    return sorted(set(settings.get("smart_quote", {}).get("hours_quantiles", [])) | set(BASE_HOURS_QUANTILES))
+
+
+def job_task_frame(fact: pd.DataFrame, period_start=None, period_end=None) -> pd.DataFrame:
+    """One row per (job, dept, Product, task) with the hours, cost, revenue and flags the catalog summarises."""
     df = fact.copy()
     df = df[df["task_name"] != "__UNALLOCATED__"]
     if period_start is not None:
@@ -34,31 +41,18 @@ def build_task_catalog(fact: pd.DataFrame, period_start=None, period_end=None) -
             actual_cost=("actual_cost", "sum"),
             rev_alloc=("rev_alloc", "sum"),
             dept_mismatch=("dept_mismatch", "max"),
+            month_key=("month_key", "max"),
         )
     )
     job_task["cost_per_hour"] = np.where(job_task["actual_hours"] > 0, job_task["actual_cost"] / job_task["actual_hours"], 0.0)
     job_task["rev_per_hour"] = np.where(job_task["actual_hours"] > 0, job_task["rev_alloc"] / job_task["actual_hours"], 0.0)
     job_task["overrun_flag"] = job_task["actual_hours"] > job_task["quoted_time"].fillna(0.0)
     job_task["unquoted_flag"] = (job_task["quoted_time"].fillna(0.0) == 0) & (job_task["actual_hours"] > 0)
+    return job_task
 
-    total_jobs = job_task.groupby(["dept", "Product"], as_index=False)["job_no"].nunique().rename(columns={"job_no": "job_count"})
 
-    catalog = (
-        job_task.groupby(["dept", "Product", "task_name"], as_index=False)
-        .agg(
-            task_freq_jobs=("job_no", "nunique"),
-            hours_per_job_median=("actual_hours", "median"),
-            hours_per_job_mean=("actual_hours", "mean"),
-            hours_per_job_p75=("actual_hours", lambda s: _percentile(s, 75)),
-            hours_per_job_p90=("actual_hours", lambda s: _percentile(s, 90)),
-            cost_per_hour_median=("cost_per_hour", "median"),
-            rev_per_hour_median=("rev_per_hour", "median"),
-            overrun_rate=("overrun_flag", "mean"),
-            unquoted_rate=("unquoted_flag", "mean"),
-            dept_mismatch_rate=("dept_mismatch", "mean"),
-            volatility=("actual_hours", lambda s: float(np.std(s)) / float(np.mean(s)) if np.mean(s) else 0.0),
-        )
-    )
+def _score_catalog(catalog: pd.DataFrame, total_jobs: pd.DataFrame, settings: dict, period_start, period_end) -> pd.DataFrame:
+    weights = settings.get("smart_quote", {}).get("risk_weights", {})
     catalog = catalog.merge(total_jobs, on=["dept", "Product"], how="left")
     catalog["task_freq_share"] = np.where(catalog["job_count"] > 0, catalog["task_freq_jobs"] / catalog["job_count"], 0.0)
 
@@ -75,37 +69,218 @@ def build_task_catalog(fact: pd.DataFrame, period_start=None, period_end=None) -
     return catalog
 
 
-def build_job_template_library(fact: pd.DataFrame, period_start=None, period_end=None) -> pd.DataFrame:
+def build_task_catalog(fact: pd.DataFrame, period_start=None, period_end=None) -> pd.DataFrame:
     settings = read_settings()
-    coverage_target = settings.get("smart_quote", {}).get("coverage_target", 0.8)
+    job_task = job_task_frame(fact, period_start, period_end)
 
-    catalog = build_task_catalog(fact, period_start, period_end)
-    templates = []
+    total_jobs = job_task.groupby(["dept", "Product"], as_index=False)["job_no"].nunique().rename(columns={"job_no": "job_count"})
 
-    for (dept, product), group in catalog.groupby(["dept", "Product"]):
-        group = group.sort_values("task_freq_share", ascending=False)
-        group["cum_share"] = group["task_freq_share"].cumsum()
-        recommended = group[group["cum_share"] <= coverage_target]
-        if recommended.empty:
-            recommended = group.head(5)
+    grouper = job_task.groupby(["dept", "Product", "task_name"], as_index=False)
+    catalog = grouper.agg(
+        task_freq_jobs=("job_no", "nunique"),
+        hours_per_job_median=("actual_hours", "median"),
+        hours_per_job_mean=("actual_hours", "mean"),
+        cost_per_hour_median=("cost_per_hour", "median"),
+        rev_per_hour_median=("rev_per_hour", "median"),
+        overrun_rate=("overrun_flag", "mean"),
+        unquoted_rate=("unquoted_flag", "mean"),
+        dept_mismatch_rate=("dept_mismatch", "mean"),
+    )
+
+    # Quantiles and volatility (population std / mean) from one sort of the
+    # job-level hours; rows with a missing key belong to no group.
+    group_ids = grouper.ngroup()
+    in_group = group_ids.notna().to_numpy()
+    group_ids = group_ids[in_group].to_numpy(dtype=np.intp)
+    hours = job_task["actual_hours"].to_numpy(dtype=float)[in_group]
+    quantiles = hours_quantiles(settings)
+    hour_quantiles = grouped_quantiles(hours, group_ids, len(catalog), quantiles)
+    for position, q in enumerate(quantiles):
+        catalog.insert(catalog.columns.get_loc("hours_per_job_mean") + 1 + position, hours_quantile_column(q), hour_quantiles[:, position])
+
+    counts = np.bincount(group_ids, minlength=len(catalog))
+    mean = np.bincount(group_ids, weights=hours, minlength=len(catalog)) / counts
+    std = np.sqrt(np.bincount(group_ids, weights=(hours - mean[group_ids]) ** 2, minlength=len(catalog)) / counts)
+    catalog["volatility"] = np.divide(std, mean, out=np.zeros_like(std), where=mean != 0)
+
+    return _score_catalog(catalog, total_jobs, settings, period_start, period_end)
+
+
+def _sketch_accuracy(settings: dict) -> float:
+    return settings.get("smart_quote", {}).get("sketch_relative_accuracy", DEFAULT_RELATIVE_ACCURACY)
+
+
+def _dated_job_tasks(fact: pd.DataFrame) -> pd.DataFrame:
+    """job_task_frame over the whole fact, with every job's tasks in a segment dated to the job's last month there.
+
+    Dating the whole job to one month keeps job counts additive across months
+    and leaves each job-task sample at its full hours.
+    """
+    job_task = job_task_frame(fact)
+    job_task["month_key"] = job_task.groupby(["job_no", "dept", "Product"])["month_key"].transform("max")
+    return job_task
+
+
+def build_task_month_stats(fact: pd.DataFrame) -> pd.DataFrame:
+    """Additive per-(dept, Product, month, task) counts and sums behind the task catalog.
+
+    ``segment_jobs`` is the segment's job count for the month, repeated on each of its task rows.
+    """
+    job_task = _dated_job_tasks(fact)
+    job_task["hours_sq"] = job_task["actual_hours"] ** 2
+    stats = job_task.groupby(SKETCH_KEYS, as_index=False, dropna=False).agg(
+        jobs=("job_no", "size"),
+        hours_sum=("actual_hours", "sum"),
+        hours_sumsq=("hours_sq", "sum"),
+        overrun_jobs=("overrun_flag", "sum"),
+        unquoted_jobs=("unquoted_flag", "sum"),
+        dept_mismatch_jobs=("dept_mismatch", "sum"),
+    )
+    segment_jobs = (
+        job_task.drop_duplicates(["job_no", "dept", "Product"])
+        .groupby(["dept", "Product", "month_key"], as_index=False, dropna=False)
+        .agg(segment_jobs=("job_no", "size"))
+    )
+    return stats.merge(segment_jobs, on=["dept", "Product", "month_key"], how="left")
 
-        task_list = recommended["task_name"].tolist()
 
-        job_hours = (
-            fact[(fact["Department_reporting"].fillna("") == dept) & (fact["Product"].fillna("") == product)]
-            .groupby("job_no", as_index=False)
-            .agg(total_hours=("actual_hours", "sum"))
+def build_task_sketch(fact: pd.DataFrame) -> pd.DataFrame:
+    """Quantile sketches (src/sketches.py) of job-level task hours, cost/hour and revenue/hour per (dept, Product, month, task)."""
+    accuracy = _sketch_accuracy(read_settings())
+    job_task = _dated_job_tasks(fact)
+    long = pd.concat(
+        [
+            job_task[SKETCH_KEYS].assign(measure=measure, bucket=sketch_buckets(job_task[col].to_numpy(), accuracy))
+            for measure, col in SKETCH_MEASURES.items()
+        ],
+        ignore_index=True,
+    )
+    return long.groupby(SKETCH_KEYS + ["measure", "bucket"], as_index=False, dropna=False).agg(count=("bucket", "size"))
+
+
+def _in_period(df: pd.DataFrame, period_start, period_end) -> pd.DataFrame:
+    if period_start is not None:
+        df = df[df["month_key"] >= period_start]
+    if period_end is not None:
+        df = df[df["month_key"] <= period_end]
+    return df
+
+
+def task_catalog_from_sketches(stats: pd.DataFrame, sketch: pd.DataFrame, period_start=None, period_end=None) -> pd.DataFrame:
+    """build_task_catalog's columns for any month range, merged from build_task_month_stats and build_task_sketch.
+
+    Jobs count towards the range their segment's last month falls in, at their
+    full hours. Counts, rates, means and volatility are exact for those jobs;
+    medians and quantiles are within ``smart_quote.sketch_relative_accuracy``
+    (relative) of the exact values, and 0 where the values are not positive.
+    """
+    settings = read_settings()
+    stats = _in_period(stats, period_start, period_end)
+    sketch = _in_period(sketch, period_start, period_end)
+
+    keys = ["dept", "Product", "task_name"]
+    totals = stats.groupby(keys, as_index=False, observed=True).agg(
+        task_freq_jobs=("jobs", "sum"),
+        hours_sum=("hours_sum", "sum"),
+        hours_sumsq=("hours_sumsq", "sum"),
+        overrun_jobs=("overrun_jobs", "sum"),
+        unquoted_jobs=("unquoted_jobs", "sum"),
+        dept_mismatch_jobs=("dept_mismatch_jobs", "sum"),
+    )
+    totals = totals[totals["task_freq_jobs"] > 0].reset_index(drop=True)
+    total_jobs = (
+        stats.drop_duplicates(["dept", "Product", "month_key"])
+        .groupby(["dept", "Product"], as_index=False, observed=True)
+        .agg(job_count=("segment_jobs", "sum"))
+    )
+
+    cells = sketch.merge(totals[keys].assign(group_id=np.arange(len(totals))), on=keys, how="inner")
+    quantiles = hours_quantiles(settings)
+    estimates = {}
+    for measure, measure_quantiles in [("hours", [0.5] + quantiles), ("cost_per_hour", [0.5]), ("rev_per_hour", [0.5])]:
+        rows = cells[cells["measure"] == measure]
+        estimates[measure] = sketch_quantiles(
+            rows["group_id"].to_numpy(),
+            rows["bucket"].to_numpy(),
+            rows["count"].to_numpy(),
+            len(totals),
+            measure_quantiles,
+            _sketch_accuracy(settings),
         )
-        total_hours = job_hours["total_hours"]
-
-        templates.append({
-            "dept": dept,
-            "Product": product,
-            "recommended_tasks": json.dumps(task_list),
-            "expected_hours_median": float(total_hours.median()) if not total_hours.empty else 0.0,
-            "expected_hours_p75": float(np.percentile(total_hours, 75)) if len(total_hours) else 0.0,
-            "expected_hours_p90": float(np.percentile(total_hours, 90)) if len(total_hours) else 0.0,
-            "period_label": parse_period_label(period_start, period_end),
+
+    jobs = totals["task_freq_jobs"].to_numpy(dtype=float)
+    mean = totals["hours_sum"].to_numpy() / jobs
+    std = np.sqrt(np.maximum(totals["hours_sumsq"].to_numpy() / jobs - mean ** 2, 0.0))
+    catalog = totals[keys + ["task_freq_jobs"]].assign(
+        hours_per_job_median=estimates["hours"][:, 0],
+        hours_per_job_mean=mean,
+        **{hours_quantile_column(q): estimates["hours"][:, 1 + position] for position, q in enumerate(quantiles)},
+        cost_per_hour_median=estimates["cost_per_hour"][:, 0],
+        rev_per_hour_median=estimates["rev_per_hour"][:, 0],
+        overrun_rate=totals["overrun_jobs"] / jobs,
+        unquoted_rate=totals["unquoted_jobs"] / jobs,
+        dept_mismatch_rate=totals["dept_mismatch_jobs"] / jobs,
+        volatility=np.divide(std, mean, out=np.zeros_like(std), where=mean != 0),
+    )
+    return _score_catalog(catalog, total_jobs, settings, period_start, period_end)
+
+
+def build_job_template_library(
+    fact: pd.DataFrame,
+    period_start=None,
+    period_end=None,
+    catalog: pd.DataFrame = None,
+) -> pd.DataFrame:
+    """Recommended task list and expected job hours for every (dept, Product) segment of the task catalog.
+
+    Pass ``catalog`` when build_task_catalog has already run on the same fact
+    rows and period; otherwise it is built here.
+    """
+    settings = read_settings()
+    coverage_target = settings.get("smart_quote", {}).get("coverage_target", 0.8)
+
+    if catalog is None:
+        catalog = build_task_catalog(fact, period_start, period_end)
+    if catalog.empty:
+        return pd.DataFrame()
+
+    # Within each segment, tasks by descending job share (ties in task order)
+    # until the cumulative share passes the coverage target, or the top five
+    # when the first task alone passes it.
+    tasks = catalog[["dept", "Product", "task_name", "task_freq_share"]].sort_values(
+        ["dept", "Product", "task_freq_share", "task_name"],
+        ascending=[True, True, False, True],
+        kind="mergesort",
+    )
+    segment_ids = tasks.groupby(["dept", "Product"], sort=True).ngroup().to_numpy()
+    segments = tasks.groupby(["dept", "Product"], as_index=False, sort=True).size()[["dept", "Product"]]
+    covered = (tasks.groupby(segment_ids)["task_freq_share"].cumsum() <= coverage_target).to_numpy()
+    any_covered = np.bincount(segment_ids, weights=covered, minlength=len(segments)) > 0
+    rank = tasks.groupby(segment_ids).cumcount().to_numpy()
+    selected = covered | (~any_covered[segment_ids] & (rank < 5))
+    task_lists = tasks["task_name"][selected].groupby(segment_ids[selected]).agg(list)
+
+    # Job totals over all of a job's rows in the segment it reports under, matched to catalog segments.
+    job_hours = (
+        pd.DataFrame({
+            "dept": fact["Department_reporting"].fillna(""),
+            "Product": fact["Product"].fillna(""),
+            "job_no": fact["job_no"],
+            "actual_hours": fact["actual_hours"],
         })
+        .groupby(["dept", "Product", "job_no"], as_index=False)
+        .agg(total_hours=("actual_hours", "sum"))
+        .merge(segments.assign(segment_id=np.arange(len(segments))), on=["dept", "Product"], how="inner")
+    )
+    job_segment_ids = job_hours["segment_id"].to_numpy()
+    total_hours = job_hours["total_hours"].to_numpy(dtype=float)
+    median = job_hours.groupby("segment_id")["total_hours"].median().reindex(range(len(segments)), fill_value=0.0)
+    percentiles = grouped_quantiles(total_hours, job_segment_ids, len(segments), [0.75, 0.9])
 
-    return pd.DataFrame(templates)
+    return segments.assign(
+        recommended_tasks=[json.dumps(task_list) for task_list in task_lists.reindex(range(len(segments)))],
+        expected_hours_median=median.to_numpy(dtype=float),
+        expected_hours_p75=percentiles[:, 0],
+        expected_hours_p90=percentiles[:, 1],
+        period_label=parse_period_label(period_start, period_end),
+    )
@@ -1,6 +1,7 @@
 import pandas as pd
 
-from src.utils import normalize_job_no, normalize_text, to_month_key
+from src.clean import normalize_series
+from src.utils import map_unique, normalize_job_no, normalize_text, to_month_key
 
 
 def is_truthy_excluded(value: object) -> bool:
@@ -10,9 +11,9 @@ def is_truthy_excluded(value: object) -> bool:
 
 def build_revenue_monthly(df: pd.DataFrame) -> pd.DataFrame:
     data = df.copy()
-    data["job_no"] = data["Job Number"].map(normalize_job_no)
+    data["job_no"] = normalize_series(data["Job Number"], normalize_job_no)
     data["month_key"] = to_month_key(data["Month"])
-    data["excluded_flag"] = data["Excluded"].map(is_truthy_excluded)
+    data["excluded_flag"] = map_unique(data["Excluded"], is_truthy_excluded)
     data["amount"] = pd.to_numeric(data["Amount"], errors="coerce").fillna(0.0)
 
     data = data[~data["excluded_flag"]]
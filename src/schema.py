@@ -0,0 +1,148 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from src.io import write_parquet
+from src.utils import setup_logger, write_json
+
+CATEGORIES_FILE = "categories.json"
+
+# Low-cardinality string columns, grouped by the value domain they draw from.
+# Columns in the same domain share one category set when artifacts are loaded,
+# so comparisons, merges and isin between them stay on integer codes.
+CATEGORY_DOMAINS = {
+    "job_no": ["job_no"],
+    "task_name": ["task_name"],
+    "department": ["Department_actual", "Department_actual_top", "Department_quote", "Department_reporting", "dept"],
+    "product": ["Product"],
+    "client": ["Client"],
+    "role": ["Role_top"],
+    "category": ["[Category] Category_top"],
+    "deliverable": ["Deliverable_top"],
+    "function": ["Function_top"],
+    "job_category": ["Job_Category"],
+    "job_status": ["Job_Status"],
+    "fy": ["FY"],
+    "period_label": ["period_label"],
+    "dept_match_status": ["dept_match_status"],
+    "measure": ["measure"],
+}
+CATEGORICAL_COLUMNS = {col: domain for domain, cols in CATEGORY_DOMAINS.items() for col in cols}
+
+BOOL_COLUMNS = ["is_unallocated_row", "is_unquoted_task", "is_quote_only_task", "dept_mismatch"]
+INT8_COLUMNS = ["mixed_department"]
+# 0/1 flags that are missing for quote-only rows.
+NULLABLE_INT8_COLUMNS = [
+    "Department_actual_mixed",
+    "Role_mixed",
+    "[Category] Category_mixed",
+    "Deliverable_mixed",
+    "Function_mixed",
+]
+# Loaded as datetime64; artifacts store them as timestamps, older outputs may hold text.
+DATETIME_COLUMNS = ["month_key"]
+
+
+def _plain(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(series.cat.categories.dtype)
+    return series
+
+
+def _categorical(series: pd.Series, categories: List[str]) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.set_categories(categories, ordered=True)
+    return pd.Series(
+        pd.Categorical(_plain(series), categories=categories, ordered=True),
+        index=series.index,
+        name=series.name,
+    )
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Encode declared columns as ordered categoricals and downcast flags.
+
+    Categories are the sorted distinct values, so the encoding depends only on
+    the values (min/max/sort keep string semantics) and Parquet output stays
+    deterministic.
+    """
+    df = df.copy()
+    for col in df.columns.intersection(list(CATEGORICAL_COLUMNS)):
+        values = _plain(df[col])
+        df[col] = _categorical(values, sorted(values.dropna().unique()))
+    for col in df.columns.intersection(BOOL_COLUMNS):
+        df[col] = df[col].astype(bool)
+    for col in df.columns.intersection(INT8_COLUMNS):
+        df[col] = df[col].astype("int8")
+    for col in df.columns.intersection(NULLABLE_INT8_COLUMNS):
+        df[col] = df[col].astype("Int8")
+    return df
+
+
+def decode_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Inverse of apply_schema: the plain dtypes the build steps produce and expect."""
+    df = df.copy()
+    for col in df.columns.intersection(list(CATEGORICAL_COLUMNS)):
+        df[col] = _plain(df[col])
+    for col in df.columns.intersection(INT8_COLUMNS):
+        df[col] = df[col].astype("int64")
+    for col in df.columns.intersection(NULLABLE_INT8_COLUMNS):
+        df[col] = df[col].astype("float64")
+    return df
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(index=True, deep=True).sum() / 1e6
+
+
+def write_artifact(df: pd.DataFrame, path: str) -> None:
+    """Write ``df`` with the declared schema and log the in-memory saving."""
+    encoded = apply_schema(df)
+    before, after = memory_mb(df), memory_mb(encoded)
+    setup_logger().info(
+        "Schema for %s: %.2f MB -> %.2f MB in memory (%.0f%% saved)",
+        path,
+        before,
+        after,
+        (1 - after / before) * 100 if before else 0.0,
+    )
+    write_parquet(encoded, path)
+
+
+def domain_categories(frames: Iterable[pd.DataFrame]) -> Dict[str, List[str]]:
+    """Sorted union of the values of every domain across ``frames``, plus "" so fillna("") works."""
+    categories: Dict[str, set] = {domain: {""} for domain in CATEGORY_DOMAINS}
+    for df in frames:
+        for col in df.columns.intersection(list(CATEGORICAL_COLUMNS)):
+            values = df[col].cat.categories if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].dropna().unique()
+            categories[CATEGORICAL_COLUMNS[col]].update(values)
+    return {domain: sorted(values) for domain, values in categories.items()}
+
+
+def write_categories(frames: Iterable[pd.DataFrame], path: str) -> None:
+    """Persist the shared category sets so readers can encode a single artifact or projection without loading the rest."""
+    write_json(domain_categories(frames), path)
+
+
+def read_categories(path: str) -> Optional[Dict[str, List[str]]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def coerce_datetimes(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse declared datetime columns read as text, in place; stored timestamps pass through without a pass over the data."""
+    for col in df.columns.intersection(DATETIME_COLUMNS):
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+def encode_categories(df: pd.DataFrame, categories: Dict[str, List[str]]) -> pd.DataFrame:
+    df = df.copy()
+    for col in df.columns.intersection(list(CATEGORICAL_COLUMNS)):
+        df[col] = _categorical(df[col], categories[CATEGORICAL_COLUMNS[col]])
+    return df
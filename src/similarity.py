@@ -0,0 +1,114 @@
+import os
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.comps import JOB_SEGMENT_LABELS
+from src.utils import job_labels
+
+SIMILARITY_INDEX_FILE = "job_similarity_index.npz"
+TEXT_COLUMNS = ["job_no", "dept", "Product"]
+
+
+class JobSimilarityIndex:
+    """Cosine k-NN over jobs' task-hour vectors, for comparing a draft quote with delivered jobs.
+
+    Rows are L2-normalised, so a query is one sparse matrix-vector product
+    over the stored non-zeros.
+    """
+
+    def __init__(self, matrix: sparse.csr_matrix, tasks: np.ndarray, jobs: pd.DataFrame):
+        self.matrix = matrix
+        self.tasks = tasks
+        self.task_positions = {task: position for position, task in enumerate(tasks.tolist())}
+        self.jobs = jobs
+        self.dept_codes, self.depts = pd.factorize(jobs["dept"])
+        self.product_codes, self.products = pd.factorize(jobs["Product"])
+
+    @classmethod
+    def build(cls, fact: pd.DataFrame) -> "JobSimilarityIndex":
+        df = fact[fact["task_name"] != "__UNALLOCATED__"]
+        totals = df.groupby("job_no", as_index=False).agg(
+            actual_hours=("actual_hours", "sum"),
+            rev_alloc=("rev_alloc", "sum"),
+            gp=("gp", "sum"),
+        )
+        jobs = job_labels(df, JOB_SEGMENT_LABELS, "actual_hours").merge(totals, on="job_no", how="left")
+        jobs["margin"] = np.where(jobs["rev_alloc"] > 0, jobs["gp"] / jobs["rev_alloc"], 0.0)
+        jobs[["dept", "Product"]] = jobs[["dept", "Product"]].fillna("")
+
+        hours = df.groupby(["job_no", "task_name"], as_index=False).agg(hours=("actual_hours", "sum"))
+        hours = hours[hours["hours"] > 0]
+        task_codes, tasks = pd.factorize(hours["task_name"], sort=True)
+        job_codes = pd.Index(jobs["job_no"]).get_indexer(hours["job_no"])
+        matrix = sparse.csr_matrix(
+            (hours["hours"].to_numpy(dtype=float), (job_codes, task_codes)),
+            shape=(len(jobs), len(tasks)),
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        matrix = sparse.diags(np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)) @ matrix
+        return cls(matrix.tocsr(), np.asarray(tasks, dtype=str), jobs)
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            data=self.matrix.data,
+            indices=self.matrix.indices,
+            indptr=self.matrix.indptr,
+            shape=np.asarray(self.matrix.shape),
+            tasks=self.tasks,
+            **{f"job_{col}": self.jobs[col].to_numpy(dtype=str if col in TEXT_COLUMNS else float) for col in self.jobs.columns},
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "JobSimilarityIndex":
+        with np.load(path) as stored:
+            matrix = sparse.csr_matrix((stored["data"], stored["indices"], stored["indptr"]), shape=tuple(stored["shape"]))
+            jobs = pd.DataFrame({key[len("job_"):]: stored[key] for key in stored.files if key.startswith("job_")})
+            return cls(matrix, stored["tasks"], jobs)
+
+    def query(
+        self,
+        draft: Union[Dict[str, float], pd.Series],
+        k: int = 10,
+        dept: Optional[str] = None,
+        product: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """The ``k`` jobs most similar to ``draft`` (task name -> hours), optionally within one segment.
+
+        Tasks the index has never seen still count towards the draft's norm,
+        so a draft made mostly of new tasks scores low against everything.
+        """
+        draft = pd.Series(draft, dtype=float)
+        draft = draft[draft > 0]
+        norm = float(np.sqrt((draft ** 2).sum()))
+        if norm == 0 or not len(self.jobs):
+            return self.jobs.iloc[0:0].assign(similarity=pd.Series(dtype=float))
+
+        vector = np.zeros(len(self.tasks))
+        for task, hours in draft.items():
+            position = self.task_positions.get(task)
+            if position is not None:
+                vector[position] = hours / norm
+        scores = self.matrix @ vector
+
+        candidates = np.flatnonzero(scores > 0)
+        for value, codes, values in [(dept, self.dept_codes, self.depts), (product, self.product_codes, self.products)]:
+            if value:
+                candidates = candidates[codes[candidates] == values.get_indexer([value])[0]]
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return self.jobs.iloc[candidates].assign(similarity=scores[candidates]).reset_index(drop=True)
+
+
+def build_similarity_index(fact: pd.DataFrame) -> JobSimilarityIndex:
+    return JobSimilarityIndex.build(fact)
+
+
+def write_similarity_index(index: JobSimilarityIndex, path: str) -> None:
+    index.save(path)
@@ -0,0 +1,121 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils import linear_percentile
+
+# Log-bucket quantile sketches in the style of DDSketch. A value x > 0 falls in
+# bucket ceil(log_gamma(x)), where gamma = (1 + a) / (1 - a) for relative
+# accuracy a. Each bucket is estimated by one representative that lies within
+# a of every value in it. A sketch is just (bucket, count) pairs, so sketches
+# merge by adding the counts for each bucket; that works as a groupby-sum over
+# any set of stored rows. Values <= 0 share ZERO_BUCKET and estimate as 0.
+ZERO_BUCKET = np.iinfo(np.int32).min
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+def _gamma(relative_accuracy: float) -> float:
+    return (1 + relative_accuracy) / (1 - relative_accuracy)
+
+
+def sketch_buckets(values: np.ndarray, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    buckets = np.full(len(values), ZERO_BUCKET, dtype=np.int32)
+    positive = values > 0
+    buckets[positive] = np.ceil(np.log(values[positive]) / np.log(_gamma(relative_accuracy)))
+    return buckets
+
+
+def bucket_values(buckets: np.ndarray, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> np.ndarray:
+    buckets = np.asarray(buckets)
+    gamma = _gamma(relative_accuracy)
+    values = np.zeros(len(buckets))
+    positive = buckets != ZERO_BUCKET
+    values[positive] = 2 * gamma ** buckets[positive].astype(float) / (gamma + 1)
+    return values
+
+
+def sketch_quantiles(
+    group_ids: np.ndarray,
+    buckets: np.ndarray,
+    counts: np.ndarray,
+    n_groups: int,
+    quantiles: Sequence[float],
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+) -> np.ndarray:
+    """Quantiles of every group's merged sketch; rows may repeat a (group, bucket) pair.
+
+    Ranks are interpolated like np.percentile's default method. For positive
+    values each estimate is within ``relative_accuracy`` (relative) of the
+    exact quantile of the sketched values. Returns an ``(n_groups,
+    len(quantiles))`` array with 0.0 for empty groups.
+    """
+    group_ids = np.asarray(group_ids, dtype=np.intp)
+    order = np.lexsort((buckets, group_ids))
+    counts = np.asarray(counts, dtype=np.int64)[order]
+    values = bucket_values(np.asarray(buckets)[order], relative_accuracy)
+    cumulative = np.cumsum(counts)
+    totals = np.bincount(group_ids[order], weights=counts, minlength=n_groups).astype(np.int64)
+    starts = np.cumsum(totals) - totals
+
+    result = np.zeros((n_groups, len(quantiles)))
+    present = totals > 0
+    n, start = totals[present], starts[present]
+    for position, q in enumerate(quantiles):
+        result[present, position] = linear_percentile(
+            n, q, lambda rank: values[np.searchsorted(cumulative, start + rank, side="right")]
+        )
+    return result
+
+
+# HyperLogLog distinct-count sketches. Each value hashes to one register and a
+# rank (one plus the leading zero bits of the rest of the hash). A sketch is
+# the maximum rank seen per register, so sketches merge with a groupby-max.
+# The standard error is about 1.04 / sqrt(2 ** precision) (0.8% at 14), and
+# small counts use linear counting, which is close to exact.
+HLL_PRECISION = 14
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.int64)
+    for shift in [32, 16, 8, 4, 2, 1]:
+        wide = values >= np.uint64(1 << shift)
+        length[wide] += shift
+        values[wide] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+def hll_registers(values: np.ndarray, precision: int = HLL_PRECISION) -> Tuple[np.ndarray, np.ndarray]:
+    """(register, rank) of every value; equal values always land on the same pair."""
+    hashes = pd.util.hash_array(np.asarray(values, dtype=object))
+    registers = (hashes >> np.uint64(64 - precision)).astype(np.int16)
+    rest = hashes & np.uint64((1 << (64 - precision)) - 1)
+    ranks = ((64 - precision) - _bit_length(rest) + 1).astype(np.int8)
+    return registers, ranks
+
+
+def hll_estimate(
+    group_ids: np.ndarray,
+    registers: np.ndarray,
+    ranks: np.ndarray,
+    n_groups: int,
+    precision: int = HLL_PRECISION,
+) -> np.ndarray:
+    """Distinct-count estimate per group from (register, rank) rows; rows may repeat a register."""
+    m = 1 << precision
+    merged = (
+        pd.DataFrame({"group": group_ids, "register": registers, "rank": ranks})
+        .groupby(["group", "register"], sort=False)["rank"]
+        .max()
+        .reset_index()
+    )
+    groups = merged["group"].to_numpy(dtype=np.intp)
+    filled = np.bincount(groups, minlength=n_groups)
+    zeros = m - filled
+    harmonic = np.bincount(groups, weights=np.exp2(-merged["rank"].to_numpy(dtype=float)), minlength=n_groups) + zeros
+    raw = 0.7213 / (1 + 1.079 / m) * m * m / harmonic
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    estimate = np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+    return np.where(filled > 0, estimate, 0.0)
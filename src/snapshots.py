@@ -0,0 +1,77 @@
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from src.utils import current_timestamp, write_json
+
+# Each build writes a complete snapshot under <root>/snapshots/<id>/ and then
+# replaces <root>/CURRENT, a one-line file naming it. Readers resolve CURRENT
+# once and read only from that directory, so they never see a half-written
+# build. Snapshot ids sort in build start order.
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"
+SNAPSHOT_MANIFEST_FILE = "snapshot.json"
+DEFAULT_RETENTION = 3
+
+
+def new_snapshot_id() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def snapshot_path(root: str, snapshot_id: str) -> str:
+    return os.path.join(root, SNAPSHOTS_DIR, snapshot_id)
+
+
+def current_snapshot(root: str) -> Optional[str]:
+    """Id of the published snapshot, or None for outputs written before snapshots existed."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as handle:
+            return handle.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_processed_dir(root: str) -> str:
+    """Directory holding the current build's artifacts: the published snapshot, else ``root`` itself."""
+    snapshot_id = current_snapshot(root)
+    return snapshot_path(root, snapshot_id) if snapshot_id else root
+
+
+def write_snapshot_manifest(root: str, snapshot_id: str) -> Dict:
+    directory = snapshot_path(root, snapshot_id)
+    files = {}
+    for parent, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(parent, name)
+            files[os.path.relpath(path, directory).replace(os.sep, "/")] = os.path.getsize(path)
+    manifest = {"snapshot": snapshot_id, "created": current_timestamp(), "files": dict(sorted(files.items()))}
+    write_json(manifest, os.path.join(directory, SNAPSHOT_MANIFEST_FILE))
+    return manifest
+
+
+def publish_snapshot(root: str, snapshot_id: str) -> None:
+    """Point CURRENT at ``snapshot_id`` with an atomic rename."""
+    tmp_path = os.path.join(root, f"{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        handle.write(snapshot_id + "\n")
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def prune_snapshots(root: str, retention: int = DEFAULT_RETENTION) -> List[str]:
+    """Delete snapshots older than the current one, keeping ``retention`` snapshots including it.
+
+    Snapshots newer than CURRENT belong to builds still in progress and are
+    never touched; older unpublished ones (failed builds) are pruned like any other.
+    """
+    current = current_snapshot(root)
+    directory = os.path.join(root, SNAPSHOTS_DIR)
+    if current is None or not os.path.isdir(directory):
+        return []
+    older = sorted(name for name in os.listdir(directory) if name < current)
+    removed = older[:max(len(older) - max(retention - 1, 0), 0)]
+    for name in removed:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    return removed
@@ -1,8 +1,10 @@
+import copy
 import json
 import logging
 import os
+import threading
 from datetime import datetime
-from typing import Dict, Tuple
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -22,13 +24,51 @@ def setup_logger(name: str = "job_profitability", level: str = "INFO") -> loggin
     return logger
 
 
-def read_settings(path: str = "config/settings.yaml") -> Dict:
-    if not os.path.exists(path):
-        return {}
+class ConfigFiles:
+    """Settings YAML and mapping CSVs, parsed once per process and re-parsed when a file's mtime or size changes.
+
+    Callers get their own copy, so edits take effect on the next call without a
+    restart and nothing a caller does leaks into the cache.
+    """
+
+    def __init__(self):
+        self._entries: Dict[tuple, Tuple[Tuple[int, int], Any]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, key: tuple, path: str, parse: Callable[[str], Any], default: Any) -> Any:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return default
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                entry = (version, parse(path))
+                self._entries[key] = entry
+        return entry[1]
+
+    def settings(self, path: str) -> Dict:
+        return copy.deepcopy(self._load(("settings", path), path, _parse_settings, {}))
+
+    def mapping(self, path: str, key_col: str, value_col: str) -> Dict[str, str]:
+        return dict(self._load(("mapping", path, key_col, value_col), path, lambda p: _parse_mapping(p, key_col, value_col), {}))
+
+
+def _parse_settings(path: str) -> Dict:
     with open(path, "r", encoding="utf-8") as handle:
         return yaml.safe_load(handle) or {}
 
 
+CONFIG_FILES = ConfigFiles()
+
+
+def read_settings(path: str = "config/settings.yaml") -> Dict:
+    return CONFIG_FILES.settings(path)
+
+
 def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
@@ -63,38 +103,185 @@ def normalize_department(value: object) -> str:
     return normalize_text(value).upper()
 
 
+def grouped_weighted_mode(
+    df: pd.DataFrame,
+    keys: Union[str, List[str]],
+    value_col: str,
+    weight_col: str,
+    normalizer: Callable[[object], str] = normalize_text,
+    mixed_threshold: float = 0.7,
+    return_distribution: bool = False,
+) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Weighted mode of ``value_col`` for every ``keys`` group in one sort-and-reduce pass.
+
+    Values are normalized once per distinct raw value and blanks are ignored.
+    Ties on weight resolve to the alphabetically first value, so results are
+    deterministic. Returns one row per group (in sorted key order) with
+    ``top_value``, ``top_share``, ``distinct_count`` (distinct raw values,
+    blanks included) and ``mixed`` (more than one value and a top share below
+    ``mixed_threshold``). With ``return_distribution`` the long-format
+    ``(keys, value, weight, share, rank)`` distribution is returned as well.
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    grouper = df.groupby(keys, sort=True)
+    group_ids = grouper.ngroup().to_numpy()
+    groups = grouper.size().index.to_frame(index=False)
+    n_groups = len(groups)
+
+    raw_codes, raw_uniques = pd.factorize(df[value_col].fillna("").astype(str))
+    normalized = np.array([normalizer(value) for value in raw_uniques], dtype=object)
+    norm_codes, norm_uniques = pd.factorize(normalized, sort=True)
+    norm_uniques = np.asarray(norm_uniques, dtype=object)
+    value_codes = norm_codes[raw_codes]
+    weights = pd.to_numeric(df[weight_col], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+
+    in_group = group_ids >= 0
+    distinct = pd.DataFrame({"g": group_ids[in_group], "v": raw_codes[in_group]}).drop_duplicates()
+    distinct_count = np.bincount(distinct["g"].to_numpy(), minlength=n_groups)
+
+    keep = in_group & (norm_uniques[value_codes] != "")
+    dist = (
+        pd.DataFrame({"g": group_ids[keep], "v": value_codes[keep], "w": weights[keep]})
+        .groupby(["g", "v"], as_index=False)["w"]
+        .sum()
+    )
+    order = np.lexsort((dist["v"].to_numpy(), -dist["w"].to_numpy(), dist["g"].to_numpy()))
+    dist = dist.iloc[order].reset_index(drop=True)
+    dist_groups = dist["g"].to_numpy()
+    total = dist.groupby("g")["w"].transform("sum").to_numpy()
+    dist["share"] = np.divide(dist["w"].to_numpy(), total, out=np.zeros(len(dist)), where=total != 0)
+    dist["rank"] = dist.groupby("g").cumcount()
+
+    top = dist[dist["rank"] == 0]
+    top_groups = top["g"].to_numpy()
+    top_value = np.full(n_groups, "", dtype=object)
+    top_share = np.zeros(n_groups, dtype=float)
+    top_value[top_groups] = norm_uniques[top["v"].to_numpy()]
+    top_share[top_groups] = top["share"].to_numpy()
+
+    summary = groups.assign(
+        top_value=top_value,
+        top_share=top_share,
+        distinct_count=distinct_count,
+        mixed=((distinct_count > 1) & (top_share < mixed_threshold)).astype(int),
+    )
+    if not return_distribution:
+        return summary
+
+    distribution = groups.iloc[dist_groups].reset_index(drop=True).assign(
+        value=norm_uniques[dist["v"].to_numpy()],
+        weight=dist["w"].to_numpy(),
+        share=dist["share"].to_numpy(),
+        rank=dist["rank"].to_numpy(),
+    )
+    return summary, distribution
+
+
+def job_labels(df: pd.DataFrame, labels: Dict[str, str], weight_col: str, key: str = "job_no") -> pd.DataFrame:
+    """One value per ``key`` for each ``{output: source}`` label column, independent of row order.
+
+    Each label is the ``weight_col``-weighted mode of its non-blank values
+    (ties, including all-zero weights, go to the alphabetically first value);
+    keys with no value get NaN. Rows are the sorted keys, as ``groupby`` returns them.
+    """
+    result = None
+    for name, source in labels.items():
+        top = grouped_weighted_mode(df, key, source, weight_col, normalizer=str)
+        column = top[[key]].assign(**{name: top["top_value"].where(top["top_value"] != "")})
+        result = column if result is None else result.merge(column, on=key, how="left")
+    return result
+
+
+def grouped_quantiles(
+    values: np.ndarray,
+    group_ids: np.ndarray,
+    n_groups: int,
+    quantiles: Sequence[float],
+) -> np.ndarray:
+    """Quantiles of ``values`` within each group, from one sort shared by every quantile.
+
+    Uses np.percentile's default linear interpolation (same index and
+    interpolation arithmetic), so each group matches ``np.percentile(group,
+    q * 100)``. Returns an ``(n_groups, len(quantiles))`` array with 0.0 for
+    empty groups.
+    """
+    values = np.asarray(values, dtype=float)
+    group_ids = np.asarray(group_ids, dtype=np.intp)
+    sorted_values = values[np.lexsort((values, group_ids))]
+    counts = np.bincount(group_ids, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+
+    result = np.zeros((n_groups, len(quantiles)))
+    present = counts > 0
+    n, start = counts[present], starts[present]
+    for position, q in enumerate(quantiles):
+        result[present, position] = linear_percentile(n, q, lambda rank: sorted_values[start + rank])
+    return result
+
+
+def linear_percentile(n: np.ndarray, q: float, value_at: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+    """Quantile ``q`` of groups of ``n`` sorted values, interpolated like np.percentile's default method.
+
+    ``value_at`` maps each group's 0-based ranks to the values at those ranks.
+    grouped_quantiles and the sketch quantiles both interpolate here.
+    """
+    virtual = (n - 1) * q
+    previous = np.floor(virtual)
+    gamma = virtual - previous
+    previous = np.minimum(previous, n - 1).astype(np.int64)
+    following = np.minimum(previous + 1, n - 1)
+    lower, upper = value_at(previous), value_at(following)
+    diff = upper - lower
+    return np.where(gamma >= 0.5, upper - diff * (1 - gamma), lower + diff * gamma)
+
+
 def weighted_mode(values: pd.Series, weights: pd.Series) -> Tuple[str, float]:
-    tmp = pd.DataFrame({"v": values.fillna("").astype(str), "w": pd.to_numeric(weights, errors="coerce").fillna(0.0)})
-    tmp["v"] = tmp["v"].map(normalize_text)
-    tmp = tmp[tmp["v"] != ""]
-    if tmp.empty:
+    frame = pd.DataFrame({"group": 0, "v": values.to_numpy(), "w": weights.to_numpy()})
+    summary = grouped_weighted_mode(frame, "group", "v", "w")
+    if summary.empty:
         return "", 0.0
-    dist = tmp.groupby("v", as_index=False)["w"].sum().sort_values("w", ascending=False)
-    top_value = str(dist.iloc[0]["v"])
-    total = float(dist["w"].sum())
-    share = float(dist.iloc[0]["w"] / total) if total else 0.0
-    return top_value, share
+    return str(summary["top_value"].iloc[0]), float(summary["top_share"].iloc[0])
 
 
-def load_mapping(path: str, key_col: str, value_col: str) -> Dict[str, str]:
-    if not os.path.exists(path):
-        return {}
+def _normalized_text(series: pd.Series) -> pd.Series:
+    """Vectorized normalize_text."""
+    text = series.astype(object).where(series.notna(), "").astype(str)
+    return text.str.split().str.join(" ")
+
+
+def _parse_mapping(path: str, key_col: str, value_col: str) -> Dict[str, str]:
     df = pd.read_csv(path)
     if key_col not in df.columns or value_col not in df.columns:
         return {}
-    mapping = {}
-    for _, row in df.iterrows():
-        raw = normalize_text(row.get(key_col, ""))
-        target = normalize_text(row.get(value_col, ""))
-        if raw:
-            mapping[raw] = target
-    return mapping
+    raw = _normalized_text(df[key_col])
+    target = _normalized_text(df[value_col])
+    keep = (raw != "").to_numpy()
+    return dict(zip(raw[keep], target[keep]))
+
+
+def load_mapping(path: str, key_col: str, value_col: str) -> Dict[str, str]:
+    return CONFIG_FILES.mapping(path, key_col, value_col)
+
+
+def map_unique(series: pd.Series, func: Callable[[object], object]) -> pd.Series:
+    """``series.map(func)`` evaluated once per distinct value and broadcast back through factorized codes.
+
+    Columns mixing value types (e.g. ``1`` and ``True``, which hash equal) fall
+    back to a per-row map so results never depend on which variant was seen first.
+    """
+    if pd.api.types.infer_dtype(series, skipna=True).startswith("mixed"):
+        return series.map(func)
+    codes, uniques = pd.factorize(series)
+    mapped = np.empty(len(uniques) + 1, dtype=object)
+    mapped[:-1] = [func(value) for value in uniques]
+    mapped[-1] = func(np.nan)  # missing values carry code -1
+    return pd.Series(mapped[codes], index=series.index, name=series.name).infer_objects()
 
 
 def apply_mapping(series: pd.Series, mapping: Dict[str, str]) -> pd.Series:
     if not mapping:
         return series
-    return series.map(lambda x: mapping.get(normalize_text(x), normalize_text(x)))
+    return map_unique(series, lambda x: mapping.get(normalize_text(x), normalize_text(x)))
 
 
 def write_json(payload: Dict, path: str) -> None:
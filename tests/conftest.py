@@ -0,0 +1,95 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(REPO_ROOT)
+
+from src.build import build_dataset
+from src.etl.pipeline import run_pipeline
+from src.snapshots import resolve_processed_dir
+
+
+def make_workbook(path: str, n_jobs: int = 40, seed: int = 0) -> None:
+    """Small three-sheet workbook in the export's layout: revenue, timesheet and quote lines for ``n_jobs`` jobs."""
+    rng = np.random.default_rng(seed)
+    months = pd.date_range("2024-07-01", "2025-06-01", freq="MS")
+    departments = ["Creative", "Digital", "Strategy"]
+    timesheet, quotes, revenue = [], [], []
+    for i in range(n_jobs):
+        job = f"J{i:05d}"
+        dept = departments[i % len(departments)]
+        product = ["Brand", "Web", "Video"][i % 3]
+        tasks = rng.choice([f"Task {t}" for t in range(12)], size=int(rng.integers(2, 6)), replace=False)
+        for task in tasks:
+            for _ in range(int(rng.integers(1, 4))):
+                month = months[int(rng.integers(0, len(months)))]
+                timesheet.append({
+                    "[Job] Job No.": job,
+                    "[Job Task] Name": task,
+                    "Month Key": month,
+                    "[Time] Date": month + pd.Timedelta(days=int(rng.integers(0, 27))),
+                    "[Time] Time": round(float(rng.exponential(5.0)), 2),
+                    "[Task] Base Rate": float(rng.choice([80, 100, 120])),
+                    "[Task] Billable Rate": 180.0,
+                    "Billable?": rng.choice(["Yes", "No"]),
+                    "Onshore": rng.choice(["Y", "N"]),
+                    "Department": dept if rng.random() < 0.85 else rng.choice(departments),
+                    "[Staff] Name": f"S{int(rng.integers(0, 10))}",
+                    "Role": rng.choice(["Designer", "PM", "Dev"]),
+                    "[Category] Category": "Cat",
+                    "Deliverable": "D",
+                    "Function": "F",
+                })
+            if rng.random() < 0.8:
+                quotes.append({
+                    "[Job] Job No.": job,
+                    "[Job Task] Name": task,
+                    "[Job Task] Quoted Time": float(rng.integers(1, 30)),
+                    "[Job Task] Quoted Amount": float(rng.integers(100, 5000)),
+                    "Department": dept,
+                    "Product": product,
+                    "[Job] Client": f"Client {i % 7}",
+                    "[Job] Category": "X",
+                    "[Job] Status": "Active",
+                    "[Job] Name": f"Job {job}",
+                    "[Job Task] Start Date": months[0],
+                    "[Job] Start Date": months[0],
+                    "[Job Task] Due Date": months[-1],
+                    "[Job] Due Date": months[-1],
+                })
+        for month in rng.choice(months, size=int(rng.integers(1, 4)), replace=False):
+            revenue.append({"Job Number": job, "Month": month, "Excluded": "", "Amount": float(rng.integers(500, 20000)), "FY": "FY25"})
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame(revenue).to_excel(writer, sheet_name="Monthly Revenue", index=False)
+        pd.DataFrame(timesheet).to_excel(writer, sheet_name="Timesheet Data", index=False)
+        pd.DataFrame(quotes).to_excel(writer, sheet_name="Quotation Data", index=False)
+
+
+@pytest.fixture(scope="session")
+def workbook(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("input") / "input.xlsx")
+    make_workbook(path)
+    return path
+
+
+@pytest.fixture(scope="session")
+def processed_dir(tmp_path_factory, workbook):
+    """Current snapshot directory of a full build over the synthetic workbook."""
+    root = tmp_path_factory.mktemp("build")
+    with pytest.MonkeyPatch.context() as patch:
+        # The build reads config/ relative to the working directory.
+        patch.chdir(REPO_ROOT)
+        build_dataset(workbook, output_dir=str(root / "processed"), cache_dir=str(root / "cache"))
+    return resolve_processed_dir(str(root / "processed"))
+
+
+@pytest.fixture(scope="session")
+def etl_fact(tmp_path_factory, workbook):
+    """Fact written by the ETL pipeline (``src/etl``) over the synthetic workbook, with its ``*_quote`` columns."""
+    output_dir = str(tmp_path_factory.mktemp("etl"))
+    run_pipeline(workbook, output_dir)
+    return pd.read_csv(os.path.join(output_dir, "fact_job_task_month.csv"))
@@ -0,0 +1,38 @@
+import pytest
+
+from src.analytics.smart_builder import SmartBuilder
+from src.analytics.variance_engine import QUOTE_ATTRIBUTES, VarianceEngine
+from src.query_parity import read_fact
+
+PRODUCT_QUOTE = QUOTE_ATTRIBUTES["Product"]
+
+
+@pytest.fixture(scope="module", params=["build", "etl"])
+def fact(request, processed_dir, etl_fact):
+    """Both fact schemas the engines are given: the processed build's and the ETL pipeline's."""
+    return read_fact(processed_dir) if request.param == "build" else etl_fact
+
+
+def test_variance_engine_reports_quote_attributes(fact):
+    engine = VarianceEngine(fact)
+    problems = engine.get_problem_jobs(min_revenue=0)
+    assert not problems.empty
+    assert problems["Client_quote"].notna().any()
+
+    job_no = problems["job_no"].iloc[0]
+    diagnosis = engine.get_job_diagnosis(job_no)
+    assert set(QUOTE_ATTRIBUTES.values()) <= set(diagnosis.columns)
+    assert diagnosis["Job_Name_quote"].dropna().astype(str).eq(f"Job {job_no}").all()
+
+
+def test_smart_builder_product_benchmarks(fact):
+    builder = SmartBuilder(fact)
+    product = fact[PRODUCT_QUOTE if PRODUCT_QUOTE in fact.columns else "Product"].dropna().astype(str).mode().iloc[0]
+    benchmarks = builder.get_product_benchmarks(product)
+    assert not benchmarks.empty
+    assert (benchmarks["frequency"] > 2).all()
+
+    # Memoized per product, and callers get their own copy.
+    benchmarks["avg_hours"] = 0.0
+    assert builder.get_product_benchmarks(product)["avg_hours"].gt(0).all()
+    assert builder.get_product_benchmarks("no such product").empty
@@ -0,0 +1,69 @@
+import filecmp
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import REPO_ROOT
+from src.build import build_dataset
+from src.snapshots import resolve_processed_dir
+
+# Written fresh by every build: the snapshot's own id and file list, and the QA timestamp.
+PER_BUILD_FILES = {"snapshot.json", "qa_report.json"}
+
+
+def edit_workbook(source: str, target: str) -> None:
+    """``source`` with a few jobs changed: more hours on three, a new client on one, one job dropped and one added."""
+    sheets = pd.read_excel(source, sheet_name=None)
+    timesheet, quotes, revenue = sheets["Timesheet Data"], sheets["Quotation Data"], sheets["Monthly Revenue"]
+    jobs = sorted(timesheet["[Job] Job No."].unique())
+
+    timesheet.loc[timesheet["[Job] Job No."].isin(jobs[:3]), "[Time] Time"] += 1.5
+    quotes.loc[quotes["[Job] Job No."] == jobs[3], "[Job] Client"] = "Client 99"
+
+    dropped, copied = jobs[4], jobs[5]
+    added = []
+    for sheet, column in [(timesheet, "[Job] Job No."), (quotes, "[Job] Job No."), (revenue, "Job Number")]:
+        new_rows = sheet[sheet[column] == copied].assign(**{column: "J99999"})
+        added.append(pd.concat([sheet[sheet[column] != dropped], new_rows], ignore_index=True))
+    timesheet, quotes, revenue = added
+
+    with pd.ExcelWriter(target) as writer:
+        revenue.to_excel(writer, sheet_name="Monthly Revenue", index=False)
+        timesheet.to_excel(writer, sheet_name="Timesheet Data", index=False)
+        quotes.to_excel(writer, sheet_name="Quotation Data", index=False)
+
+
+def snapshot_files(directory: str):
+    return sorted(
+        os.path.relpath(os.path.join(root, name), directory)
+        for root, _, names in os.walk(directory)
+        for name in names
+    )
+
+
+def test_incremental_build_matches_full_build(tmp_path, workbook, caplog):
+    edited = str(tmp_path / "edited.xlsx")
+    edit_workbook(workbook, edited)
+    incremental, full = str(tmp_path / "incremental"), str(tmp_path / "full")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(REPO_ROOT)
+        build_dataset(workbook, output_dir=incremental, cache_dir=str(tmp_path / "cache"))
+        build_dataset(edited, output_dir=incremental, cache_dir=str(tmp_path / "cache"), incremental=True)
+        build_dataset(edited, output_dir=full, cache_dir=str(tmp_path / "cache"))
+    assert "Incremental build: 6 changed jobs" in caplog.text
+
+    incremental, full = resolve_processed_dir(incremental), resolve_processed_dir(full)
+    files = snapshot_files(full)
+    assert snapshot_files(incremental) == files
+    different = [name for name in files if name not in PER_BUILD_FILES and not filecmp.cmp(os.path.join(full, name), os.path.join(incremental, name), shallow=False)]
+    assert not different
+
+    reports = []
+    for directory in [full, incremental]:
+        with open(os.path.join(directory, "qa_report.json"), "r", encoding="utf-8") as handle:
+            report = json.load(handle)
+        report.pop("timestamp", None)
+        reports.append(report)
+    assert reports[0] == reports[1]
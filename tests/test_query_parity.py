@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("duckdb")
+
+from src.analytics.variance_engine import VarianceEngine
+from src.queries import FACT_QUERIES, connect_duckdb
+from src.query_parity import engine_results, filter_cases, frame_diff, query_results, read_fact
+
+
+@pytest.fixture(scope="module")
+def fact(processed_dir):
+    return read_fact(processed_dir)
+
+
+@pytest.fixture(scope="module")
+def connection(processed_dir):
+    return connect_duckdb(processed_dir)
+
+
+def _failures(results, label):
+    diffs = [(name, frame_diff(expected, actual)) for name, expected, actual in results]
+    return [f"{name} [{label}]: {diff}" for name, diff in diffs if diff]
+
+
+def test_page_queries_match(fact, connection):
+    failures = []
+    names = set()
+    for label, filters in filter_cases(fact):
+        results = list(query_results(fact, connection, filters))
+        names |= {name.split(" ")[0] for name, _, _ in results}
+        failures += _failures(results, label)
+    assert names == set(FACT_QUERIES)
+    assert not failures
+
+
+def test_engines_match_on_snapshot_views(fact, connection):
+    failures = _failures(engine_results(fact, connection), "unfiltered")
+    for label, filters in filter_cases(fact):
+        failures += _failures(engine_results(fact, connection, filters), label)
+    assert not failures
+
+
+def test_variance_engine_reports_quote_attributes(fact, connection):
+    problems = VarianceEngine(connection=connection).get_problem_jobs(min_revenue=0)
+    assert not problems.empty
+    assert problems["Client_quote"].notna().any()
+
+    job_no = fact.loc[fact["Client"].notna(), "job_no"].iloc[0]
+    diagnosis = VarianceEngine(connection=connection).get_job_diagnosis(job_no)
+    expected = fact.loc[fact["job_no"] == job_no, "Client"].dropna().astype(str).max()
+    assert diagnosis["Client_quote"].dropna().eq(expected).all()